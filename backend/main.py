@@ -1,14 +1,29 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+import asyncio
+import json
 import logging
 import traceback
 
 from services.predictor import predict_price, get_prediction_confidence
-from services.coins import get_all_coins, is_coin_available
-from services.retrain import retrain_coin, retrain_all_coins
-from services.live_price import get_live_price, get_multiple_prices
+from services.coins import (get_all_coins, is_coin_available, get_asset_category, get_assets_with_data,
+                           ASSET_CATEGORIES)
+from services.retrain import retrain_coin, retrain_all_coins, refresh_scalers
+from services.training_jobs import job_manager
+from services.model_registry import registry
+from services.live_price import get_multiple_prices, SYMBOL_MAP
+from services.quote_cache import quote_cache
+from services.quote_stream import quote_hub, MAX_STREAM_ASSETS
+from services.live_ticks import live_ticks
 from services.risk_metrics import calculate_all_risk_metrics
+from services.market_calendar import infer_bar_seconds, periods_per_year
+from services.risk_engine import calculate_risk_all
+from services.rolling_risk import calculate_rolling_risk
+from services.portfolio_risk import calculate_portfolio_risk, MAX_SIMULATIONS
+from services.risk_bootstrap import bootstrap_risk_all, bootstrap_risk_asset, DEFAULT_RESAMPLES, DEFAULT_SEED
 from explainability.shap_explainer import explain_prediction, get_feature_importance
 import pandas as pd
 import os
@@ -34,9 +49,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Model-Version"],
 )
 
 
+@app.middleware( "http" )
+async def add_model_version_header ( request: Request, call_next ) :
+    """Report the model version that was active for every response."""
+    version = registry.current_version()
+    response = await call_next( request )
+    response.headers["X-Model-Version"] = version or registry.current_version() or "none"
+    return response
+
+
+@app.on_event( "startup" )
+def start_model_registry () :
+    """Load and warm the current model version, then watch for new ones."""
+    bundle = registry.current()
+    if bundle is None :
+        logger.warning( f"⚠️ No model version could be loaded: {registry.last_error}" )
+    else :
+        logger.info( f"✅ Serving model version {bundle.version}" )
+    registry.start_watcher()
+
+
+@app.on_event( "startup" )
+def start_quote_cache () :
+    """Poll recently requested live quotes in the background."""
+    quote_cache.add_listener( live_ticks.record_quote )  # Live prices extend the history used by /predict
+    quote_cache.start()
+
+
+@app.on_event( "shutdown" )
+def stop_quote_cache () :
+    """Stop polling and save the last known quotes for the next start."""
+    quote_hub.stop()
+    quote_cache.stop()
+
+
 @app.get( "/" )
 def root () :
     """API health check endpoint."""
@@ -67,20 +117,6 @@ def list_assets () :
         assets = get_all_coins()
         logger.info( f"📋 Retrieved {len( assets )} assets" )
 
-        # Categorize assets for better organization
-        categories = {
-            "indices" : ["nifty50", "banknifty", "sensex"],
-            "it" : ["tcs", "infosys", "wipro", "hcltech", "techm"],
-            "banking" : ["hdfcbank", "icicibank", "sbi", "kotakbank", "axisbank", "bajajfinance"],
-            "energy" : ["reliance", "ongc", "bpcl", "ioc", "adanigreen"],
-            "automobile" : ["maruti", "tatamotors", "mahindra", "bajajauto", "heromotoco"],
-            "pharma" : ["sunpharma", "drreddy", "cipla", "divislab"],
-            "fmcg" : ["hul", "itc", "nestle", "britannia"],
-            "metals" : ["tatasteel", "hindalco", "coalindia", "vedanta"],
-            "commodities" : ["gold", "silver", "crudeoil"],
-            "currency" : ["usdinr", "gbpinr", "eurinr"]
-        }
-
         # Create detailed asset list
         asset_list = []
         for asset in assets :
@@ -91,17 +127,16 @@ def list_assets () :
             }
 
             # Add category
-            for cat, items in categories.items() :
-                if asset in items :
-                    asset_info["category"] = cat
-                    break
+            category = get_asset_category( asset )
+            if category is not None :
+                asset_info["category"] = category
 
             asset_list.append( asset_info )
 
         return {
             "assets" : assets,
             "detailed" : asset_list,
-            "categories" : categories,
+            "categories" : ASSET_CATEGORIES,
             "count" : len( assets )
         }
     except Exception as e :
@@ -118,6 +153,15 @@ def predict (
             ge=1,
             le=30,
             description="Number of days ahead to predict (1-30)"
+        ),
+        model: str = Query(
+            default="teacher",
+            description="'teacher' (full transformer), 'student' (distilled, low latency) "
+                        "or 'ensemble' (transformer + LSTM + CNN-LSTM)"
+        ),
+        weighting: str = Query(
+            default="per_asset",
+            description="Ensemble combination: 'per_asset' (validation-weighted) or 'mean'"
         )
 ) :
     """
@@ -126,6 +170,8 @@ def predict (
     Parameters:
     - asset: Asset identifier (e.g., 'nifty50', 'reliance', 'gold', 'usdinr')
     - days_ahead: Days into the future to predict (1-30, default: 1)
+    - model: 'teacher', 'student' or 'ensemble' (default: teacher)
+    - weighting: 'per_asset' or 'mean', for the ensemble (default: per_asset)
 
     Returns quantile predictions (q10, q50, q90) representing
     conservative, expected, and optimistic scenarios.
@@ -144,7 +190,7 @@ def predict (
         logger.info( f"✅ Asset '{asset}' is available, generating prediction..." )
 
         # Get prediction
-        prediction = predict_price( asset, days_ahead=days_ahead )
+        prediction = predict_price( asset, days_ahead=days_ahead, model_type=model, ensemble_weighting=weighting )
         logger.info( f"✅ Prediction successful for {asset} ({days_ahead} days ahead)" )
 
         # Get confidence metrics
@@ -159,7 +205,8 @@ def predict (
         # Add metadata
         prediction["prediction_metadata"] = {
             "days_ahead" : days_ahead,
-            "model_version" : "1.0.0",
+            "model_version" : prediction["model_version"],
+            "model" : model,
             "prediction_type" : "quantile_regression",
             "currency" : "INR" if asset not in ['gold', 'silver', 'crudeoil'] else "USD"
         }
@@ -183,24 +230,129 @@ def predict (
         raise HTTPException( status_code=500, detail=error_msg )
 
 
+MAX_BATCH_ASSETS = 100
+STREAM_KEEPALIVE = 15  # Seconds of silence before a keep-alive comment is sent
+
+
+def _live_currency ( asset: str ) -> str :
+    """Quote currency of a live price."""
+    if asset in ['gold', 'silver', 'crudeoil'] :
+        return "USD"
+    if asset in ['usdinr', 'gbpinr', 'eurinr'] :
+        return "INR per foreign unit"
+    return "INR"
+
+
+def _parse_assets ( assets: str, limit: int ) -> list :
+    """Unique asset identifiers from a comma-separated list (400 if empty or too long)."""
+    requested = list( dict.fromkeys( a.strip().lower() for a in assets.split( "," ) if a.strip() ) )
+    if not requested :
+        raise HTTPException( status_code=400, detail="No assets given" )
+    if len( requested ) > limit :
+        raise HTTPException( status_code=400, detail=f"At most {limit} assets per request" )
+    return requested
+
+
+def _require_live_assets ( assets: list ) :
+    """404 if any asset has no live price symbol."""
+    unknown = [asset for asset in assets if asset not in SYMBOL_MAP]
+    if unknown :
+        raise HTTPException( status_code=404, detail=f"No live prices for: {', '.join( unknown )}" )
+
+
+@app.get( "/live/batch" )
+def live_price_batch (
+        assets: str = Query( ..., description="Comma-separated asset identifiers, e.g. reliance,tcs,gold" )
+) :
+    """
+    Get current live prices for many assets in one request.
+
+    Quotes come from the shared quote cache; assets not cached yet are
+    fetched together in one grouped upstream request. Assets that could
+    not be priced are listed under "errors" with the reason instead of
+    failing the whole request.
+    """
+    requested = _parse_assets( assets, MAX_BATCH_ASSETS )
+    # Unknown names are reported per asset and never reach (or get tracked by) the cache
+    known = [asset for asset in requested if asset in SYMBOL_MAP]
+    unknown = {asset : f"Asset '{asset}' not found" for asset in requested if asset not in SYMBOL_MAP}
+
+    try :
+        logger.info( f"💰 Live prices requested for {len( requested )} assets" )
+        quotes, errors = quote_cache.get_many( known ) if known else ({}, {})
+    except Exception as e :
+        logger.error( f"❌ Batch live price error: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+    return {
+        "count" : len( quotes ),
+        "prices" : {
+            asset : {**quote.to_dict( quote_cache.fresh_seconds ), "currency" : _live_currency( asset )}
+            for asset, quote in quotes.items()
+        },
+        "errors" : {**unknown, **errors}
+    }
+
+
+@app.get( "/live/stream" )
+async def live_price_stream (
+        request: Request,
+        assets: str = Query( ..., description="Comma-separated asset identifiers, e.g. reliance,tcs,gold" )
+) :
+    """
+    Stream live prices as Server-Sent Events.
+
+    Each event is a "quote" event whose data is the same JSON as /live/{asset}.
+    The latest cached quotes are sent on connect, then every new quote as
+    the shared poller fetches it (about every STREAM_INTERVAL seconds). All
+    clients share one upstream poll per asset, and a client that reads
+    slowly gets only the latest quote of each asset rather than a backlog.
+    """
+    requested = _parse_assets( assets, MAX_STREAM_ASSETS )
+    _require_live_assets( requested )
+
+    subscription = quote_hub.subscribe( requested, asyncio.get_running_loop() )
+    logger.info( f"📡 Live stream opened for {len( requested )} assets ({quote_hub.clients()} clients)" )
+
+    async def events () :
+        try :
+            while not await request.is_disconnected() :
+                quotes = await subscription.next( timeout=STREAM_KEEPALIVE )
+                if not quotes :
+                    yield ": keep-alive\n\n"
+                    continue
+                for asset, quote in quotes.items() :
+                    data = {
+                        "asset" : asset,
+                        **quote.to_dict( quote_cache.fresh_seconds ),
+                        "currency" : _live_currency( asset )
+                    }
+                    yield f"event: quote\ndata: {json.dumps( data )}\n\n"
+        finally :
+            quote_hub.unsubscribe( subscription )
+            logger.info( f"📡 Live stream closed ({subscription.coalesced} ticks coalesced)" )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control" : "no-cache", "X-Accel-Buffering" : "no"}
+    )
+
+
 @app.get( "/live/{asset}" )
 def live_price ( asset: str ) :
     """Get current live price for an Indian market asset."""
+    _require_live_assets( [asset] )
+
     try :
         logger.info( f"💰 Live price requested for: {asset}" )
-        price = get_live_price( asset )
-
-        # Determine currency
-        currency = "INR"
-        if asset in ['gold', 'silver', 'crudeoil'] :
-            currency = "USD"
-        elif asset in ['usdinr', 'gbpinr', 'eurinr'] :
-            currency = "INR per foreign unit"
+        quote = quote_cache.get( asset )
 
         return {
             "asset" : asset,
-            "price" : price,
-            "currency" : currency
+            **quote.to_dict( quote_cache.fresh_seconds ),
+            "currency" : _live_currency( asset )
         }
     except Exception as e :
         logger.error( f"❌ Live price error for {asset}: {e}" )
@@ -208,6 +360,106 @@ def live_price ( asset: str ) :
         raise HTTPException( status_code=500, detail=str( e ) )
 
 
+def _category_assets ( category: Optional[str] ) :
+    """Assets with data, optionally limited to one category (404 if unknown)."""
+    assets = get_assets_with_data()
+    if category is not None :
+        if category.lower() not in ASSET_CATEGORIES :
+            raise HTTPException(
+                status_code=404,
+                detail=f"Category '{category}' not found. Available: {list( ASSET_CATEGORIES.keys() )}"
+            )
+        members = set( ASSET_CATEGORIES[category.lower()] )
+        assets = [asset for asset in assets if asset in members]
+    return assets
+
+
+# Declared before /risk/{asset} so "all" is not taken as an asset name
+@app.get( "/risk/all" )
+def risk_analysis_all (
+        category: Optional[str] = Query(
+            default=None,
+            description="Only assets in this category (see /assets); omit for every asset"
+        ),
+        confidence: float = Query( default=0.95, gt=0, lt=1, description="Confidence level for VaR/CVaR" )
+) :
+    """Get risk metrics for every asset (or one category) in a single vectorised pass."""
+    assets = _category_assets( category )
+
+    try :
+        metrics = calculate_risk_all( assets, confidence )
+    except Exception as e :
+        logger.error( f"❌ Bulk risk analysis error: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+    logger.info( f"📊 Risk analysis complete for {len( metrics )} assets" )
+    return {
+        "category" : category,
+        "confidence" : confidence,
+        "count" : len( metrics ),
+        "metrics" : metrics
+    }
+
+
+@app.get( "/risk/all/bootstrap" )
+def risk_bootstrap_all (
+        category: Optional[str] = Query( default=None, description="Only assets in this category (see /assets)" ),
+        confidence: float = Query( default=0.95, gt=0, lt=1, description="Confidence level for VaR/CVaR" ),
+        interval: float = Query( default=0.90, gt=0, lt=1, description="Coverage of the confidence intervals" ),
+        resamples: int = Query( default=DEFAULT_RESAMPLES, ge=100, le=10000 ),
+        block_size: Optional[int] = Query( default=None, ge=1, description="Block length (default: n^(1/3))" ),
+        seed: int = Query( default=DEFAULT_SEED )
+) :
+    """Get block-bootstrap confidence intervals of VaR, CVaR, volatility and Sharpe for many assets."""
+    assets = _category_assets( category )
+
+    try :
+        intervals = bootstrap_risk_all(
+            assets, resamples=resamples, block_size=block_size, confidence=confidence,
+            interval=interval, seed=seed
+        )
+    except ValueError as e :
+        raise HTTPException( status_code=400, detail=str( e ) )
+    except Exception as e :
+        logger.error( f"❌ Bulk bootstrap error: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+    logger.info( f"📊 Bootstrap intervals complete for {len( intervals )} assets" )
+    return {
+        "category" : category,
+        "count" : len( intervals ),
+        "intervals" : intervals
+    }
+
+
+class PortfolioRequest( BaseModel ) :
+    weights: Dict[str, float] = Field( ..., description="Asset -> weight, normalised to sum to 1" )
+    confidence: float = Field( default=0.95, gt=0, lt=1 )
+    horizon_days: int = Field( default=1, ge=1, le=365 )
+    simulations: int = Field( default=MAX_SIMULATIONS, ge=1, le=MAX_SIMULATIONS )
+
+
+@app.post( "/risk/portfolio" )
+def portfolio_risk_analysis ( request: PortfolioRequest ) :
+    """Get parametric and Monte Carlo VaR/CVaR of a weighted basket of assets."""
+    try :
+        logger.info( f"📊 Portfolio risk requested for {len( request.weights )} assets" )
+        return calculate_portfolio_risk(
+            request.weights,
+            request.confidence,
+            request.horizon_days,
+            request.simulations
+        )
+    except ValueError as e :
+        raise HTTPException( status_code=400, detail=str( e ) )
+    except Exception as e :
+        logger.error( f"❌ Portfolio risk error: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+
 @app.get( "/risk/{asset}" )
 def risk_analysis ( asset: str ) :
     """Get risk metrics for an Indian market asset."""
@@ -229,7 +481,9 @@ def risk_analysis ( asset: str ) :
         df = pd.read_csv( data_path )
         prices = df["Close"].values
 
-        metrics = calculate_all_risk_metrics( prices )
+        # Annualise with the asset's own calendar and row spacing
+        bar_seconds = infer_bar_seconds( df["timestamp"] ) if "timestamp" in df.columns else None
+        metrics = calculate_all_risk_metrics( prices, periods_per_year=periods_per_year( asset, bar_seconds ) )
         metrics["asset"] = asset
 
         logger.info( f"✅ Risk analysis complete for {asset}" )
@@ -241,21 +495,56 @@ def risk_analysis ( asset: str ) :
         raise HTTPException( status_code=500, detail=str( e ) )
 
 
+@app.get( "/risk/{asset}/rolling" )
+def rolling_risk_analysis (
+        asset: str,
+        window: int = Query( default=30, ge=2, le=730, description="Window length in days (e.g. 30 or 90)" ),
+        confidence: float = Query( default=0.95, gt=0, lt=1, description="Confidence level for VaR/CVaR" )
+) :
+    """Get rolling volatility, VaR, CVaR and drawdown series for charting."""
+    try :
+        logger.info( f"📈 Rolling risk requested for: {asset} (window={window})" )
+        return calculate_rolling_risk( asset, window, confidence )
+    except FileNotFoundError as e :
+        raise HTTPException( status_code=404, detail=str( e ) )
+    except ValueError as e :
+        raise HTTPException( status_code=400, detail=str( e ) )
+    except Exception as e :
+        logger.error( f"❌ Rolling risk error for {asset}: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+
+@app.get( "/risk/{asset}/bootstrap" )
+def risk_bootstrap (
+        asset: str,
+        confidence: float = Query( default=0.95, gt=0, lt=1, description="Confidence level for VaR/CVaR" ),
+        interval: float = Query( default=0.90, gt=0, lt=1, description="Coverage of the confidence intervals" ),
+        resamples: int = Query( default=DEFAULT_RESAMPLES, ge=100, le=10000 ),
+        block_size: Optional[int] = Query( default=None, ge=1, description="Block length (default: n^(1/3))" ),
+        seed: int = Query( default=DEFAULT_SEED )
+) :
+    """Get risk metrics with block-bootstrap confidence intervals."""
+    try :
+        logger.info( f"📊 Bootstrap intervals requested for: {asset}" )
+        return bootstrap_risk_asset(
+            asset, resamples=resamples, block_size=block_size, confidence=confidence,
+            interval=interval, seed=seed
+        )
+    except FileNotFoundError as e :
+        raise HTTPException( status_code=404, detail=str( e ) )
+    except ValueError as e :
+        raise HTTPException( status_code=400, detail=str( e ) )
+    except Exception as e :
+        logger.error( f"❌ Bootstrap error for {asset}: {e}" )
+        logger.error( traceback.format_exc() )
+        raise HTTPException( status_code=500, detail=str( e ) )
+
+
 @app.get( "/category/{category}" )
 def get_category_assets ( category: str ) :
     """Get all assets in a specific category."""
-    categories = {
-        "indices" : ["nifty50", "banknifty", "sensex"],
-        "it" : ["tcs", "infosys", "wipro", "hcltech", "techm"],
-        "banking" : ["hdfcbank", "icicibank", "sbi", "kotakbank", "axisbank", "bajajfinance"],
-        "energy" : ["reliance", "ongc", "bpcl", "ioc", "adanigreen"],
-        "automobile" : ["maruti", "tatamotors", "mahindra", "bajajauto", "heromotoco"],
-        "pharma" : ["sunpharma", "drreddy", "cipla", "divislab"],
-        "fmcg" : ["hul", "itc", "nestle", "britannia"],
-        "metals" : ["tatasteel", "hindalco", "coalindia", "vedanta"],
-        "commodities" : ["gold", "silver", "crudeoil"],
-        "currency" : ["usdinr", "gbpinr", "eurinr"]
-    }
+    categories = ASSET_CATEGORIES
 
     if category.lower() not in categories :
         raise HTTPException(
@@ -270,17 +559,116 @@ def get_category_assets ( category: str ) :
     }
 
 
+@app.post( "/retrain/{asset}" )
+def retrain_asset ( asset: str ) :
+    """Queue a fine-tune of a single asset's embedding."""
+    if not is_coin_available( asset ) :
+        raise HTTPException(
+            status_code=404,
+            detail=f"Asset '{asset}' not found. Use /assets to see available assets."
+        )
+
+    result = retrain_coin( asset )
+    if result["status"] == "error" :
+        raise HTTPException( status_code=500, detail=result["message"] )
+
+    logger.info( f"🔁 Retraining queued for {asset}: job {result['job_id']}" )
+    return result
+
+
+@app.post( "/retrain-all" )
+def retrain_all (
+        incremental: bool = Query(
+            default=False,
+            description="Warm-start from the saved model instead of training from scratch"
+        )
+) :
+    """Queue retraining of the full model."""
+    result = retrain_all_coins( incremental=incremental )
+    if result["status"] == "error" :
+        raise HTTPException( status_code=500, detail=result["message"] )
+
+    logger.info( f"🔁 Full retraining queued: job {result['job_id']}" )
+    return result
+
+
+@app.post( "/retrain-scalers" )
+def retrain_scalers () :
+    """Queue a streaming scaler refresh with newly appended prices (no retraining)."""
+    result = refresh_scalers()
+    if result["status"] == "error" :
+        raise HTTPException( status_code=500, detail=result["message"] )
+
+    logger.info( f"📐 Scaler refresh queued: job {result['job_id']}" )
+    return result
+
+
+@app.get( "/jobs" )
+def list_jobs () :
+    """List queued, running and recently finished training jobs."""
+    jobs = job_manager.list_jobs()
+    return {
+        "jobs" : jobs,
+        "count" : len( jobs ),
+        "max_concurrent_jobs" : job_manager.max_workers
+    }
+
+
+@app.get( "/jobs/{job_id}" )
+def get_job ( job_id: str ) :
+    """Get status, per-epoch progress and final metrics of a training job."""
+    job = job_manager.get_job( job_id )
+    if job is None :
+        raise HTTPException( status_code=404, detail=f"Job '{job_id}' not found" )
+    return job
+
+
+@app.get( "/jobs/{job_id}/log" )
+def get_job_log (
+        job_id: str,
+        tail: int = Query( default=200, ge=1, le=5000, description="Number of log lines to return" )
+) :
+    """Get the last lines of a training job's log."""
+    lines = job_manager.get_log( job_id, tail=tail )
+    if lines is None :
+        raise HTTPException( status_code=404, detail=f"Job '{job_id}' not found" )
+    return {
+        "job_id" : job_id,
+        "lines" : lines
+    }
+
+
+@app.post( "/jobs/{job_id}/cancel" )
+def cancel_job ( job_id: str ) :
+    """Cancel a queued training job or stop a running one."""
+    job = job_manager.cancel( job_id )
+    if job is None :
+        raise HTTPException( status_code=404, detail=f"Job '{job_id}' not found" )
+
+    logger.info( f"🛑 Cancel requested for job {job_id} ({job['status']})" )
+    return job
+
+
+@app.get( "/model" )
+def model_info () :
+    """Model version being served and the last hot-swap error, if any."""
+    bundle = registry.current()
+    if bundle is None :
+        raise HTTPException( status_code=503, detail=f"No model version loaded: {registry.last_error}" )
+
+    return {**bundle.info(), "last_error" : registry.last_error}
+
+
 @app.get( "/health" )
 def health_check () :
     """Comprehensive health check endpoint."""
     try :
-        from services.coins import coin_encoder
-
         health_status = {
             "status" : "healthy",
             "api_version" : "1.0.0",
-            "model_loaded" : coin_encoder is not None,
-            "available_assets" : len( get_all_coins() ) if coin_encoder else 0,
+            "model_loaded" : registry.current() is not None,
+            "model_version" : registry.current_version(),
+            "available_assets" : len( get_all_coins() ),
             "market" : "🇮🇳 Indian Markets",
             "features" : {
                 "multi_day_predictions" : True,
@@ -0,0 +1,82 @@
+"""
+Asset categories shared by the API and the training scripts.
+
+The API (services/coins.py) shows and filters assets by category, and the
+training, backtest and distillation scripts group evaluation by the coarser
+asset class derived from it. Anything not listed is crypto. Kept free of
+third-party imports so both sides can load it.
+"""
+
+# Asset categories shown in the UI and used to filter bulk endpoints
+ASSET_CATEGORIES = {
+    "indices" : ["nifty50", "banknifty", "sensex"],
+    "it" : ["tcs", "infosys", "wipro", "hcltech", "techm"],
+    "banking" : ["hdfcbank", "icicibank", "sbi", "kotakbank", "axisbank", "bajajfinance"],
+    "energy" : ["reliance", "ongc", "bpcl", "ioc", "adanigreen"],
+    "automobile" : ["maruti", "tatamotors", "mahindra", "bajajauto", "heromotoco"],
+    "pharma" : ["sunpharma", "drreddy", "cipla", "divislab"],
+    "fmcg" : ["hul", "itc", "nestle", "britannia"],
+    "metals" : ["tatasteel", "hindalco", "coalindia", "vedanta"],
+    "telecom" : ["airtel"],
+    "cement" : ["ultratech", "shreecem"],
+    "power" : ["powergrid", "ntpc"],
+    "others" : ["adanient", "adaniports", "asianpaint", "lt", "titan"],
+    "commodities" : ["gold", "silver", "crudeoil"],
+    "currency" : ["usdinr", "gbpinr", "eurinr"]
+}
+
+# Asset class of each non-stock category, for grouped evaluation; other categories are stocks
+CATEGORY_CLASSES = {
+    "indices" : "index",
+    "commodities" : "commodity",
+    "currency" : "currency",
+}
+STOCK_ASSET_CLASS = "stock"
+DEFAULT_ASSET_CLASS = "crypto"
+
+
+def get_asset_category ( asset: str ) :
+    """
+    Category of an asset.
+
+    Args:
+        asset: Asset identifier
+
+    Returns:
+        str: Key of ASSET_CATEGORIES, or None for uncategorised assets (crypto)
+    """
+    for category, assets in ASSET_CATEGORIES.items() :
+        if asset in assets :
+            return category
+    return None
+
+
+def get_asset_class ( asset: str ) -> str :
+    """
+    Asset class used to group evaluation metrics.
+
+    Args:
+        asset: Asset identifier
+
+    Returns:
+        str: "index", "commodity", "currency", "stock" or DEFAULT_ASSET_CLASS
+    """
+    category = get_asset_category( asset )
+    if category is None :
+        return DEFAULT_ASSET_CLASS
+    return CATEGORY_CLASSES.get( category, STOCK_ASSET_CLASS )
+
+
+def asset_class_groups ( names ) :
+    """
+    Asset class labels and the class of each asset, for grouped evaluation.
+
+    Args:
+        names: Asset identifiers, indexed like the model's coin ids
+
+    Returns:
+        tuple: (sorted class labels, list with the label index of each asset)
+    """
+    classes = [get_asset_class( name ) for name in names]
+    labels = sorted( set( classes ) )
+    return labels, [labels.index( asset_class ) for asset_class in classes]
@@ -0,0 +1,403 @@
+"""
+Rolling-origin (walk-forward) backtest of the quantile forecasts.
+
+Each forecast is made from the SEQ_LEN prices up to and including its
+cutoff. All (asset, cutoff) windows are stacked and scored in a few large
+batched inference calls, then each forecast is compared with the realised
+price 1, 7, 14 and 30 steps later. Longer horizons stretch the one-step
+forecast with each asset's GARCH(1,1) volatility forecast at the cutoff (see
+vol_forecast.py).
+
+The saved model was trained on each asset's last lookback_days() of history
+before it was saved, so it has already seen the realised prices of most
+recent cutoffs. Cutoffs are therefore split: out-of-sample cutoffs have all
+their realised prices before the training rows or after the model was saved;
+every other cutoff is in-sample. The two are reported separately, and only
+out-of-sample results measure forecasting skill. --out-of-sample-only skips
+the in-sample cutoffs altogether.
+
+Usage:
+    python backtest.py --step 1
+    python backtest.py --out-of-sample-only
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from assets import asset_class_groups
+from dataset import DATA_DIR, SEQ_LEN, load_training_artifacts, training_rows
+from features import DEFAULT_FEATURES, load_features, build_feature_series
+from metrics import evaluate_grouped
+from vol_forecast import VolatilityModel, align_returns, horizon_scale, scale_quantiles
+
+BACKTEST_RESULTS_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/backtest"
+
+HORIZONS = (1, 7, 14, 30)
+SAMPLES = ("out_of_sample", "in_sample")
+INFERENCE_BATCH_SIZE = 8192
+
+
+def scale_to_horizon ( current, q10, q50, q90, days_ahead: int, volatility: dict ) :
+    """
+    Vectorised version of the horizon adjustment in services/predictor.py.
+
+    Args:
+        current: Last observed prices
+        q10, q50, q90: One-step quantile forecasts in price units
+        days_ahead: Forecast horizon in steps
+        volatility: Per-window "next_variance", "long_run" and "persistence"
+            at the cutoff, as in build_backtest_windows()
+
+    Returns:
+        tuple: (q10, q50, q90) for the requested horizon
+    """
+    if days_ahead <= 1 :
+        return q10, q50, q90
+
+    scale = horizon_scale( volatility["next_variance"], volatility["long_run"],
+                           volatility["persistence"], days_ahead )
+    return scale_quantiles( current, q10, q50, q90, scale )
+
+
+def build_backtest_windows ( coin_scalers: dict, coin_to_idx: dict, assets=None,
+                             step: int = 1, years: float = None, max_horizon: int = max( HORIZONS ),
+                             data_dir: str = DATA_DIR, seq_len: int = SEQ_LEN, features=DEFAULT_FEATURES,
+                             trained_at: float = None, out_of_sample_only: bool = False ) :
+    """
+    Collect the input window and realised future prices for every (asset, cutoff).
+
+    Args:
+        coin_scalers: Per-asset fitted scalers
+        coin_to_idx: Encoder mapping asset -> index
+        assets: Assets to include (default: every asset in the encoder)
+        step: Distance between consecutive cutoffs in rows
+        years: Only use cutoffs within this many years of the last row
+        max_horizon: Longest horizon; cutoffs need this many future rows
+        data_dir: Root data directory
+        seq_len: Length of input sequences
+        features: Input channels of the model, starting with "close"
+        trained_at: Unix time the model was trained, to find the rows it saw
+            (see dataset.training_rows)
+        out_of_sample_only: Drop cutoffs whose realised prices the model
+            was trained on
+
+    Returns:
+        dict: Arrays X (scaled windows), coin_ids, current (last price),
+            future (prices 1..max_horizon steps ahead), volatility (GARCH
+            state at each cutoff), in_sample (whether the model was trained
+            on any of the cutoff's realised prices) and asset names
+    """
+    X_parts, id_parts, current_parts, future_parts, cutoff_labels = [], [], [], [], []
+    names, histories, cutoff_parts, in_sample_parts = [], [], [], []
+
+    for coin in sorted( assets or coin_to_idx ) :
+        path = os.path.join( data_dir, coin, f"{coin}.csv" )
+        if coin not in coin_scalers or not os.path.exists( path ) :
+            print( f"⚠️ Skipping {coin}: no scaler or data" )
+            continue
+
+        df = pd.read_csv( path )
+        if 'timestamp' in df.columns :
+            df['timestamp'] = pd.to_datetime( df['timestamp'], utc=True )
+            df = df.sort_values( 'timestamp' ).reset_index( drop=True )
+
+        prices = df["Close"].values.astype( np.float64 )
+        n = len( prices )
+        first_cutoff = seq_len - 1
+        last_cutoff = n - 1 - max_horizon
+
+        if years is not None :
+            if 'timestamp' in df.columns :
+                start = df['timestamp'].iloc[-1] - pd.Timedelta( days=365 * years )
+                first_cutoff = max( first_cutoff, int( np.searchsorted( df['timestamp'].values, start.to_datetime64() ) ) )
+            else :
+                first_cutoff = max( first_cutoff, n - int( 365 * years ) )
+
+        if last_cutoff < first_cutoff :
+            print( f"⚠️ Skipping {coin}: not enough history for a {max_horizon}-step backtest" )
+            continue
+
+        cutoffs = np.arange( first_cutoff, last_cutoff + 1, step )
+
+        # Realised prices c+1..c+max_horizon must all lie outside the training rows
+        train_start, train_end = training_rows(
+            df['timestamp'] if 'timestamp' in df.columns else None, n, seq_len, trained_at
+        )
+        in_sample = (cutoffs + max_horizon >= train_start) & (cutoffs + 1 < train_end)
+        if out_of_sample_only :
+            cutoffs, in_sample = cutoffs[~in_sample], in_sample[~in_sample]
+        if not len( cutoffs ) :
+            print( f"⚠️ Skipping {coin}: no out-of-sample cutoffs" )
+            continue
+        scaled = coin_scalers[coin].transform( prices.reshape( -1, 1 ) ).astype( np.float32 )
+        if len( features ) > 1 :
+            scaled = build_feature_series( scaled, load_features( path, df ), features )
+
+        # Window ending at cutoff c starts at c - seq_len + 1
+        windows = np.lib.stride_tricks.sliding_window_view( scaled, seq_len, axis=0 ).transpose( 0, 2, 1 )
+        X_parts.append( windows[cutoffs - seq_len + 1] )
+
+        # Realised prices 1..max_horizon steps after each cutoff
+        future_view = np.lib.stride_tricks.sliding_window_view( prices[1 :], max_horizon )
+        future_parts.append( future_view[cutoffs] )
+
+        current_parts.append( prices[cutoffs] )
+        histories.append( prices )
+        cutoff_parts.append( cutoffs )
+        in_sample_parts.append( in_sample )
+        id_parts.append( np.full( len( cutoffs ), coin_to_idx[coin], dtype=np.int32 ) )
+        if 'timestamp' in df.columns :
+            cutoff_labels.append( df['timestamp'].values[cutoffs].astype( str ) )
+        else :
+            cutoff_labels.append( cutoffs.astype( str ) )
+        names.append( coin )
+
+    if not X_parts :
+        raise ValueError( "No assets have enough history to backtest" )
+
+    # Variance forecast after the return ending at each cutoff (returns are
+    # right-aligned, so return i of an asset sits at row rows - (n - 1) + i)
+    returns = align_returns( histories )
+    model = VolatilityModel.fit( returns )
+    path = model.variance_path( returns )
+    variance_parts = []
+    for j, (prices, cutoffs) in enumerate( zip( histories, cutoff_parts ) ) :
+        rows = len( returns ) - (len( prices ) - 1) + cutoffs - 1
+        variance_parts.append( path[rows, j] )
+    counts = [len( cutoffs ) for cutoffs in cutoff_parts]
+
+    return {
+        "X" : np.concatenate( X_parts ),
+        "coin_ids" : np.concatenate( id_parts ),
+        "current" : np.concatenate( current_parts ),
+        "future" : np.concatenate( future_parts ),
+        "cutoffs" : np.concatenate( cutoff_labels ),
+        "in_sample" : np.concatenate( in_sample_parts ),
+        "volatility" : {
+            "next_variance" : np.concatenate( variance_parts ),
+            "long_run" : np.repeat( model.long_run, counts ),
+            "persistence" : np.repeat( model.persistence, counts ),
+        },
+        "assets" : names,
+    }
+
+
+def inverse_scale_forecasts ( scaled_forecasts, coin_ids, coin_scalers: dict, coin_to_idx: dict ) :
+    """
+    Map scaled forecasts back to prices with each asset's scaler.
+
+    Args:
+        scaled_forecasts: Array (samples, 3) in scaled units
+        coin_ids: Coin index per sample
+        coin_scalers: Per-asset fitted scalers
+        coin_to_idx: Encoder mapping asset -> index
+
+    Returns:
+        np.ndarray: Forecasts (samples, 3) in price units
+    """
+    prices = np.empty_like( scaled_forecasts, dtype=np.float64 )
+    for coin, idx in coin_to_idx.items() :
+        mask = coin_ids == idx
+        if mask.any() :
+            prices[mask] = coin_scalers[coin].inverse_transform(
+                scaled_forecasts[mask].reshape( -1, 1 ).astype( np.float64 )
+            ).reshape( -1, 3 )
+
+    return prices
+
+
+def score_backtest ( windows: dict, forecasts: np.ndarray, coin_to_idx: dict, horizons=HORIZONS ) :
+    """
+    Coverage, pinball loss and MAPE per horizon, overall, per asset and per asset class.
+
+    Prices are divided by the price at the cutoff before scoring, so pinball
+    loss and RMSE are relative errors comparable across assets; coverage and
+    MAPE are unaffected by the rescaling.
+
+    Args:
+        windows: Output of build_backtest_windows()
+        forecasts: One-step forecasts in price units (samples, 3)
+        coin_to_idx: Encoder mapping asset -> index
+        horizons: Horizons to score
+
+    Returns:
+        dict: {"overall": {horizon: metrics}, "per_asset": {asset: {horizon: metrics}},
+            "per_asset_class": {class: {horizon: metrics}}}
+    """
+    ids = windows["coin_ids"]
+    idx_to_coin = {idx : coin for coin, idx in coin_to_idx.items()}
+    asset_labels = [idx_to_coin.get( idx, str( idx ) ) for idx in range( int( ids.max() ) + 1 )]
+    class_labels, class_of_coin = asset_class_groups( asset_labels )
+    class_of_coin = np.array( class_of_coin )
+
+    groupings = {
+        "overall" : (np.zeros( len( ids ), dtype=np.int64 ), ["overall"]),
+        "per_asset" : (ids, asset_labels),
+        "per_asset_class" : (class_of_coin[ids], class_labels),
+    }
+
+    current = windows["current"]
+    report = {name : {} for name in groupings}
+    for horizon in horizons :
+        actual = windows["future"][:, horizon - 1]
+        q10, q50, q90 = scale_to_horizon( current, *forecasts.T, days_ahead=horizon,
+                                          volatility=windows["volatility"] )
+        relative_forecasts = np.stack( [q10, q50, q90], axis=1 ) / current[:, np.newaxis]
+
+        grouped = evaluate_grouped( actual / current, relative_forecasts, groupings )
+        for name, by_group in grouped.items() :
+            for label, metrics in by_group.items() :
+                report[name].setdefault( label, {} )[horizon] = metrics
+
+    report["overall"] = report["overall"]["overall"]
+    return report
+
+
+def select_windows ( windows: dict, mask: np.ndarray ) -> dict :
+    """Subset of build_backtest_windows() output, keeping the rows where mask is True."""
+    selected = {name : value[mask] for name, value in windows.items() if isinstance( value, np.ndarray )}
+    selected["volatility"] = {name : value[mask] for name, value in windows["volatility"].items()}
+    selected["assets"] = windows["assets"]
+    return selected
+
+
+def save_backtest ( report: dict, results_dir: str = BACKTEST_RESULTS_DIR ) :
+    """Write the report as JSON and the per-asset table as CSV."""
+    os.makedirs( results_dir, exist_ok=True )
+    json_path = os.path.join( results_dir, "backtest_report.json" )
+    csv_path = os.path.join( results_dir, "backtest_per_asset.csv" )
+
+    with open( json_path, "w" ) as f :
+        json.dump( report, f, indent=2 )
+
+    with open( csv_path, "w", newline="" ) as f :
+        writer = None
+        for sample in SAMPLES :
+            if report.get( sample ) is None :
+                continue
+            for coin, by_horizon in report[sample]["per_asset"].items() :
+                for horizon, metrics in by_horizon.items() :
+                    row = {"sample" : sample, "asset" : coin, "horizon" : horizon}
+                    for key, value in metrics.items() :
+                        if isinstance( value, dict ) :
+                            row.update( {f"{key}_{name}" : v for name, v in value.items()} )
+                        else :
+                            row[key] = value
+                    if writer is None :
+                        writer = csv.DictWriter( f, fieldnames=list( row ) )
+                        writer.writeheader()
+                    writer.writerow( row )
+
+    return json_path, csv_path
+
+
+def run_backtest ( assets=None, step: int = 1, years: float = None, horizons=HORIZONS,
+                   out_of_sample_only: bool = False ) :
+    """
+    Backtest the saved model across the universe.
+
+    Args:
+        assets: Assets to include (default: all)
+        step: Rows between consecutive cutoffs
+        years: Limit cutoffs to the last N years
+        horizons: Horizons to score
+        out_of_sample_only: Skip cutoffs whose realised prices the model was trained on
+
+    Returns:
+        dict: Backtest report with "out_of_sample" and "in_sample" results
+            (None when there are no such cutoffs)
+    """
+    from train_model import MODEL_PATH, load_trained_model, model_seq_len, saved_features, predict_quantiles
+
+    coin_scalers, coin_to_idx = load_training_artifacts()
+    model = load_trained_model( MODEL_PATH )
+    seq_len = model_seq_len( model )
+    trained_at = os.path.getmtime( MODEL_PATH )
+
+    start = time.perf_counter()
+    windows = build_backtest_windows( coin_scalers, coin_to_idx, assets=assets, step=step,
+                                      years=years, max_horizon=max( horizons ), seq_len=seq_len,
+                                      features=saved_features( model ), trained_at=trained_at,
+                                      out_of_sample_only=out_of_sample_only )
+    build_seconds = time.perf_counter() - start
+    print( f"🧱 Built {len( windows['X'] ):,} windows for {len( windows['assets'] )} assets in {build_seconds:.1f}s" )
+
+    start = time.perf_counter()
+    scaled = predict_quantiles( model, windows["X"], windows["coin_ids"], batch_size=INFERENCE_BATCH_SIZE )
+    inference_seconds = time.perf_counter() - start
+    print( f"⚡ Inference: {inference_seconds:.1f}s ({len( scaled ) / max( inference_seconds, 1e-9 ):,.0f} windows/s)" )
+
+    forecasts = inverse_scale_forecasts( scaled, windows["coin_ids"], coin_scalers, coin_to_idx )
+    masks = {"out_of_sample" : ~windows["in_sample"], "in_sample" : windows["in_sample"]}
+    report = {}
+    for sample, mask in masks.items() :
+        if mask.any() :
+            report[sample] = score_backtest( select_windows( windows, mask ), forecasts[mask], coin_to_idx, horizons )
+        else :
+            report[sample] = None
+    report["config"] = {
+        "seq_len" : seq_len,
+        "step" : step,
+        "years" : years,
+        "horizons" : list( horizons ),
+        "windows" : int( len( scaled ) ),
+        "out_of_sample_windows" : int( masks["out_of_sample"].sum() ),
+        "in_sample_windows" : int( masks["in_sample"].sum() ),
+        "model_trained_at" : time.strftime( "%Y-%m-%d %H:%M:%S", time.localtime( trained_at ) ),
+        "assets" : windows["assets"],
+        "first_cutoff" : str( windows["cutoffs"].min() ),
+        "build_seconds" : build_seconds,
+        "inference_seconds" : inference_seconds,
+        "note" : "In-sample cutoffs have realised prices inside the model's training rows and overstate skill; "
+                 "only out-of-sample results measure forecasting. Training rows are located from the model "
+                 "file's time, except for files without timestamps, where they are the last lookback rows "
+                 "of the current file. Scalers are the ones fitted at training time, so early cutoffs see "
+                 "scaling fitted on later data; GARCH parameters are fitted on the full history, the "
+                 "variance at each cutoff uses past returns only",
+    }
+
+    print( "\n" + "=" * 60 )
+    print( "📈 BACKTEST SUMMARY" )
+    print( "=" * 60 )
+    for sample in SAMPLES :
+        if report[sample] is None :
+            print( f"   {sample.replace( '_', '-' )}: no cutoffs" )
+            continue
+        print( f"   {sample.replace( '_', '-' )} ({report['config'][sample + '_windows']:,} windows):" )
+        for horizon, metrics in report[sample]["overall"].items() :
+            print( f"      h={horizon:>2}: coverage {metrics['coverage_q10_q90'] * 100:5.1f}% (target 80%), "
+                   f"MAPE {metrics['q50']['mape']:6.2f}%, rel. pinball q50 {metrics['q50']['pinball']:.5f}" )
+
+    json_path, csv_path = save_backtest( report )
+    print( f"\n💾 Report saved to {json_path} and {csv_path}" )
+
+    return report
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser( description="Walk-forward backtest of quantile forecasts" )
+    parser.add_argument( "--assets", default=None, help="Comma-separated assets (default: all)" )
+    parser.add_argument( "--step", type=int, default=1, help="Rows between cutoffs" )
+    parser.add_argument( "--years", type=float, default=None, help="Only backtest the last N years" )
+    parser.add_argument( "--horizons", default=",".join( map( str, HORIZONS ) ) )
+    parser.add_argument( "--out-of-sample-only", action="store_true",
+                         help="Skip cutoffs whose realised prices the model was trained on" )
+    args = parser.parse_args()
+
+    print( "=" * 60 )
+    print( "🔙 WALK-FORWARD BACKTEST" )
+    print( "=" * 60 )
+
+    run_backtest(
+        assets=args.assets.split( "," ) if args.assets else None,
+        step=args.step,
+        years=args.years,
+        horizons=tuple( int( h ) for h in args.horizons.split( "," ) ),
+        out_of_sample_only=args.out_of_sample_only
+    )
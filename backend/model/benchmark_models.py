@@ -0,0 +1,336 @@
+"""
+Architecture benchmark on synthetic data.
+
+Each (architecture, seq_len, num_assets) configuration is built and measured
+in a fresh process, so peak memory is not polluted by earlier runs:
+
+- parameter count
+- training throughput (samples/s) with the real quantile losses
+- single-sample latency (direct model call, as the predictor does)
+- batched inference latency and throughput
+- peak resident memory, and its growth over an idle TensorFlow process
+
+The --context mode compares the full-attention transformer against the
+patch-based long-context transformer as the input window grows.
+
+Usage:
+    python benchmark_models.py --seq-lens 30,90 --num-assets 100,1000
+    python benchmark_models.py --context --seq-lens 30,90,180,365,730
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BENCHMARK_RESULTS_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/benchmarks"
+
+DEFAULT_ARCHITECTURES = ("transformer", "lstm", "cnn_lstm", "student")
+TRAIN_BATCH_SIZE = 256
+TRAIN_STEPS = 20
+WARMUP_STEPS = 3
+LATENCY_RUNS = 50
+INFERENCE_BATCH_SIZE = 1024
+CONTEXT_SEQ_LENS = (30, 90, 180, 365, 730)
+
+
+def _peak_rss_mb () :
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try :
+        import resource
+        peak = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError :
+        pass
+
+    try :
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr( info, "peak_wset", info.rss ) / (1024 * 1024)
+    except ImportError :
+        return None
+
+
+def _init_worker ( threads: int ) :
+    """Limit TensorFlow threads in the benchmark process."""
+    if threads :
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str( threads )
+        os.environ["OMP_NUM_THREADS"] = str( threads )
+    os.environ.setdefault( "TF_CPP_MIN_LOG_LEVEL", "2" )
+
+
+def benchmark_architecture ( architecture: str, seq_len: int, num_assets: int,
+                             model_kwargs: dict = None, batch_size: int = TRAIN_BATCH_SIZE,
+                             train_steps: int = TRAIN_STEPS, latency_runs: int = LATENCY_RUNS,
+                             inference_batch_size: int = INFERENCE_BATCH_SIZE, seed: int = 42 ) -> dict :
+    """
+    Measure one configuration. Runs inside a fresh worker process.
+
+    Args:
+        architecture: Key of MODEL_BUILDERS
+        seq_len: Input window length
+        num_assets: Number of assets in the embedding
+        model_kwargs: Extra keyword arguments for the builder
+        batch_size: Training batch size
+        train_steps: Timed training steps (after WARMUP_STEPS untimed ones)
+        latency_runs: Timed single-sample calls
+        inference_batch_size: Batch size for batched inference
+        seed: Seed for the synthetic data
+
+    Returns:
+        dict: Result row
+    """
+    # Imported before the baseline so TensorFlow itself is not counted as model memory
+    import tensorflow as tf  # noqa: F401
+    from build_transformer import MODEL_BUILDERS
+    from train_model import compile_model, QUANTILES
+
+    row = {
+        "architecture" : architecture,
+        "seq_len" : seq_len,
+        "num_assets" : num_assets,
+        "model_kwargs" : model_kwargs or {},
+    }
+    baseline_rss = _peak_rss_mb()
+
+    try :
+        rng = np.random.default_rng( seed )
+        n = max( batch_size * (train_steps + WARMUP_STEPS), inference_batch_size )
+        X = rng.standard_normal( (n, seq_len, 1) ).astype( np.float32 )
+        coin_ids = rng.integers( 0, num_assets, size=(n, 1) ).astype( np.int32 )
+        y = rng.standard_normal( (n, 1) ).astype( np.float32 )
+
+        model = MODEL_BUILDERS[architecture]( seq_len, num_assets, **(model_kwargs or {}) )
+        compile_model( model )
+        row["parameters"] = int( model.count_params() )
+
+        # Training throughput
+        def train_batch ( step ) :
+            batch = slice( step * batch_size, (step + 1) * batch_size )
+            model.train_on_batch( [X[batch], coin_ids[batch]], {q : y[batch] for q in QUANTILES} )
+
+        for step in range( WARMUP_STEPS ) :
+            train_batch( step )
+        start = time.perf_counter()
+        for step in range( WARMUP_STEPS, WARMUP_STEPS + train_steps ) :
+            train_batch( step )
+        train_seconds = time.perf_counter() - start
+        row["train_samples_per_s"] = train_steps * batch_size / train_seconds
+
+        # Single-sample latency
+        model( [X[:1], coin_ids[:1]], training=False )
+        timings = []
+        for i in range( latency_runs ) :
+            start = time.perf_counter()
+            model( [X[i :i + 1], coin_ids[i :i + 1]], training=False )
+            timings.append( (time.perf_counter() - start) * 1000 )
+        row["latency_ms_p50"] = float( np.percentile( timings, 50 ) )
+        row["latency_ms_p95"] = float( np.percentile( timings, 95 ) )
+
+        # Batched inference
+        batch = [X[:inference_batch_size], coin_ids[:inference_batch_size]]
+        model.predict_on_batch( batch )
+        timings = []
+        for _ in range( max( 3, latency_runs // 10 ) ) :
+            start = time.perf_counter()
+            model.predict_on_batch( batch )
+            timings.append( time.perf_counter() - start )
+        row["batch_latency_ms"] = float( np.median( timings ) * 1000 )
+        row["inference_samples_per_s"] = inference_batch_size / float( np.median( timings ) )
+
+        peak_rss = _peak_rss_mb()
+        row["peak_rss_mb"] = peak_rss
+        row["model_rss_mb"] = peak_rss - baseline_rss if peak_rss is not None and baseline_rss is not None else None
+        row["status"] = "ok"
+
+    except Exception as e :
+        row["status"] = "failed"
+        row["error"] = f"{type( e ).__name__}: {e}"
+
+    return row
+
+
+def save_benchmark ( rows, results_dir: str = BENCHMARK_RESULTS_DIR, name: str = "architecture_benchmark" ) :
+    """
+    Write benchmark rows as JSON and CSV.
+
+    Returns:
+        tuple: (json_path, csv_path)
+    """
+    os.makedirs( results_dir, exist_ok=True )
+    json_path = os.path.join( results_dir, f"{name}.json" )
+    csv_path = os.path.join( results_dir, f"{name}.csv" )
+
+    with open( json_path, "w" ) as f :
+        json.dump( rows, f, indent=2 )
+
+    columns = ["architecture", "seq_len", "num_assets", "status", "parameters", "train_samples_per_s",
+               "latency_ms_p50", "latency_ms_p95", "batch_latency_ms", "inference_samples_per_s",
+               "peak_rss_mb", "model_rss_mb", "model_kwargs", "error"]
+    with open( csv_path, "w", newline="" ) as f :
+        writer = csv.DictWriter( f, fieldnames=columns, extrasaction="ignore" )
+        writer.writeheader()
+        for row in rows :
+            writer.writerow( {**row, "model_kwargs" : json.dumps( row["model_kwargs"] )} )
+
+    return json_path, csv_path
+
+
+def print_benchmark ( rows ) :
+    """Print the comparison table."""
+    print( "\n" + "=" * 110 )
+    print( "🏁 ARCHITECTURE BENCHMARK" )
+    print( "=" * 110 )
+    print( f"{'architecture':<20}{'seq':>6}{'assets':>8}{'params':>12}{'train/s':>10}"
+           f"{'p50 ms':>9}{'p95 ms':>9}{'batch ms':>10}{'infer/s':>11}{'peak MB':>9}{'model MB':>10}" )
+
+    def fmt ( value, width ) :
+        return f"{value:>{width}.0f}" if value is not None else f"{'n/a':>{width}}"
+
+    for row in rows :
+        if row["status"] != "ok" :
+            print( f"{row['architecture']:<20}{row['seq_len']:>6}{row['num_assets']:>8}  failed: {row['error']}" )
+            continue
+        print( f"{row['architecture']:<20}{row['seq_len']:>6}{row['num_assets']:>8}{row['parameters']:>12,}"
+               f"{row['train_samples_per_s']:>10,.0f}{row['latency_ms_p50']:>9.2f}{row['latency_ms_p95']:>9.2f}"
+               f"{row['batch_latency_ms']:>10.1f}{row['inference_samples_per_s']:>11,.0f}"
+               f"{fmt( row['peak_rss_mb'], 9 )}{fmt( row['model_rss_mb'], 10 )}" )
+
+
+def run_benchmark ( architectures=DEFAULT_ARCHITECTURES, seq_lens=(30,), asset_counts=(100,),
+                    model_kwargs: dict = None, threads: int = None, name: str = "architecture_benchmark",
+                    **measure_kwargs ) :
+    """
+    Benchmark every (architecture, seq_len, num_assets) combination.
+
+    Args:
+        architectures: Keys of MODEL_BUILDERS
+        seq_lens: Input window lengths
+        asset_counts: Embedding sizes
+        model_kwargs: Architecture -> extra builder keyword arguments
+        threads: TensorFlow intra-op threads per run (default: all)
+        name: Output file name stem
+        **measure_kwargs: Passed to benchmark_architecture
+
+    Returns:
+        list: Result rows
+    """
+    # Spawn a fresh process per configuration so peak memory is per model
+    context = multiprocessing.get_context( "spawn" )
+    rows = []
+
+    for architecture in architectures :
+        for seq_len in seq_lens :
+            for num_assets in asset_counts :
+                with ProcessPoolExecutor( max_workers=1, mp_context=context,
+                                          initializer=_init_worker, initargs=(threads,) ) as executor :
+                    row = executor.submit(
+                        benchmark_architecture, architecture, seq_len, num_assets,
+                        (model_kwargs or {}).get( architecture ), **measure_kwargs
+                    ).result()
+                rows.append( row )
+                status = (f"{row['train_samples_per_s']:,.0f} train/s, {row['latency_ms_p50']:.2f} ms"
+                          if row["status"] == "ok" else row["error"])
+                print( f"   • {architecture} seq_len={seq_len} assets={num_assets}: {status}" )
+
+    json_path, csv_path = save_benchmark( rows, name=name )
+    print_benchmark( rows )
+    print( f"\n💾 Results saved to {json_path} and {csv_path}" )
+
+    return rows
+
+
+def run_context_benchmark ( seq_lens=CONTEXT_SEQ_LENS, num_assets: int = 100, threads: int = None,
+                            **measure_kwargs ) :
+    """
+    Cost of the transformer against context length, with and without patching.
+
+    "transformer" attends over every time step; "transformer_patched" uses
+    patch_sizes="auto", which keeps the token count at LONG_CONTEXT_TOKENS.
+    Rows are labelled by variant in the architecture column.
+
+    Args:
+        seq_lens: Input window lengths
+        num_assets: Embedding size
+        threads: TensorFlow intra-op threads per run
+        **measure_kwargs: Passed to benchmark_architecture
+
+    Returns:
+        list: Result rows
+    """
+    context = multiprocessing.get_context( "spawn" )
+    variants = {"transformer" : {}, "transformer_patched" : {"patch_sizes" : "auto"}}
+    rows = []
+
+    for seq_len in seq_lens :
+        for label, kwargs in variants.items() :
+            with ProcessPoolExecutor( max_workers=1, mp_context=context,
+                                      initializer=_init_worker, initargs=(threads,) ) as executor :
+                row = executor.submit(
+                    benchmark_architecture, "transformer", seq_len, num_assets, kwargs, **measure_kwargs
+                ).result()
+            row["architecture"] = label
+            rows.append( row )
+            status = (f"{row['train_samples_per_s']:,.0f} train/s, {row['latency_ms_p50']:.2f} ms"
+                      if row["status"] == "ok" else row["error"])
+            print( f"   • {label} seq_len={seq_len}: {status}" )
+
+    json_path, csv_path = save_benchmark( rows, name="context_benchmark" )
+    print_benchmark( rows )
+    print( f"\n💾 Results saved to {json_path} and {csv_path}" )
+
+    return rows
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser( description="Benchmark model architectures on synthetic data" )
+    parser.add_argument( "--architectures", default=",".join( DEFAULT_ARCHITECTURES ) )
+    parser.add_argument( "--seq-lens", default=None,
+                         help="Comma-separated window lengths (default: 30, or 30..730 with --context)" )
+    parser.add_argument( "--num-assets", default="100", help="Comma-separated asset counts" )
+    parser.add_argument( "--batch-size", type=int, default=TRAIN_BATCH_SIZE )
+    parser.add_argument( "--train-steps", type=int, default=TRAIN_STEPS )
+    parser.add_argument( "--latency-runs", type=int, default=LATENCY_RUNS )
+    parser.add_argument( "--inference-batch-size", type=int, default=INFERENCE_BATCH_SIZE )
+    parser.add_argument( "--threads", type=int, default=None, help="TensorFlow threads per run" )
+    parser.add_argument( "--model-kwargs", default=None,
+                         help='JSON of builder kwargs per architecture, e.g. \'{"transformer": {"d_model": 64}}\'' )
+    parser.add_argument( "--context", action="store_true",
+                         help="Compare full-attention and patched transformers across window lengths" )
+    args = parser.parse_args()
+
+    measure_kwargs = {
+        "batch_size" : args.batch_size,
+        "train_steps" : args.train_steps,
+        "latency_runs" : args.latency_runs,
+        "inference_batch_size" : args.inference_batch_size
+    }
+
+    if args.context :
+        print( "=" * 60 )
+        print( "🏁 BENCHMARKING CONTEXT LENGTH" )
+        print( "=" * 60 )
+        run_context_benchmark(
+            seq_lens=tuple( int( s ) for s in args.seq_lens.split( "," ) ) if args.seq_lens else CONTEXT_SEQ_LENS,
+            num_assets=int( args.num_assets.split( "," )[0] ),
+            threads=args.threads,
+            **measure_kwargs
+        )
+    else :
+        print( "=" * 60 )
+        print( "🏁 BENCHMARKING ARCHITECTURES" )
+        print( "=" * 60 )
+        run_benchmark(
+            architectures=args.architectures.split( "," ),
+            seq_lens=tuple( int( s ) for s in (args.seq_lens or "30").split( "," ) ),
+            asset_counts=tuple( int( n ) for n in args.num_assets.split( "," ) ),
+            model_kwargs=json.loads( args.model_kwargs ) if args.model_kwargs else None,
+            threads=args.threads,
+            **measure_kwargs
+        )
@@ -5,10 +5,62 @@ from tensorflow.keras.layers import (
     MultiHeadAttention, Embedding, Concatenate
 )
 
+# Token budget for the long-context mode; today's 30-step model attends over 30 tokens
+LONG_CONTEXT_TOKENS = 30
+
+
+def default_patch_sizes ( seq_len: int, max_tokens: int = LONG_CONTEXT_TOKENS ) :
+    """
+    Smallest patch size that keeps a window within the attention token budget.
+
+    Args:
+        seq_len: Length of input sequences
+        max_tokens: Maximum number of attention tokens
+
+    Returns:
+        tuple: (patch_size,), or None if seq_len already fits
+    """
+    if seq_len <= max_tokens :
+        return None
+    return (-(-seq_len // max_tokens),)
+
+
+def _patch_tokens ( price_input, seq_len: int, patch_sizes, d_model: int, num_features: int = 1 ) :
+    """
+    Turn the price window into attention tokens, one per patch.
+
+    For every patch size p the window is cut into seq_len // p
+    non-overlapping patches of the most recent prices (the oldest
+    seq_len % p steps are dropped), each patch is projected to d_model and
+    gets a positional embedding of its own scale. Tokens of all scales are
+    concatenated, so attention cost depends on the number of patches rather
+    than on seq_len.
+    """
+    tokens = []
+    for p in patch_sizes :
+        num_patches = seq_len // p
+        if num_patches < 1 :
+            raise ValueError( f"Patch size {p} is longer than the input window ({seq_len})" )
+
+        x = layers.Cropping1D( cropping=(seq_len - num_patches * p, 0), name=f'crop_{p}' )( price_input )
+        x = layers.Reshape( (num_patches, p * num_features), name=f'patches_{p}' )( x )
+        x = Dense( d_model, activation='relu', name=f'patch_projection_{p}' )( x )
+
+        positions = tf.range( start=0, limit=num_patches, delta=1 )
+        position_embedding = layers.Embedding(
+            input_dim=num_patches,
+            output_dim=d_model,
+            name=f'patch_position_embedding_{p}'
+        )( positions )
+        tokens.append( x + position_embedding )
+
+    return tokens[0] if len( tokens ) == 1 else layers.Concatenate( axis=1, name='multi_scale_tokens' )( tokens )
+
 
 def build_transformer ( seq_len: int, num_coins: int, d_model: int = 128,
                         num_heads: int = 4, ff_dim: int = 256,
-                        num_transformer_blocks: int = 2, dropout: float = 0.1 ) :
+                        num_transformer_blocks: int = 2, dropout: float = 0.1,
+                        patch_sizes=None, num_features: int = 1 ) :
     """
     Build a Transformer model for cryptocurrency price prediction with quantile outputs.
 
@@ -17,6 +69,10 @@ def build_transformer ( seq_len: int, num_coins: int, d_model: int = 128,
     - Transformer blocks with multi-head attention
     - Three output heads for quantile predictions (Q10, Q50, Q90)
 
+    Long-context mode: with patch_sizes, attention runs over patches of the
+    window instead of single steps (one token per patch, optionally at several
+    scales), so a 365- or 730-step window costs about as much as 30 steps.
+
     Args:
         seq_len: Length of input sequences
         num_coins: Number of unique cryptocurrencies
@@ -25,13 +81,17 @@ def build_transformer ( seq_len: int, num_coins: int, d_model: int = 128,
         ff_dim: Dimension of feedforward network
         num_transformer_blocks: Number of transformer blocks to stack
         dropout: Dropout rate
+        patch_sizes: Patch lengths for the long-context mode, e.g. (25,) or
+            (25, 100); "auto" picks default_patch_sizes(seq_len); None keeps
+            one token per time step
+        num_features: Input channels per time step (see features.py)
 
     Returns:
         tf.keras.Model: Compiled transformer model
     """
 
     # Input layers
-    price_input = Input( shape=(seq_len, 1), name='price_input' )
+    price_input = Input( shape=(seq_len, num_features), name='price_input' )
     coin_input = Input( shape=(1,), dtype=tf.int32, name='coin_input' )
 
     # Coin embedding
@@ -42,18 +102,25 @@ def build_transformer ( seq_len: int, num_coins: int, d_model: int = 128,
     )( coin_input )
     coin_embedding = layers.Flatten()( coin_embedding )
 
-    # Project price input to d_model dimensions
-    x = Dense( d_model, activation='relu', name='price_projection' )( price_input )
+    if patch_sizes == "auto" :
+        patch_sizes = default_patch_sizes( seq_len )
 
-    # Add positional encoding
-    positions = tf.range( start=0, limit=seq_len, delta=1 )
-    position_embedding = layers.Embedding(
-        input_dim=seq_len,
-        output_dim=d_model,
-        name='position_embedding'
-    )( positions )
+    if patch_sizes :
+        # Long-context mode: one token per patch
+        x = _patch_tokens( price_input, seq_len, patch_sizes, d_model, num_features )
+    else :
+        # Project price input to d_model dimensions
+        x = Dense( d_model, activation='relu', name='price_projection' )( price_input )
+
+        # Add positional encoding
+        positions = tf.range( start=0, limit=seq_len, delta=1 )
+        position_embedding = layers.Embedding(
+            input_dim=seq_len,
+            output_dim=d_model,
+            name='position_embedding'
+        )( positions )
 
-    x = x + position_embedding
+        x = x + position_embedding
 
     # Transformer blocks
     for i in range( num_transformer_blocks ) :
@@ -107,7 +174,7 @@ def build_transformer ( seq_len: int, num_coins: int, d_model: int = 128,
 
 
 def build_lstm_model ( seq_len: int, num_coins: int, lstm_units: int = 128,
-                       dropout: float = 0.2 ) :
+                       dropout: float = 0.2, num_features: int = 1 ) :
     """
     Alternative LSTM model for cryptocurrency price prediction.
 
@@ -116,13 +183,14 @@ def build_lstm_model ( seq_len: int, num_coins: int, lstm_units: int = 128,
         num_coins: Number of unique cryptocurrencies
         lstm_units: Number of LSTM units
         dropout: Dropout rate
+        num_features: Input channels per time step
 
     Returns:
         tf.keras.Model: Compiled LSTM model
     """
 
     # Input layers
-    price_input = Input( shape=(seq_len, 1), name='price_input' )
+    price_input = Input( shape=(seq_len, num_features), name='price_input' )
     coin_input = Input( shape=(1,), dtype=tf.int32, name='coin_input' )
 
     # Coin embedding
@@ -162,7 +230,7 @@ def build_lstm_model ( seq_len: int, num_coins: int, lstm_units: int = 128,
     return model
 
 
-def build_cnn_lstm_hybrid ( seq_len: int, num_coins: int, dropout: float = 0.2 ) :
+def build_cnn_lstm_hybrid ( seq_len: int, num_coins: int, dropout: float = 0.2, num_features: int = 1 ) :
     """
     Hybrid CNN-LSTM model for cryptocurrency price prediction.
 
@@ -170,13 +238,14 @@ def build_cnn_lstm_hybrid ( seq_len: int, num_coins: int, dropout: float = 0.2 )
         seq_len: Length of input sequences
         num_coins: Number of unique cryptocurrencies
         dropout: Dropout rate
+        num_features: Input channels per time step
 
     Returns:
         tf.keras.Model: Compiled CNN-LSTM model
     """
 
     # Input layers
-    price_input = Input( shape=(seq_len, 1), name='price_input' )
+    price_input = Input( shape=(seq_len, num_features), name='price_input' )
     coin_input = Input( shape=(1,), dtype=tf.int32, name='coin_input' )
 
     # Coin embedding
@@ -222,6 +291,72 @@ def build_cnn_lstm_hybrid ( seq_len: int, num_coins: int, dropout: float = 0.2 )
     return model
 
 
+def build_student_model ( seq_len: int, num_coins: int, hidden_units: int = 64,
+                          embedding_dim: int = 16, dropout: float = 0.0, num_features: int = 1 ) :
+    """
+    Compact MLP student distilled from the transformer for low-latency serving.
+
+    The price window is flattened and concatenated with a small coin
+    embedding, followed by two narrow dense layers. There is no attention or
+    recurrence, so a single prediction is a handful of small matmuls.
+
+    Args:
+        seq_len: Length of input sequences
+        num_coins: Number of unique cryptocurrencies
+        hidden_units: Width of the first hidden layer (the second is half)
+        embedding_dim: Size of the coin embedding
+        dropout: Dropout rate
+        num_features: Input channels per time step
+
+    Returns:
+        tf.keras.Model: Student model with the same inputs/outputs as the transformer
+    """
+
+    # Input layers
+    price_input = Input( shape=(seq_len, num_features), name='price_input' )
+    coin_input = Input( shape=(1,), dtype=tf.int32, name='coin_input' )
+
+    # Coin embedding
+    coin_embedding = Embedding(
+        input_dim=num_coins,
+        output_dim=embedding_dim,
+        name='coin_embedding'
+    )( coin_input )
+    coin_embedding = layers.Flatten()( coin_embedding )
+
+    # Whole window as one feature vector
+    x = layers.Flatten( name='flatten_window' )( price_input )
+    x = Concatenate( name='concat_features' )( [x, coin_embedding] )
+
+    # Dense layers
+    x = Dense( hidden_units, activation='relu', name='dense1' )( x )
+    x = Dropout( dropout )( x )
+    x = Dense( hidden_units // 2, activation='relu', name='dense2' )( x )
+
+    # Quantile output heads
+    q10_output = Dense( 1, activation='linear', name='q10' )( x )
+    q50_output = Dense( 1, activation='linear', name='q50' )( x )
+    q90_output = Dense( 1, activation='linear', name='q90' )( x )
+
+    # Build model
+    model = Model(
+        inputs=[price_input, coin_input],
+        outputs=[q10_output, q50_output, q90_output],
+        name='crypto_student'
+    )
+
+    return model
+
+
+# Architectures that share the (price_input, coin_input) -> (q10, q50, q90) interface
+MODEL_BUILDERS = {
+    "transformer" : build_transformer,
+    "lstm" : build_lstm_model,
+    "cnn_lstm" : build_cnn_lstm_hybrid,
+    "student" : build_student_model,
+}
+
+
 if __name__ == "__main__" :
     # Test model creation
     print( "🔨 Building Transformer model..." )
@@ -0,0 +1,265 @@
+"""
+Resumable training: deterministic epoch shuffling and atomic training snapshots.
+
+A snapshot holds everything needed to continue an interrupted fit() as if it
+had never stopped: model weights, optimizer slots and iteration count, the
+current learning rate, the internal state of EarlyStopping /
+ReduceLROnPlateau / ModelCheckpoint, the epoch number, the data shuffling
+seed and the training history so far.
+
+Each snapshot is written to a fresh directory which is then renamed into
+place, and a LATEST pointer file is swapped with os.replace(). A crash at any
+point leaves either the previous or the new snapshot fully intact.
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+
+import numpy as np
+import tensorflow as tf
+
+SNAPSHOT_POINTER = "LATEST"
+SNAPSHOTS_TO_KEEP = 2
+
+# Internal counters of the stock Keras callbacks that affect later epochs
+CALLBACK_STATE_ATTRIBUTES = ("wait", "best", "cooldown_counter", "stopped_epoch", "best_epoch")
+
+
+class ShuffledWindows( tf.keras.utils.Sequence ) :
+    """
+    Training batches in a permutation derived from (seed, epoch).
+
+    Because the order of every epoch is a pure function of the seed and the
+    epoch number, a resumed run sees exactly the batches an uninterrupted run
+    would have seen.
+
+    With indices, only those rows of the arrays are used and each batch is
+    gathered from them on demand, so X can stay memory-mapped without copying
+    the training subset up front.
+    """
+
+    def __init__ ( self, X, coin_ids, y, batch_size: int, output_names, seed: int = 42, epoch: int = 0,
+                   indices=None ) :
+        super().__init__()
+        self.X = X
+        self.coin_ids = coin_ids
+        self.y = y
+        self.indices = None if indices is None else np.asarray( indices )
+        self.batch_size = batch_size
+        self.output_names = list( output_names )
+        self.seed = seed
+        self.epoch = epoch
+        self._order_epoch = None
+        self._order = None
+
+    def _rows ( self ) :
+        return len( self.X ) if self.indices is None else len( self.indices )
+
+    def __len__ ( self ) :
+        return math.ceil( self._rows() / self.batch_size )
+
+    def _permutation ( self ) :
+        if self._order_epoch != self.epoch :
+            self._order = np.random.default_rng( self.seed + self.epoch ).permutation( self._rows() )
+            self._order_epoch = self.epoch
+        return self._order
+
+    def __getitem__ ( self, index ) :
+        batch = self._permutation()[index * self.batch_size :(index + 1) * self.batch_size]
+        if self.indices is not None :
+            batch = np.sort( self.indices[batch] )  # Ascending rows read a memmap sequentially
+        targets = self.y[batch]
+        return (self.X[batch], self.coin_ids[batch]), {name : targets for name in self.output_names}
+
+    def on_epoch_end ( self ) :
+        self.epoch += 1
+
+
+def _optimizer_variables ( optimizer ) :
+    """Optimizer variables as a list (property in newer Keras, method in older)."""
+    variables = optimizer.variables
+    return list( variables() if callable( variables ) else variables )
+
+
+class TrainingSnapshot( tf.keras.callbacks.Callback ) :
+    """
+    Periodically snapshot the full training state and restore it on restart.
+
+    Place this callback after the callbacks it should snapshot so their state
+    for the finished epoch is captured.
+    """
+
+    def __init__ ( self, snapshot_dir: str, dataset: ShuffledWindows, stateful_callbacks=(),
+                   every_epochs: int = 1, fingerprint: dict = None ) :
+        """
+        Args:
+            snapshot_dir: Directory holding snapshots and the LATEST pointer
+            dataset: Training data, whose epoch/seed define the data position
+            stateful_callbacks: Callbacks whose counters are saved and restored
+            every_epochs: Snapshot frequency in epochs
+            fingerprint: Values that must match for a snapshot to be reused
+                (e.g. sample count and number of coins)
+        """
+        super().__init__()
+        self.snapshot_dir = snapshot_dir
+        self.dataset = dataset
+        self.stateful_callbacks = list( stateful_callbacks )
+        self.every_epochs = max( 1, every_epochs )
+        self.fingerprint = fingerprint or {}
+        self.history = {}
+        self._pending_callback_state = None
+
+    # ------------------------------------------------------------------ save
+
+    def on_epoch_end ( self, epoch, logs=None ) :
+        for key, value in (logs or {}).items() :
+            self.history.setdefault( key, [] ).append( float( value ) )
+
+        if (epoch + 1) % self.every_epochs == 0 :
+            self.save( epoch + 1 )
+
+    def save ( self, completed_epochs: int ) :
+        """
+        Write a snapshot for the state after completed_epochs epochs.
+
+        Args:
+            completed_epochs: Number of finished epochs
+        """
+        os.makedirs( self.snapshot_dir, exist_ok=True )
+        name = f"epoch-{completed_epochs:04d}"
+        final_dir = os.path.join( self.snapshot_dir, name )
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree( tmp_dir, ignore_errors=True )
+        os.makedirs( tmp_dir )
+
+        self.model.save_weights( os.path.join( tmp_dir, "model.weights.h5" ) )
+
+        optimizer = self.model.optimizer
+        np.savez( os.path.join( tmp_dir, "optimizer.npz" ),
+                  *[np.asarray( v.numpy() ) for v in _optimizer_variables( optimizer )] )
+
+        callback_state, best_weights = {}, {}
+        for callback in self.stateful_callbacks :
+            key = type( callback ).__name__
+            callback_state[key] = {
+                attr : float( getattr( callback, attr ) ) for attr in CALLBACK_STATE_ATTRIBUTES
+                if isinstance( getattr( callback, attr, None ), (int, float, np.floating, np.integer) )
+            }
+            if getattr( callback, "best_weights", None ) is not None :
+                best_weights[key] = callback.best_weights
+
+        for key, weights in best_weights.items() :
+            np.savez( os.path.join( tmp_dir, f"{key}.best_weights.npz" ), *weights )
+
+        state = {
+            "epoch" : completed_epochs,
+            "learning_rate" : float( np.asarray( optimizer.learning_rate ) ),
+            "data" : {"seed" : self.dataset.seed, "next_epoch" : self.dataset.epoch, "batches_per_epoch" : len( self.dataset )},
+            "callbacks" : callback_state,
+            "history" : self.history,
+            "fingerprint" : self.fingerprint,
+            "saved_at" : time.time(),
+        }
+        with open( os.path.join( tmp_dir, "state.json" ), "w" ) as f :
+            json.dump( state, f, indent=2 )
+
+        # Publish: rename the complete directory, then swap the pointer
+        shutil.rmtree( final_dir, ignore_errors=True )
+        os.replace( tmp_dir, final_dir )
+        pointer_tmp = os.path.join( self.snapshot_dir, SNAPSHOT_POINTER + ".tmp" )
+        with open( pointer_tmp, "w" ) as f :
+            f.write( name )
+        os.replace( pointer_tmp, os.path.join( self.snapshot_dir, SNAPSHOT_POINTER ) )
+
+        self._prune( keep=name )
+        print( f"📸 Snapshot saved after epoch {completed_epochs} ({final_dir})" )
+
+    def _prune ( self, keep: str ) :
+        """Remove all but the newest SNAPSHOTS_TO_KEEP snapshot directories."""
+        snapshots = sorted( d for d in os.listdir( self.snapshot_dir )
+                            if d.startswith( "epoch-" ) and not d.endswith( ".tmp" ) )
+        for name in snapshots[:-SNAPSHOTS_TO_KEEP] :
+            if name != keep :
+                shutil.rmtree( os.path.join( self.snapshot_dir, name ), ignore_errors=True )
+
+    def clear ( self ) :
+        """Delete all snapshots after a run has finished successfully."""
+        shutil.rmtree( self.snapshot_dir, ignore_errors=True )
+
+    # --------------------------------------------------------------- restore
+
+    def latest_snapshot ( self ) :
+        """Path of the snapshot named by LATEST, or None."""
+        pointer = os.path.join( self.snapshot_dir, SNAPSHOT_POINTER )
+        if not os.path.exists( pointer ) :
+            return None
+        with open( pointer ) as f :
+            path = os.path.join( self.snapshot_dir, f.read().strip() )
+        return path if os.path.exists( os.path.join( path, "state.json" ) ) else None
+
+    def restore ( self, model ) -> int :
+        """
+        Load the latest snapshot into a freshly built and compiled model.
+
+        Args:
+            model: Model with the same architecture, already compiled
+
+        Returns:
+            int: Epoch to resume from (0 if there is no usable snapshot)
+        """
+        path = self.latest_snapshot()
+        if path is None :
+            return 0
+
+        with open( os.path.join( path, "state.json" ) ) as f :
+            state = json.load( f )
+
+        if state.get( "fingerprint" ) != self.fingerprint :
+            print( f"⚠️ Ignoring snapshot {path}: it was taken on different data" )
+            return 0
+
+        model.load_weights( os.path.join( path, "model.weights.h5" ) )
+
+        optimizer = model.optimizer
+        optimizer.build( model.trainable_variables )
+        saved = np.load( os.path.join( path, "optimizer.npz" ) )
+        saved = [saved[f"arr_{i}"] for i in range( len( saved.files ) )]
+        variables = _optimizer_variables( optimizer )
+        if len( saved ) != len( variables ) :
+            print( f"⚠️ Ignoring snapshot {path}: optimizer state does not match the model" )
+            return 0
+        for variable, value in zip( variables, saved ) :
+            variable.assign( value )
+        optimizer.learning_rate.assign( state["learning_rate"] )
+
+        self.dataset.seed = state["data"]["seed"]
+        self.dataset.epoch = state["data"]["next_epoch"]
+        self.history = state["history"]
+        self._pending_callback_state = (path, state["callbacks"])
+
+        print( f"♻️ Resuming from snapshot after epoch {state['epoch']} "
+               f"(lr={state['learning_rate']:.2e})" )
+        return int( state["epoch"] )
+
+    def on_train_begin ( self, logs=None ) :
+        # Stock callbacks reset their counters in on_train_begin, which runs
+        # before this one, so their saved state is applied here
+        if self._pending_callback_state is None :
+            return
+
+        path, callback_state = self._pending_callback_state
+        for callback in self.stateful_callbacks :
+            key = type( callback ).__name__
+            for attr, value in callback_state.get( key, {} ).items() :
+                current = getattr( callback, attr, None )
+                setattr( callback, attr, int( value ) if isinstance( current, int ) else value )
+
+            best_path = os.path.join( path, f"{key}.best_weights.npz" )
+            if os.path.exists( best_path ) :
+                saved = np.load( best_path )
+                callback.best_weights = [saved[f"arr_{i}"] for i in range( len( saved.files ) )]
+
+        self._pending_callback_state = None
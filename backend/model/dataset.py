@@ -1,142 +1,547 @@
 import os
+import json
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import RobustScaler
 import joblib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+from features import DEFAULT_FEATURES, load_features, build_feature_series, feature_indices
+from streaming_scaler import StreamingRobustScaler, save_scalers, load_scalers
+
 DATA_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/data"
 SEQ_LEN = 30
 SCALER_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/scalar.pkl"
 COIN_SCALERS_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/coin_scalers.pkl"
+STREAMING_SCALERS_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/coin_scalers.npz"
 ENCODER_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/encoder.pkl"
+FEATURES_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/features.json"
+DATASET_CACHE_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/cache/dataset"
+
+# "robust": sklearn RobustScaler fitted once; "streaming": StreamingRobustScaler,
+# which can absorb new prices later without retraining
+SCALER_TYPES = ("robust", "streaming")
+
+VAL_FRACTION = 0.1  # Newest share of each asset's windows held out for validation
 
 # Configuration for handling different asset types
 LOOKBACK_DAYS = 730  # Use last 2 years of data (balances recency with sufficient training data)
 
+# Worker processes for per-asset preprocessing (1 = serial)
+NUM_WORKERS = min( 8, os.cpu_count() or 1 )
 
-def load_dataset () :
+
+def lookback_days ( seq_len: int = SEQ_LEN ) -> int :
     """
-    Load and preprocess cryptocurrency/commodity data from all available assets.
-    Uses per-coin scalers and recent data window to handle assets at all-time highs.
+    Days of history to load for a given window length.
+
+    Long-context windows (seq_len > SEQ_LEN) need their own history on top of
+    LOOKBACK_DAYS so every asset still gets about two years of targets. The
+    window is converted from trading rows to calendar days (365 / 252) so
+    daily NSE series are covered as well.
+
+    Args:
+        seq_len: Length of input sequences
 
     Returns:
-        tuple: (X, y, coin_ids, num_coins)
-            - X: Input sequences (samples, seq_len, 1)
-            - y: Target values (samples, 1)
-            - coin_ids: Coin identifiers for each sample
-            - num_coins: Total number of unique coins
+        int: Lookback in days (or rows for files without timestamps)
     """
-    X, y, coin_ids = [], [], []
-    coin_to_idx = {}
-    coin_scalers = {}  # Separate scaler for each coin/metal
-    idx = 0
+    if seq_len <= SEQ_LEN :
+        return LOOKBACK_DAYS
+    return LOOKBACK_DAYS + int( np.ceil( seq_len * 365 / 252 ) )
 
-    if not os.path.exists( DATA_DIR ) :
-        raise ValueError( f"Data directory not found: {DATA_DIR}" )
 
-    print( f"📂 Loading data from {DATA_DIR}..." )
-    print( f"⏰ Using last {LOOKBACK_DAYS} days of data for training" )
+def training_rows ( timestamps, rows: int, seq_len: int = SEQ_LEN, trained_at: float = None ) :
+    """
+    Rows of an asset's price file that training used.
 
-    for coin in os.listdir( DATA_DIR ) :
-        path = os.path.join( DATA_DIR, coin, f"{coin}.csv" )
+    Training takes the last lookback_days(seq_len) days before the newest
+    row (the last rows for files without timestamps). With trained_at and
+    timestamps, the newest row is the last one that existed when the model
+    was trained, so rows appended since then count as unseen.
 
-        if not os.path.exists( path ) :
-            continue
+    Args:
+        timestamps: Sorted timestamps of the rows, or None
+        rows: Number of rows in the file
+        seq_len: Length of input sequences
+        trained_at: Unix time the model was trained (default: now)
 
-        try :
-            df = pd.read_csv( path )
+    Returns:
+        tuple: (start, end) row range [start, end) used for training
+    """
+    lookback = lookback_days( seq_len )
+    if timestamps is None :
+        return max( 0, rows - lookback ), rows
+
+    timestamps = pd.Series( timestamps )
+    end = rows
+    if trained_at is not None :
+        limit = pd.Timestamp( trained_at, unit="s", tz="UTC" )
+        if timestamps.dt.tz is None :
+            limit = limit.tz_localize( None )
+        end = int( (timestamps <= limit).sum() )
+        if end == 0 :
+            return 0, 0
+
+    cutoff_date = timestamps.iloc[end - 1] - timedelta( days=lookback )
+    return int( (timestamps.iloc[:end] < cutoff_date).sum() ), end
+
+
+def _load_coin_prices ( coin: str, data_dir: str = DATA_DIR, seq_len: int = SEQ_LEN, coin_scaler=None,
+                        features=DEFAULT_FEATURES, scaler_type: str = "robust" ) :
+    """
+    Parse, filter and scale a single asset's price history.
 
-            # Filter to recent data only (critical for assets at ATH)
-            if 'timestamp' in df.columns :
-                df['timestamp'] = pd.to_datetime( df['timestamp'] )
-                cutoff_date = df['timestamp'].max() - timedelta( days=LOOKBACK_DAYS )
-                df = df[df['timestamp'] >= cutoff_date]
-                df = df.sort_values( 'timestamp' ).reset_index( drop=True )
-            else :
-                # If no timestamp column, take most recent rows
-                df = df.tail( LOOKBACK_DAYS )
+    Runs in a worker process when load_dataset() fans out, so it only takes
+    picklable arguments and returns the scaled series plus the fitted scaler.
+    Windows are built by the parent to keep inter-process transfers small.
 
-            if len( df ) < SEQ_LEN + 1 :
-                print( f"⚠️ Skipping {coin}: insufficient data ({len( df )} rows, need {SEQ_LEN + 1})" )
-                continue
+    Args:
+        coin: Asset identifier (directory name under data_dir)
+        data_dir: Root data directory
+        seq_len: Length of input sequences
+        coin_scaler: Already fitted scaler to reuse; a new one is fitted if None
+        features: Input channels, starting with "close" (see features.py)
+        scaler_type: Kind of scaler to fit when coin_scaler is None
 
-            prices = df["Close"].values.reshape( -1, 1 )
+    Returns:
+        tuple: (coin, scaler, prices_scaled, message) where prices_scaled is
+            the (rows, len(features)) series, or None if the asset was
+            skipped or failed to load; message is the log line to print
+    """
+    path = os.path.join( data_dir, coin, f"{coin}.csv" )
 
+    try :
+        df = pd.read_csv( path )
+
+        # Filter to recent data only (critical for assets at ATH). Indicators
+        # are computed on the full history first so the window edge is warm.
+        if 'timestamp' in df.columns :
+            df['timestamp'] = pd.to_datetime( df['timestamp'] )
+            df = df.sort_values( 'timestamp' ).reset_index( drop=True )
+            start, _ = training_rows( df['timestamp'], len( df ), seq_len )
+        else :
+            # If no timestamp column, take most recent rows
+            start, _ = training_rows( None, len( df ), seq_len )
+
+        total_rows = len( df )
+        feature_matrix = load_features( path, df )[start :] if len( features ) > 1 else None
+        df = df.iloc[start :].reset_index( drop=True )
+
+        if len( df ) < seq_len + 1 :
+            return coin, None, None, (
+                f"⚠️ Skipping {coin}: insufficient data ({len( df )} rows, need {seq_len + 1})"
+            )
+
+        prices = df["Close"].values.reshape( -1, 1 )
+
+        if coin_scaler is None and scaler_type == "streaming" :
+            coin_scaler = StreamingRobustScaler()
+            prices_scaled = coin_scaler.fit_transform( prices )
+            # Position in the full file, so later refreshes only read appended rows
+            coin_scaler.rows_seen = total_rows
+        elif coin_scaler is None :
             # Create coin-specific scaler using RobustScaler
             # RobustScaler is more robust to outliers and extreme values
             coin_scaler = RobustScaler()
             prices_scaled = coin_scaler.fit_transform( prices )
+        else :
+            prices_scaled = coin_scaler.transform( prices )
+
+        if feature_matrix is not None :
+            prices_scaled = build_feature_series( prices_scaled, feature_matrix, features )
+
+        # Log price range for debugging
+        message = (f"✅ {coin}: {len( df )} rows, price range ${prices.min():.2f} - ${prices.max():.2f}, "
+                   f"current ${prices[-1][0]:.2f}")
+        return coin, coin_scaler, prices_scaled, message
+
+    except Exception as e :
+        return coin, None, None, f"❌ Error loading {coin}: {e}"
+
+
+def _build_windows ( prices_scaled: np.ndarray, seq_len: int = SEQ_LEN ) :
+    """
+    Turn a scaled (rows, features) series into next-step training windows.
+
+    Equivalent to appending prices_scaled[i:i + seq_len] and the scaled close
+    prices_scaled[i + seq_len, 0] for every i, but as strided views instead
+    of a Python loop.
+
+    Args:
+        prices_scaled: Scaled series of shape (rows, features), close first
+        seq_len: Length of input sequences
+
+    Returns:
+        tuple: (X, y) with shapes (rows - seq_len, seq_len, features) and (rows - seq_len, 1)
+    """
+    X = np.lib.stride_tricks.sliding_window_view( prices_scaled[:-1], seq_len, axis=0 ).transpose( 0, 2, 1 )
+    return X, prices_scaled[seq_len :, :1]
+
+
+def windows_from_end ( coin_ids: np.ndarray ) -> np.ndarray :
+    """
+    Position of each window counted from the newest window of its coin.
+
+    load_dataset() emits each coin's windows contiguously and in time order,
+    so the newest window of every coin gets 0, the one before it 1, etc.
+
+    Args:
+        coin_ids: Coin identifiers for each sample
+
+    Returns:
+        np.ndarray: Integer offset from the end of each coin's block
+    """
+    coin_ids = np.asarray( coin_ids )
+    boundaries = np.flatnonzero( np.diff( coin_ids ) ) + 1
+    starts = np.concatenate( [[0], boundaries] )
+    ends = np.concatenate( [boundaries, [len( coin_ids )]] )
+    block = np.repeat( np.arange( len( starts ) ), ends - starts )
+
+    return ends[block] - 1 - np.arange( len( coin_ids ) )
+
+
+def split_train_val ( coin_ids: np.ndarray, val_fraction: float = VAL_FRACTION ) :
+    """
+    Hold out the newest windows of every asset for validation.
+
+    Args:
+        coin_ids: Coin identifiers for each sample (contiguous per coin)
+        val_fraction: Share of each asset's windows to hold out
+
+    Returns:
+        tuple: (train_idx, val_idx)
+    """
+    coin_ids = np.asarray( coin_ids )
+    offset = windows_from_end( coin_ids )
+    counts = np.bincount( coin_ids )[coin_ids]
+    val_mask = offset < np.maximum( 1, np.ceil( counts * val_fraction ) )
 
-            # Store the scaler for this specific coin
-            coin_scalers[coin] = coin_scaler
+    return np.flatnonzero( ~val_mask ), np.flatnonzero( val_mask )
 
-            # Map coin to index
-            if coin not in coin_to_idx :
-                coin_to_idx[coin] = idx
-                idx += 1
 
-            # Create sequences
-            for i in range( len( prices_scaled ) - SEQ_LEN ) :
-                X.append( prices_scaled[i :i + SEQ_LEN] )
-                y.append( prices_scaled[i + SEQ_LEN] )
-                coin_ids.append( coin_to_idx[coin] )
+def load_dataset ( data_dir: str = DATA_DIR, seq_len: int = SEQ_LEN,
+                   num_workers: int = NUM_WORKERS, save_artifacts: bool = True,
+                   coin_scalers: dict = None, coin_to_idx: dict = None, features=DEFAULT_FEATURES,
+                   scaler_type: str = "robust" ) :
+    """
+    Load and preprocess cryptocurrency/commodity data from all available assets.
+    Uses per-coin scalers and recent data window to handle assets at all-time highs.
 
-            # Log price range for debugging
-            print( f"✅ {coin}: {len( df )} rows, price range ${prices.min():.2f} - ${prices.max():.2f}, "
-                   f"current ${prices[-1][0]:.2f}" )
+    Per-asset parsing and scaling is fanned out across a process
+    pool. Assets are processed in sorted order and merged in that order, so
+    coin indices, scalers and arrays are identical for any worker count.
 
-        except Exception as e :
-            print( f"❌ Error loading {coin}: {e}" )
+    Args:
+        data_dir: Root data directory containing <coin>/<coin>.csv files
+        seq_len: Length of input sequences
+        num_workers: Worker processes for per-asset preprocessing (1 = serial)
+        save_artifacts: Whether to write scalers and encoder to disk
+        coin_scalers: Existing per-coin scalers to reuse instead of refitting
+        coin_to_idx: Existing encoder; when given, coin indices are kept and
+            assets missing from it are skipped
+        features: Input channels, starting with "close"; ("close",) keeps the
+            single-channel price input
+        scaler_type: "robust" or "streaming" scalers for newly fitted assets
+
+    Returns:
+        tuple: (X, y, coin_ids, num_coins)
+            - X: Input sequences (samples, seq_len, len(features))
+            - y: Target values (samples, 1)
+            - coin_ids: Coin identifiers for each sample
+            - num_coins: Total number of unique coins
+    """
+    features = tuple( features )
+    feature_indices( features )
+    if scaler_type not in SCALER_TYPES :
+        raise ValueError( f"Unknown scaler type '{scaler_type}'. Choose one of {list( SCALER_TYPES )}" )
+    fixed_encoder = coin_to_idx is not None
+    existing_scalers = coin_scalers or {}
+    coin_to_idx = dict( coin_to_idx ) if fixed_encoder else {}
+    coin_scalers = {}  # Separate scaler for each coin/metal
+
+    if not os.path.exists( data_dir ) :
+        raise ValueError( f"Data directory not found: {data_dir}" )
+
+    print( f"📂 Loading data from {data_dir}..." )
+    print( f"⏰ Using last {lookback_days( seq_len )} days of data for training" )
+    if len( features ) > 1 :
+        print( f"🧮 Input features: {', '.join( features )}" )
+
+    # Sorted so the coin index order does not depend on the filesystem
+    coins = [
+        coin for coin in sorted( os.listdir( data_dir ) )
+        if os.path.exists( os.path.join( data_dir, coin, f"{coin}.csv" ) )
+    ]
+
+    if fixed_encoder :
+        new_coins = [coin for coin in coins if coin not in coin_to_idx]
+        if new_coins :
+            print( f"⚠️ Skipping {len( new_coins )} assets not in the encoder: {', '.join( new_coins )}" )
+        coins = [coin for coin in coins if coin in coin_to_idx]
+    scalers = [existing_scalers.get( coin ) for coin in coins]
+
+    num_workers = max( 1, min( num_workers or 1, len( coins ) or 1 ) )
+    if num_workers == 1 :
+        results = [
+            _load_coin_prices( coin, data_dir, seq_len, coin_scaler, features, scaler_type )
+            for coin, coin_scaler in zip( coins, scalers )
+        ]
+    else :
+        print( f"⚙️ Preprocessing {len( coins )} assets with {num_workers} worker processes" )
+        chunksize = max( 1, len( coins ) // (num_workers * 4) )
+        with ProcessPoolExecutor( max_workers=num_workers ) as executor :
+            # map() yields results in submission order regardless of completion order
+            results = list( executor.map(
+                _load_coin_prices, coins,
+                [data_dir] * len( coins ), [seq_len] * len( coins ), scalers, [features] * len( coins ),
+                [scaler_type] * len( coins ),
+                chunksize=chunksize
+            ) )
+
+    X_parts, y_parts, id_parts = [], [], []
+    for coin, coin_scaler, prices_scaled, message in results :
+        print( message )
+        if prices_scaled is None :
             continue
 
-    if len( X ) == 0 :
+        # Store the scaler for this specific coin
+        coin_scalers[coin] = coin_scaler
+
+        # Map coin to index
+        if not fixed_encoder :
+            coin_to_idx[coin] = len( coin_to_idx )
+
+        # Create sequences
+        coin_X, coin_y = _build_windows( prices_scaled, seq_len )
+        X_parts.append( coin_X )
+        y_parts.append( coin_y )
+        id_parts.append( np.full( len( coin_X ), coin_to_idx[coin] ) )
+
+    if len( X_parts ) == 0 :
         raise ValueError( "No valid data found. Check your data directory." )
 
-    X = np.array( X )
-    y = np.array( y )
-    coin_ids = np.array( coin_ids )
+    X = np.concatenate( X_parts )
+    y = np.concatenate( y_parts )
+    coin_ids = np.concatenate( id_parts )
+
+    print( f"\n✅ Loaded {len( X )} samples from {len( coin_scalers )} coins" )
+    print( f"📊 Coins included: {', '.join( sorted( coin_scalers.keys() ) )}" )
 
-    print( f"\n✅ Loaded {len( X )} samples from {len( coin_to_idx )} coins" )
-    print( f"📊 Coins included: {', '.join( sorted( coin_to_idx.keys() ) )}" )
+    if not save_artifacts :
+        return X, y, coin_ids, len( coin_to_idx )
 
     # Save coin-specific scalers and encoder
     os.makedirs( os.path.dirname( SCALER_PATH ), exist_ok=True )
 
     # Save individual coin scalers (PRIMARY - used for predictions)
-    joblib.dump( coin_scalers, COIN_SCALERS_PATH )
-    print( f"💾 Saved {len( coin_scalers )} coin-specific scalers to {COIN_SCALERS_PATH}" )
+    if scaler_type == "streaming" :
+        save_scalers( coin_scalers, STREAMING_SCALERS_PATH )
+        print( f"💾 Saved {len( coin_scalers )} streaming scalers to {STREAMING_SCALERS_PATH}" )
+    else :
+        joblib.dump( coin_scalers, COIN_SCALERS_PATH )
+        print( f"💾 Saved {len( coin_scalers )} coin-specific scalers to {COIN_SCALERS_PATH}" )
 
     # Also save a global scaler for backward compatibility (but won't be used)
     global_scaler = RobustScaler()
-    X_reshaped = X.reshape( -1, 1 )
-    global_scaler.fit( X_reshaped )
+    global_scaler.fit( X[..., :1].reshape( -1, 1 ) )
     joblib.dump( global_scaler, SCALER_PATH )
 
     # Save encoder
     joblib.dump( coin_to_idx, ENCODER_PATH )
     print( f"💾 Saved encoder with {len( coin_to_idx )} coins" )
 
+    # Input channels and scaler kind the artifacts were built with
+    with open( FEATURES_PATH, "w" ) as f :
+        json.dump( {"features" : list( features ), "scaler" : scaler_type}, f )
+
     return X, y, coin_ids, len( coin_to_idx )
 
 
-def get_coin_scaler ( coin: str ) :
+def cache_dataset ( cache_dir: str = DATASET_CACHE_DIR, **load_kwargs ) :
     """
-    Get the scaler for a specific coin.
+    Build the dataset once and store it as .npy files for sharing across processes.
 
     Args:
-        coin: Cryptocurrency/commodity identifier
+        cache_dir: Directory to write X.npy, y.npy, coin_ids.npy and meta.json to
+        **load_kwargs: Passed to load_dataset() (save_artifacts defaults to False)
 
     Returns:
-        Scaler object for the specified coin
+        str: The cache directory
+    """
+    load_kwargs.setdefault( "save_artifacts", False )
+    X, y, coin_ids, num_coins = load_dataset( **load_kwargs )
+
+    os.makedirs( cache_dir, exist_ok=True )
+    for name, array in (("X", X), ("y", y), ("coin_ids", coin_ids)) :
+        np.save( os.path.join( cache_dir, f"{name}.npy" ), array )
+
+    with open( os.path.join( cache_dir, "meta.json" ), "w" ) as f :
+        json.dump( {"num_coins" : num_coins, "samples" : len( X ), "seq_len" : X.shape[1],
+                    "num_features" : X.shape[2]}, f )
+
+    print( f"💾 Cached {len( X )} samples to {cache_dir}" )
+    return cache_dir
+
+
+def load_cached_dataset ( cache_dir: str = DATASET_CACHE_DIR, mmap: bool = True ) :
     """
-    if not os.path.exists( COIN_SCALERS_PATH ) :
+    Load a dataset written by cache_dataset().
+
+    With mmap=True the arrays are memory-mapped read-only, so many worker
+    processes share one copy through the OS page cache.
+
+    Args:
+        cache_dir: Cache directory
+        mmap: Memory-map the arrays instead of reading them into memory
+
+    Returns:
+        tuple: (X, y, coin_ids, num_coins) as returned by load_dataset()
+    """
+    with open( os.path.join( cache_dir, "meta.json" ) ) as f :
+        meta = json.load( f )
+
+    mmap_mode = "r" if mmap else None
+    arrays = [np.load( os.path.join( cache_dir, f"{name}.npy" ), mmap_mode=mmap_mode )
+              for name in ("X", "y", "coin_ids")]
+
+    return arrays[0], arrays[1], arrays[2], meta["num_coins"]
+
+
+def _load_preprocessing_config () -> dict :
+    if not os.path.exists( FEATURES_PATH ) :
+        return {}
+    with open( FEATURES_PATH ) as f :
+        return json.load( f )
+
+
+def scaler_config () -> tuple :
+    """
+    Kind and path of the coin scalers written by the last full training run.
+
+    Returns:
+        tuple: (scaler_type, path)
+    """
+    if _load_preprocessing_config().get( "scaler", "robust" ) == "streaming" :
+        return "streaming", STREAMING_SCALERS_PATH
+    return "robust", COIN_SCALERS_PATH
+
+
+def load_coin_scalers () -> dict :
+    """Per-coin scalers of the last full training run, whichever kind it used."""
+    scaler_type, path = scaler_config()
+    if not os.path.exists( path ) :
         raise FileNotFoundError(
-            f"Coin scalers not found at {COIN_SCALERS_PATH}. "
+            f"Coin scalers not found at {path}. "
             "Please run dataset.py or train_model.py first."
         )
+    return load_scalers( path ) if scaler_type == "streaming" else joblib.load( path )
+
+
+def refresh_streaming_scalers ( data_dir: str = DATA_DIR ) -> dict :
+    """
+    Feed rows appended to every asset's CSV into its streaming scaler and save them.
+
+    Each scaler remembers how many rows of its file it has absorbed, so only
+    the new rows are read into the sketch. Assets whose file was rewritten
+    (history no longer lines up) are left unchanged.
+
+    Args:
+        data_dir: Root data directory
 
-    coin_scalers = joblib.load( COIN_SCALERS_PATH )
+    Returns:
+        dict: Asset -> number of rows absorbed
+
+    Raises:
+        ValueError: If the last full training run used RobustScaler
+    """
+    scaler_type, path = scaler_config()
+    if scaler_type != "streaming" :
+        raise ValueError( "The current scalers are not streaming scalers. "
+                          "Run a full training with --scaler streaming first." )
+
+    coin_scalers = load_coin_scalers()
+    absorbed = {}
+    for coin, coin_scaler in coin_scalers.items() :
+        csv_path = os.path.join( data_dir, coin, f"{coin}.csv" )
+        if not os.path.exists( csv_path ) :
+            continue
+        df = pd.read_csv( csv_path )
+        if 'timestamp' in df.columns :
+            df = df.iloc[np.argsort( pd.to_datetime( df['timestamp'], utc=True ).values, kind="stable" )]
+        absorbed[coin] = coin_scaler.refresh( df["Close"].values )
+
+    save_scalers( coin_scalers, path )
+    return absorbed
+
+
+def load_training_artifacts () :
+    """
+    Load the per-coin scalers and encoder written by the last full training run.
+
+    Returns:
+        tuple: (coin_scalers, coin_to_idx)
+    """
+    if not os.path.exists( ENCODER_PATH ) :
+        raise FileNotFoundError(
+            f"Training artifact not found at {ENCODER_PATH}. "
+            "Please run dataset.py or train_model.py first."
+        )
+
+    return load_coin_scalers(), joblib.load( ENCODER_PATH )
+
+
+def load_feature_config () -> tuple :
+    """
+    Input channels of the last full training run.
+
+    Returns:
+        tuple: Feature names; ("close",) for runs from before the feature pipeline
+    """
+    return tuple( _load_preprocessing_config().get( "features", DEFAULT_FEATURES ) )
+
+
+def load_coin_dataset ( coin: str, coin_scaler, coin_index: int,
+                        data_dir: str = DATA_DIR, seq_len: int = SEQ_LEN, features=DEFAULT_FEATURES ) :
+    """
+    Build the training windows of a single asset with its existing scaler.
+
+    Args:
+        coin: Asset identifier
+        coin_scaler: The asset's fitted scaler
+        coin_index: The asset's index in the encoder
+        data_dir: Root data directory
+        seq_len: Length of input sequences
+        features: Input channels, starting with "close"
+
+    Returns:
+        tuple: (X, y, coin_ids) for that asset only, oldest window first
+
+    Raises:
+        ValueError: If the asset has no usable data
+    """
+    _, _, prices_scaled, message = _load_coin_prices( coin, data_dir, seq_len, coin_scaler, features )
+    print( message )
+
+    if prices_scaled is None :
+        raise ValueError( message )
+
+    X, y = _build_windows( prices_scaled, seq_len )
+    return np.ascontiguousarray( X ), y, np.full( len( X ), coin_index )
+
+
+def get_coin_scaler ( coin: str ) :
+    """
+    Get the scaler for a specific coin.
+
+    Args:
+        coin: Cryptocurrency/commodity identifier
+
+    Returns:
+        Scaler object for the specified coin
+    """
+    coin_scalers = load_coin_scalers()
 
     if coin not in coin_scalers :
         raise ValueError(
@@ -146,7 +551,69 @@ def get_coin_scaler ( coin: str ) :
     return coin_scalers[coin]
 
 
+def benchmark_load_dataset ( num_assets: int = 2000, rows: int = 1000,
+                            worker_counts=(1, 2, 4, 8), seed: int = 42 ) :
+    """
+    Time load_dataset() on a synthetic universe at several worker counts.
+
+    Writes random-walk CSVs in the same layout as DATA_DIR to a temporary
+    directory, runs load_dataset() without saving artifacts and checks every
+    run against the serial result.
+
+    Args:
+        num_assets: Number of synthetic assets
+        rows: Daily rows per asset
+        worker_counts: Worker counts to time
+        seed: Random seed for the synthetic prices
+
+    Returns:
+        dict: Mapping of worker count -> elapsed seconds
+    """
+    import tempfile
+    import time
+    import contextlib
+    import io
+
+    rng = np.random.default_rng( seed )
+    timings = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir :
+        timestamps = pd.date_range( end=datetime.now().date(), periods=rows, freq="D" )
+        for i in range( num_assets ) :
+            coin = f"asset{i:05d}"
+            os.makedirs( os.path.join( tmp_dir, coin ) )
+            prices = 100 * np.exp( np.cumsum( rng.normal( 0, 0.02, rows ) ) )
+            pd.DataFrame( {"timestamp" : timestamps, "Close" : prices} ).to_csv(
+                os.path.join( tmp_dir, coin, f"{coin}.csv" ), index=False
+            )
+
+        reference = None
+        for workers in worker_counts :
+            start = time.perf_counter()
+            with contextlib.redirect_stdout( io.StringIO() ) :
+                result = load_dataset( data_dir=tmp_dir, num_workers=workers, save_artifacts=False )
+            timings[workers] = time.perf_counter() - start
+
+            if reference is None :
+                reference = result
+            elif not all( np.array_equal( a, b ) for a, b in zip( reference[:3], result[:3] ) ) :
+                raise AssertionError( f"Parallel result with {workers} workers differs from serial" )
+
+            print( f"⏱️ {workers} worker(s): {timings[workers]:.2f}s" )
+
+    return timings
+
+
 if __name__ == "__main__" :
+    import sys
+
+    if "--benchmark" in sys.argv :
+        print( "=" * 60 )
+        print( "⏱️ BENCHMARKING PARALLEL DATASET PREPROCESSING" )
+        print( "=" * 60 )
+        benchmark_load_dataset()
+        sys.exit( 0 )
+
     print( "=" * 60 )
     print( "📊 LOADING AND PREPROCESSING DATASET" )
     print( "=" * 60 )
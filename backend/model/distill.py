@@ -0,0 +1,289 @@
+"""
+Knowledge distillation of the quantile transformer into a compact student.
+
+The student (build_student_model) is trained to reproduce the teacher's
+q10/q50/q90 outputs, with a smaller weight on the ground-truth pinball loss
+so it does not inherit the teacher's errors one-for-one. Both models are then
+scored on the newest windows of every asset, and their single-request latency
+and batched throughput are measured, giving a latency/accuracy report.
+
+Usage:
+    python distill.py --epochs 30
+"""
+
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from assets import asset_class_groups
+from dataset import load_dataset, load_training_artifacts, split_train_val
+from build_transformer import build_student_model
+from metrics import evaluate_grouped
+from registry import bundle_with
+
+STUDENT_MODEL_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_student.keras"
+DISTILL_REPORT_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/distillation_report.json"
+
+DISTILL_EPOCHS = 30
+DISTILL_BATCH_SIZE = 512
+DISTILL_LEARNING_RATE = 1e-3
+DISTILL_ALPHA = 0.3  # Weight of the ground-truth pinball loss; the rest matches the teacher
+LATENCY_RUNS = 200
+
+
+def distillation_loss ( q: float, alpha: float = DISTILL_ALPHA ) :
+    """
+    Loss for one quantile head of the student.
+
+    y_true packs two columns: the real target and the teacher's prediction.
+
+    Args:
+        q: Quantile level of the head
+        alpha: Weight of the pinball loss against the ground truth
+
+    Returns:
+        Loss function
+    """
+
+    def loss ( y_true, y_pred ) :
+        target, teacher = y_true[:, 0:1], y_true[:, 1:2]
+        error = target - y_pred
+        pinball = tf.reduce_mean( tf.maximum( q * error, (q - 1) * error ) )
+        imitation = tf.reduce_mean( tf.square( teacher - y_pred ) )
+        return alpha * pinball + (1 - alpha) * imitation
+
+    return loss
+
+
+def measure_latency ( model, X, coin_ids, runs: int = LATENCY_RUNS ) -> dict :
+    """
+    Single-request latency and batched throughput of a model.
+
+    Single requests call the model directly on one window, the way
+    services/predictor.py does.
+
+    Args:
+        model: Model to time
+        X: Input sequences
+        coin_ids: Coin identifiers
+        runs: Number of timed single-window calls
+
+    Returns:
+        dict: p50/p95 single latency in ms and batched samples per second
+    """
+    from train_model import predict_quantiles
+
+    inputs = [X[:1], coin_ids[:1]]
+    model( inputs, training=False )  # warm-up / tracing
+
+    timings = []
+    for i in range( runs ) :
+        j = i % len( X )
+        start = time.perf_counter()
+        model( [X[j :j + 1], coin_ids[j :j + 1]], training=False )
+        timings.append( (time.perf_counter() - start) * 1000 )
+
+    predict_quantiles( model, X[:1024], coin_ids[:1024] )  # warm-up
+    start = time.perf_counter()
+    predict_quantiles( model, X, coin_ids )
+    batched_seconds = time.perf_counter() - start
+
+    return {
+        "latency_ms_p50" : float( np.percentile( timings, 50 ) ),
+        "latency_ms_p95" : float( np.percentile( timings, 95 ) ),
+        "throughput_samples_per_s" : float( len( X ) / max( batched_seconds, 1e-9 ) ),
+    }
+
+
+def score ( y, predictions, coin_ids, coin_to_idx ) -> dict :
+    """Overall and per-asset-class quantile metrics for cached predictions."""
+    from train_model import QUANTILES
+
+    idx_to_coin = {idx : coin for coin, idx in coin_to_idx.items()}
+    class_labels, class_of_coin = asset_class_groups(
+        [idx_to_coin.get( idx, str( idx ) ) for idx in range( max( idx_to_coin ) + 1 )]
+    )
+    class_of_coin = np.array( class_of_coin )
+
+    grouped = evaluate_grouped(
+        y.reshape( -1 ),
+        predictions,
+        {
+            "overall" : (np.zeros( len( y ), dtype=np.int64 ), ["overall"]),
+            "per_asset_class" : (class_of_coin[coin_ids], class_labels),
+        },
+        quantiles=tuple( QUANTILES.values() )
+    )
+    result = grouped["overall"]["overall"]
+    result["mean_pinball"] = float( np.mean( [result[name]["pinball"] for name in QUANTILES] ) )
+    result["per_asset_class"] = grouped["per_asset_class"]
+
+    return result
+
+
+def distill ( epochs: int = DISTILL_EPOCHS, batch_size: int = DISTILL_BATCH_SIZE,
+              learning_rate: float = DISTILL_LEARNING_RATE, alpha: float = DISTILL_ALPHA,
+              hidden_units: int = 64, embedding_dim: int = 16 ) -> dict :
+    """
+    Train the student against the saved teacher and write the trade-off report.
+
+    Args:
+        epochs: Maximum training epochs
+        batch_size: Training batch size
+        learning_rate: Adam learning rate
+        alpha: Weight of the ground-truth pinball loss
+        hidden_units: Width of the student's first hidden layer
+        embedding_dim: Size of the student's coin embedding
+
+    Returns:
+        dict: Latency/accuracy report
+    """
+    from train_model import (MODEL_PATH, QUANTILES, load_trained_model, model_seq_len, saved_features,
+                             predict_quantiles, save_model_atomic)
+
+    # The student must see exactly the teacher's windows, scaling and coin indices
+    teacher = load_trained_model( MODEL_PATH )
+    seq_len = model_seq_len( teacher )
+    coin_scalers, coin_to_idx = load_training_artifacts()
+    X, y, coin_ids, _ = load_dataset( seq_len=seq_len, save_artifacts=False, coin_scalers=coin_scalers,
+                                      coin_to_idx=coin_to_idx, features=saved_features( teacher ) )
+    num_coins = len( coin_to_idx )
+    train_idx, val_idx = split_train_val( coin_ids )
+    print( f"📦 {len( train_idx ):,} training / {len( val_idx ):,} validation windows, {num_coins} assets" )
+
+    print( "\n🎓 Running teacher over the dataset..." )
+    teacher_predictions = predict_quantiles( teacher, X, coin_ids )
+
+    # Pack (truth, teacher) per head so the loss can see both
+    targets = {
+        name : np.stack( [y.reshape( -1 ), teacher_predictions[:, j]], axis=1 ).astype( np.float32 )
+        for j, name in enumerate( QUANTILES )
+    }
+
+    print( "\n🧒 Training student..." )
+    student = build_student_model( seq_len, num_coins, hidden_units=hidden_units, embedding_dim=embedding_dim,
+                                   num_features=X.shape[2] )
+    student.compile(
+        optimizer=tf.keras.optimizers.Adam( learning_rate=learning_rate ),
+        loss={name : distillation_loss( q, alpha ) for name, q in QUANTILES.items()}
+    )
+    student.fit(
+        [X[train_idx], coin_ids[train_idx]],
+        {name : target[train_idx] for name, target in targets.items()},
+        validation_data=(
+            [X[val_idx], coin_ids[val_idx]],
+            {name : target[val_idx] for name, target in targets.items()}
+        ),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[tf.keras.callbacks.EarlyStopping( monitor="val_loss", patience=5, restore_best_weights=True )],
+        verbose=2
+    )
+
+    # Compare both models on the held-out windows
+    X_val, y_val, ids_val = X[val_idx], y[val_idx], coin_ids[val_idx]
+    student_predictions = predict_quantiles( student, X_val, ids_val )
+    teacher_val = teacher_predictions[val_idx]
+
+    print( "\n⏱️ Measuring latency..." )
+    report = {
+        "teacher" : {
+            "params" : int( teacher.count_params() ),
+            **measure_latency( teacher, X_val, ids_val ),
+            "validation" : score( y_val, teacher_val, ids_val, coin_to_idx ),
+        },
+        "student" : {
+            "params" : int( student.count_params() ),
+            **measure_latency( student, X_val, ids_val ),
+            "validation" : score( y_val, student_predictions, ids_val, coin_to_idx ),
+            "teacher_agreement_mae" : {
+                name : float( np.mean( np.abs( student_predictions[:, j] - teacher_val[:, j] ) ) )
+                for j, name in enumerate( QUANTILES )
+            },
+        },
+        "config" : {
+            "seq_len" : seq_len,
+            "epochs" : epochs,
+            "batch_size" : batch_size,
+            "learning_rate" : learning_rate,
+            "alpha" : alpha,
+            "hidden_units" : hidden_units,
+            "embedding_dim" : embedding_dim,
+            "validation_windows" : int( len( val_idx ) ),
+        },
+    }
+    teacher_report, student_report = report["teacher"], report["student"]
+    report["tradeoff"] = {
+        "single_latency_speedup" : teacher_report["latency_ms_p50"] / max( student_report["latency_ms_p50"], 1e-9 ),
+        "throughput_speedup" : student_report["throughput_samples_per_s"] / max( teacher_report["throughput_samples_per_s"], 1e-9 ),
+        "param_ratio" : student_report["params"] / max( teacher_report["params"], 1 ),
+        "mean_pinball_increase_pct" : 100 * (student_report["validation"]["mean_pinball"]
+                                             / max( teacher_report["validation"]["mean_pinball"], 1e-12 ) - 1),
+        "coverage_change" : student_report["validation"]["coverage_q10_q90"] - teacher_report["validation"]["coverage_q10_q90"],
+    }
+
+    save_model_atomic( student, STUDENT_MODEL_PATH )
+    os.makedirs( os.path.dirname( DISTILL_REPORT_PATH ), exist_ok=True )
+    with open( DISTILL_REPORT_PATH, "w" ) as f :
+        json.dump( report, f, indent=2 )
+
+    print_report( report )
+    print( f"\n💾 Student saved to {STUDENT_MODEL_PATH}" )
+    print( f"💾 Report saved to {DISTILL_REPORT_PATH}" )
+
+    # Serve the student alongside the teacher it was distilled from
+    try :
+        report["model_version"] = bundle_with( {"student.keras" : STUDENT_MODEL_PATH},
+                                               {"mode" : "distill", "tradeoff" : report["tradeoff"]} )
+    except Exception as e :
+        print( f"⚠️ Could not publish model version: {e}" )
+
+    return report
+
+
+def print_report ( report: dict ) :
+    """Print the latency/accuracy comparison as a table."""
+    print( "\n" + "=" * 72 )
+    print( "📊 DISTILLATION REPORT" )
+    print( "=" * 72 )
+    print( f"{'Model':<10}{'Params':>12}{'p50 ms':>10}{'p95 ms':>10}{'Samples/s':>14}{'Pinball':>10}{'Coverage':>10}" )
+    for name in ("teacher", "student") :
+        row = report[name]
+        print( f"{name:<10}{row['params']:>12,}{row['latency_ms_p50']:>10.2f}{row['latency_ms_p95']:>10.2f}"
+               f"{row['throughput_samples_per_s']:>14,.0f}{row['validation']['mean_pinball']:>10.4f}"
+               f"{row['validation']['coverage_q10_q90'] * 100:>9.1f}%" )
+
+    tradeoff = report["tradeoff"]
+    print( f"\n⚡ Single-request speedup: {tradeoff['single_latency_speedup']:.1f}×, "
+           f"batched: {tradeoff['throughput_speedup']:.1f}×" )
+    print( f"🎯 Pinball loss change: {tradeoff['mean_pinball_increase_pct']:+.1f}%, "
+           f"coverage change: {tradeoff['coverage_change'] * 100:+.1f} pts" )
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser( description="Distill the transformer into a compact student model" )
+    parser.add_argument( "--epochs", type=int, default=DISTILL_EPOCHS )
+    parser.add_argument( "--batch-size", type=int, default=DISTILL_BATCH_SIZE )
+    parser.add_argument( "--learning-rate", type=float, default=DISTILL_LEARNING_RATE )
+    parser.add_argument( "--alpha", type=float, default=DISTILL_ALPHA,
+                         help="Weight of the ground-truth pinball loss (0 = pure imitation)" )
+    parser.add_argument( "--hidden-units", type=int, default=64 )
+    parser.add_argument( "--embedding-dim", type=int, default=16 )
+    args = parser.parse_args()
+
+    print( "=" * 60 )
+    print( "🎓 DISTILLING STUDENT MODEL" )
+    print( "=" * 60 )
+
+    distill(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        alpha=args.alpha,
+        hidden_units=args.hidden_units,
+        embedding_dim=args.embedding_dim
+    )
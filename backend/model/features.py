@@ -0,0 +1,333 @@
+"""
+OHLCV feature pipeline with incrementally computed indicators.
+
+Every indicator is produced by a FeatureState that consumes one bar at a time
+in O(1): rolling means and variances are kept over fixed-size ring buffers
+with a sliding Welford update, so no window is ever re-summed. The features
+of every row are cached next to the asset's CSV together with the final
+state; when rows are appended to the CSV only the new rows are pushed
+through the restored state instead of recomputing the full history.
+
+Assets without Open/High/Low/Volume (the crypto CSVs only store Close) fall
+back to Close for the missing prices and 0 for volume.
+
+This module only depends on numpy and pandas so the API can import it as
+model.features.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+VOLATILITY_WINDOW = 20
+VOLUME_WINDOW = 20
+SHORT_MA_WINDOW = 10
+LONG_MA_WINDOW = 50
+
+# Column order of the cached feature matrix
+FEATURE_NAMES = (
+    "close",  # Raw close; scaled with the asset's scaler by the caller
+    "log_return",  # log(close / previous close)
+    "true_range",  # True range relative to the previous close
+    "volatility",  # Rolling std of log returns
+    "volume_z",  # Rolling z-score of volume
+    "ma_short",  # close / short moving average - 1
+    "ma_long",  # close / long moving average - 1
+)
+DEFAULT_FEATURES = ("close",)
+OHLCV_FEATURES = FEATURE_NAMES
+
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+CACHE_SUFFIX = ".features.npz"
+
+
+class RollingStats :
+    """
+    Mean and variance over the last `window` values, updated in O(1).
+
+    Uses a ring buffer and a sliding Welford update: adding a value when the
+    window is full replaces the oldest one in the running mean and M2.
+    """
+
+    __slots__ = ("window", "values", "position", "count", "mean", "m2")
+
+    def __init__ ( self, window: int ) :
+        self.window = window
+        self.values = np.zeros( window, dtype=np.float64 )
+        self.position = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push ( self, x: float ) :
+        """Add a value, evicting the oldest one when the window is full."""
+        if self.count < self.window :
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        else :
+            old = self.values[self.position]
+            old_mean = self.mean
+            self.mean += (x - old) / self.window
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+
+        self.values[self.position] = x
+        self.position = (self.position + 1) % self.window
+
+    @property
+    def std ( self ) -> float :
+        """Sample standard deviation, 0 until two values have been seen."""
+        if self.count < 2 :
+            return 0.0
+        return float( np.sqrt( max( self.m2, 0.0 ) / (self.count - 1) ) )
+
+    def to_array ( self ) -> np.ndarray :
+        """State as a flat array: [position, count, mean, m2, values...]."""
+        return np.concatenate( [[self.position, self.count, self.mean, self.m2], self.values] )
+
+    @classmethod
+    def from_array ( cls, array: np.ndarray ) :
+        stats = cls( len( array ) - 4 )
+        stats.position, stats.count = int( array[0] ), int( array[1] )
+        stats.mean, stats.m2 = float( array[2] ), float( array[3] )
+        stats.values = np.array( array[4 :], dtype=np.float64 )
+        return stats
+
+
+class FeatureState :
+    """Indicator state of one asset; update() turns one OHLCV bar into a feature row."""
+
+    def __init__ ( self ) :
+        self.previous_close = np.nan
+        self.returns = RollingStats( VOLATILITY_WINDOW )
+        self.volume = RollingStats( VOLUME_WINDOW )
+        self.short_ma = RollingStats( SHORT_MA_WINDOW )
+        self.long_ma = RollingStats( LONG_MA_WINDOW )
+
+    def update ( self, open_, high, low, close, volume ) -> np.ndarray :
+        """
+        Consume one bar.
+
+        Returns:
+            np.ndarray: Feature row in FEATURE_NAMES order
+        """
+        previous = self.previous_close if self.previous_close > 0 else close
+        log_return = float( np.log( close / previous ) ) if close > 0 and previous > 0 else 0.0
+        true_range = (max( high, previous ) - min( low, previous )) / previous if previous > 0 else 0.0
+
+        self.returns.push( log_return )
+        self.volume.push( volume )
+        self.short_ma.push( close )
+        self.long_ma.push( close )
+
+        volume_std = self.volume.std
+        row = np.array( [
+            close,
+            log_return,
+            true_range,
+            self.returns.std,
+            (volume - self.volume.mean) / volume_std if volume_std > 0 else 0.0,
+            close / self.short_ma.mean - 1 if self.short_ma.mean > 0 else 0.0,
+            close / self.long_ma.mean - 1 if self.long_ma.mean > 0 else 0.0,
+        ] )
+        self.previous_close = close
+        return row
+
+    def to_arrays ( self ) -> dict :
+        """State as named arrays for np.savez."""
+        return {
+            "state_previous_close" : np.array( [self.previous_close] ),
+            "state_returns" : self.returns.to_array(),
+            "state_volume" : self.volume.to_array(),
+            "state_short_ma" : self.short_ma.to_array(),
+            "state_long_ma" : self.long_ma.to_array(),
+        }
+
+    @classmethod
+    def from_arrays ( cls, arrays ) :
+        state = cls()
+        state.previous_close = float( arrays["state_previous_close"][0] )
+        state.returns = RollingStats.from_array( arrays["state_returns"] )
+        state.volume = RollingStats.from_array( arrays["state_volume"] )
+        state.short_ma = RollingStats.from_array( arrays["state_short_ma"] )
+        state.long_ma = RollingStats.from_array( arrays["state_long_ma"] )
+        return state
+
+
+def ohlcv_array ( df: pd.DataFrame ) -> np.ndarray :
+    """
+    OHLCV bars of a price DataFrame as a (rows, 5) float array.
+
+    Missing Open/High/Low fall back to Close and missing Volume to 0.
+    """
+    close = df["Close"].values.astype( np.float64 )
+    columns = []
+    for name in OHLCV_COLUMNS :
+        if name in df.columns :
+            columns.append( df[name].values.astype( np.float64 ) )
+        else :
+            columns.append( np.zeros_like( close ) if name == "Volume" else close )
+
+    bars = np.column_stack( columns )
+    bars[:, 4] = np.nan_to_num( bars[:, 4] )
+    return bars
+
+
+def compute_features ( bars: np.ndarray, state: FeatureState = None ) :
+    """
+    Push OHLCV bars through a feature state.
+
+    Args:
+        bars: (rows, 5) OHLCV array
+        state: State to continue from (a fresh one if None)
+
+    Returns:
+        tuple: (features of shape (rows, len(FEATURE_NAMES)), final state)
+    """
+    state = state or FeatureState()
+    features = np.empty( (len( bars ), len( FEATURE_NAMES )), dtype=np.float64 )
+    for i, bar in enumerate( bars ) :
+        features[i] = state.update( *bar )
+    return features, state
+
+
+def feature_cache_path ( csv_path: str ) -> str :
+    """Feature cache stored next to an asset's CSV."""
+    return os.path.splitext( csv_path )[0] + CACHE_SUFFIX
+
+
+def _save_cache ( path: str, bars: np.ndarray, features: np.ndarray, state: FeatureState ) :
+    # A unique temporary file per writer, so concurrent saves of one asset never share it
+    fd, tmp_path = tempfile.mkstemp( dir=os.path.dirname( path ) or ".", suffix=".tmp.npz" )
+    try :
+        with os.fdopen( fd, "wb" ) as f :
+            np.savez( f, features=features, first_bar=bars[0], last_bar=bars[-1], **state.to_arrays() )
+        os.replace( tmp_path, path )
+    except BaseException :
+        if os.path.exists( tmp_path ) :
+            os.remove( tmp_path )
+        raise
+
+
+def load_features ( csv_path: str, df: pd.DataFrame = None ) -> np.ndarray :
+    """
+    Features of every row of an asset's price file, using the cache.
+
+    The cache is reused when its first and last cached bars still match the
+    file; only rows appended since then are computed, starting from the cached
+    indicator state. Anything else (rewritten history, new columns) triggers
+    a full recompute.
+
+    Args:
+        csv_path: Path of the asset's CSV
+        df: The CSV already loaded and in time order (read from csv_path if None)
+
+    Returns:
+        np.ndarray: (rows, len(FEATURE_NAMES)) features, aligned with df
+    """
+    if df is None :
+        df = pd.read_csv( csv_path )
+    bars = ohlcv_array( df )
+    cache_path = feature_cache_path( csv_path )
+
+    if os.path.exists( cache_path ) :
+        try :
+            with np.load( cache_path ) as cache :
+                cached = cache["features"]
+                rows = len( cached )
+                if (0 < rows <= len( bars ) and cached.shape[1] == len( FEATURE_NAMES )
+                        and np.array_equal( cache["first_bar"], bars[0] )
+                        and np.array_equal( cache["last_bar"], bars[rows - 1] )) :
+                    if rows == len( bars ) :
+                        return cached
+                    new_features, state = compute_features( bars[rows :], FeatureState.from_arrays( cache ) )
+                    features = np.concatenate( [cached, new_features] )
+                    _save_cache( cache_path, bars, features, state )
+                    return features
+        except (OSError, KeyError, ValueError) :
+            pass  # Unreadable cache: recompute below
+
+    features, state = compute_features( bars )
+    if len( bars ) :
+        _save_cache( cache_path, bars, features, state )
+    return features
+
+
+def extend_features ( csv_path: str, df: pd.DataFrame, bars: np.ndarray ) -> np.ndarray :
+    """
+    Features of a price file followed by bars that are not stored in it.
+
+    The extra bars (e.g. live prices) continue from the cached indicator state
+    of the file's last row and are never cached themselves, so the cache stays
+    valid for the file. Bars with NaN volume use the rolling mean volume.
+
+    Args:
+        csv_path: Path of the asset's CSV
+        df: The CSV already loaded and in time order
+        bars: (rows, 5) OHLCV bars following the last row of df
+
+    Returns:
+        np.ndarray: (len(df) + rows, len(FEATURE_NAMES)) features
+    """
+    features = load_features( csv_path, df )
+    if not len( bars ) :
+        return features
+
+    try :
+        with np.load( feature_cache_path( csv_path ) ) as cache :
+            state = FeatureState.from_arrays( cache )
+    except (OSError, KeyError, ValueError) :
+        _, state = compute_features( ohlcv_array( df ) )
+
+    extra = np.empty( (len( bars ), len( FEATURE_NAMES )), dtype=np.float64 )
+    for i, (open_, high, low, close, volume) in enumerate( bars ) :
+        if np.isnan( volume ) :
+            volume = state.volume.mean
+        extra[i] = state.update( open_, high, low, close, volume )
+    return np.concatenate( [features, extra] )
+
+
+def feature_indices ( features ) -> list :
+    """
+    Column indices of the requested features.
+
+    Raises:
+        ValueError: If a feature is unknown or "close" is not the first one
+            (the close channel is also the training target)
+    """
+    unknown = [name for name in features if name not in FEATURE_NAMES]
+    if unknown :
+        raise ValueError( f"Unknown features {unknown}. Choose from {list( FEATURE_NAMES )}" )
+    if not features or features[0] != "close" :
+        raise ValueError( "The first feature must be 'close'" )
+    return [FEATURE_NAMES.index( name ) for name in features]
+
+
+def build_feature_series ( prices_scaled: np.ndarray, feature_matrix: np.ndarray, features ) -> np.ndarray :
+    """
+    Model input channels: the scaled close followed by the other features.
+
+    Args:
+        prices_scaled: Scaled close prices of shape (rows, 1)
+        feature_matrix: Rows of load_features() aligned with prices_scaled
+        features: Feature names, starting with "close"
+
+    Returns:
+        np.ndarray: (rows, len(features)) float32 series
+    """
+    indices = feature_indices( features )
+    return np.column_stack( [prices_scaled[:, :1], feature_matrix[:, indices[1 :]]] ).astype( np.float32 )
+
+
+def parse_features ( spec: str ) -> tuple :
+    """Parse a CLI feature list: "ohlcv", "close" or comma-separated names."""
+    if not spec or spec == "close" :
+        return DEFAULT_FEATURES
+    if spec == "ohlcv" :
+        return OHLCV_FEATURES
+    features = tuple( name.strip() for name in spec.split( "," ) )
+    feature_indices( features )
+    return features
@@ -0,0 +1,345 @@
+"""
+Parallel hyperparameter search for the quantile forecasting models.
+
+Trials run in separate processes, each limited to a fixed number of CPU
+threads, and all read one memory-mapped copy of the dataset. Weak trials are
+pruned early when their validation loss is worse than the median of other
+trials at the same epoch.
+
+Usage:
+    python hyperparameter_search.py --trials 24 --workers 4 --threads-per-trial 2
+"""
+
+import os
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from dataset import DATASET_CACHE_DIR, cache_dataset, load_cached_dataset, split_train_val
+
+SEARCH_RESULTS_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/search"
+
+SEARCH_EPOCHS = 10
+PRUNE_WARMUP_EPOCHS = 2  # Never prune before this many epochs
+PRUNE_MIN_TRIALS = 3  # Reports needed at an epoch before pruning against their median
+LATENCY_RUNS = 20
+
+# Candidate values per architecture; builder keyword arguments plus training settings
+SEARCH_SPACE = {
+    "transformer" : {
+        "d_model" : [32, 64, 128],
+        "num_heads" : [2, 4],
+        "ff_dim" : [64, 128, 256],
+        "num_transformer_blocks" : [1, 2, 3],
+        "dropout" : [0.0, 0.1, 0.2],
+    },
+    "lstm" : {
+        "lstm_units" : [32, 64, 128],
+        "dropout" : [0.1, 0.2, 0.3],
+    },
+    "cnn_lstm" : {
+        "dropout" : [0.1, 0.2, 0.3],
+    },
+}
+TRAINING_SPACE = {
+    "learning_rate" : [3e-4, 1e-3, 3e-3],
+    "batch_size" : [128, 256, 512],
+}
+
+
+def sample_trials ( n_trials: int, architectures, seed: int = 42 ) :
+    """
+    Draw distinct random configurations, cycling through the architectures.
+
+    Args:
+        n_trials: Number of trials
+        architectures: Architecture names from SEARCH_SPACE
+        seed: Random seed
+
+    Returns:
+        list: (architecture, model_params, training_params) tuples
+    """
+    rng = np.random.default_rng( seed )
+    trials, seen = [], set()
+
+    for attempt in range( n_trials * 50 ) :
+        if len( trials ) == n_trials :
+            break
+
+        architecture = architectures[len( trials ) % len( architectures )]
+        model_params = {key : values[rng.integers( len( values ) )]
+                        for key, values in SEARCH_SPACE[architecture].items()}
+        training_params = {key : values[rng.integers( len( values ) )]
+                           for key, values in TRAINING_SPACE.items()}
+
+        key = (architecture, json.dumps( model_params, sort_keys=True ),
+               json.dumps( training_params, sort_keys=True ))
+        if key in seen :
+            continue
+        seen.add( key )
+        trials.append( (architecture, model_params, training_params) )
+
+    return trials
+
+
+def _init_worker ( threads: int ) :
+    """Limit TensorFlow and BLAS threads before TensorFlow starts in this worker."""
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str( threads )
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str( threads )
+    os.environ.setdefault( "TF_CPP_MIN_LOG_LEVEL", "2" )
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads( threads )
+    tf.config.threading.set_inter_op_parallelism_threads( 1 )
+
+
+def _measure_latency ( model, X, coin_ids, batch_size: int ) :
+    """Median single-sample and batched inference latency in milliseconds."""
+    single = [X[:1], coin_ids[:1]]
+    batch = [X[:batch_size], coin_ids[:batch_size]]
+
+    timings = {}
+    for name, inputs in (("latency_ms", single), ("batch_latency_ms", batch)) :
+        model( inputs, training=False )  # warm-up / tracing
+        runs = []
+        for _ in range( LATENCY_RUNS ) :
+            start = time.perf_counter()
+            model( inputs, training=False )
+            runs.append( (time.perf_counter() - start) * 1000 )
+        timings[name] = float( np.median( runs ) )
+
+    return timings
+
+
+def run_trial ( trial_id: int, architecture: str, model_params: dict, training_params: dict,
+                cache_dir: str, epochs: int, reports, lock ) :
+    """
+    Train and score one configuration in a worker process.
+
+    Args:
+        trial_id: Trial number
+        architecture: Key of MODEL_BUILDERS
+        model_params: Builder keyword arguments
+        training_params: learning_rate and batch_size
+        cache_dir: Dataset cache written by cache_dataset()
+        epochs: Maximum epochs
+        reports: Shared dict of epoch -> list of validation losses
+        lock: Shared lock guarding reports
+
+    Returns:
+        dict: Trial result row
+    """
+    import tensorflow as tf
+    from build_transformer import MODEL_BUILDERS
+    from checkpointing import ShuffledWindows
+    from train_model import QUANTILES, compile_model, mean_pinball_loss
+
+    class MedianPruning( tf.keras.callbacks.Callback ) :
+        """Stop the trial if its val_loss is above the median of other trials at this epoch."""
+
+        def __init__ ( self ) :
+            super().__init__()
+            self.pruned_at = None
+
+        def on_epoch_end ( self, epoch, logs=None ) :
+            val_loss = float( (logs or {}).get( "val_loss", np.inf ) )
+            with lock :
+                others = list( reports.get( epoch, [] ) )
+                reports[epoch] = others + [val_loss]
+
+            if (epoch + 1 >= PRUNE_WARMUP_EPOCHS and len( others ) >= PRUNE_MIN_TRIALS
+                    and val_loss > float( np.median( others ) )) :
+                self.pruned_at = epoch + 1
+                self.model.stop_training = True
+
+    result = {
+        "trial" : trial_id,
+        "architecture" : architecture,
+        "model_params" : model_params,
+        "training_params" : training_params,
+    }
+
+    try :
+        X, y, coin_ids, num_coins = load_cached_dataset( cache_dir )
+        train_idx, val_idx = split_train_val( coin_ids )
+        X_val, y_val, ids_val = X[val_idx], y[val_idx], coin_ids[val_idx]
+
+        model = MODEL_BUILDERS[architecture]( X.shape[1], num_coins, num_features=X.shape[2], **model_params )
+        compile_model( model, learning_rate=training_params["learning_rate"] )
+        pruning = MedianPruning()
+
+        # Training batches are gathered from the memory map as needed instead of copying X[train_idx]
+        train_data = ShuffledWindows( X, coin_ids, y, training_params["batch_size"], QUANTILES,
+                                      seed=trial_id, indices=train_idx )
+
+        start = time.perf_counter()
+        history = model.fit(
+            train_data,
+            validation_data=([X_val, ids_val], {name : y_val for name in QUANTILES}),
+            epochs=epochs,
+            callbacks=[pruning],
+            verbose=0
+        )
+        train_seconds = time.perf_counter() - start
+
+        result.update( {
+            "status" : "pruned" if pruning.pruned_at else "completed",
+            "epochs_run" : len( history.history["loss"] ),
+            "val_pinball" : mean_pinball_loss( model, X_val, y_val, ids_val ),
+            "train_seconds" : train_seconds,
+            "parameters" : int( model.count_params() ),
+        } )
+        result.update( _measure_latency( model, X_val, ids_val, training_params["batch_size"] ) )
+
+    except Exception as e :
+        result.update( {"status" : "failed", "error" : str( e )} )
+
+    return result
+
+
+def rank_results ( results ) :
+    """Completed trials by validation pinball loss, then pruned, then failed."""
+    order = {"completed" : 0, "pruned" : 1, "failed" : 2}
+    return sorted( results, key=lambda r : (order[r["status"]], r.get( "val_pinball", np.inf )) )
+
+
+def save_results ( ranked, results_dir: str = SEARCH_RESULTS_DIR ) :
+    """
+    Write the ranked results as JSON and CSV.
+
+    Args:
+        ranked: Ranked result rows
+        results_dir: Output directory
+
+    Returns:
+        tuple: (json_path, csv_path)
+    """
+    os.makedirs( results_dir, exist_ok=True )
+    json_path = os.path.join( results_dir, "search_results.json" )
+    csv_path = os.path.join( results_dir, "search_results.csv" )
+
+    with open( json_path, "w" ) as f :
+        json.dump( ranked, f, indent=2 )
+
+    columns = ["rank", "trial", "architecture", "status", "val_pinball", "train_seconds",
+               "latency_ms", "batch_latency_ms", "epochs_run", "parameters", "model_params",
+               "training_params"]
+    with open( csv_path, "w", newline="" ) as f :
+        writer = csv.DictWriter( f, fieldnames=columns, extrasaction="ignore" )
+        writer.writeheader()
+        for rank, row in enumerate( ranked, start=1 ) :
+            writer.writerow( {
+                **row, "rank" : rank,
+                "model_params" : json.dumps( row["model_params"] ),
+                "training_params" : json.dumps( row["training_params"] )
+            } )
+
+    return json_path, csv_path
+
+
+def print_results ( ranked ) :
+    """Print the ranked results table."""
+    print( "\n" + "=" * 96 )
+    print( "🏆 SEARCH RESULTS" )
+    print( "=" * 96 )
+    print( f"{'#':>3}  {'trial':>5}  {'architecture':<12} {'status':<10} {'pinball':>9} "
+           f"{'train s':>8} {'1-sample ms':>11} {'batch ms':>9}  params" )
+
+    for rank, row in enumerate( ranked, start=1 ) :
+        if row["status"] == "failed" :
+            print( f"{rank:>3}  {row['trial']:>5}  {row['architecture']:<12} failed     {row['error']}" )
+            continue
+        print( f"{rank:>3}  {row['trial']:>5}  {row['architecture']:<12} {row['status']:<10} "
+               f"{row['val_pinball']:>9.5f} {row['train_seconds']:>8.1f} {row['latency_ms']:>11.2f} "
+               f"{row['batch_latency_ms']:>9.2f}  {json.dumps( {**row['model_params'], **row['training_params']} )}" )
+
+
+def run_search ( n_trials: int = 12, workers: int = 2, threads_per_trial: int = None,
+                 epochs: int = SEARCH_EPOCHS, architectures=tuple( SEARCH_SPACE ),
+                 seed: int = 42, cache_dir: str = DATASET_CACHE_DIR, rebuild_cache: bool = False ) :
+    """
+    Run a parallel random search with median pruning.
+
+    Args:
+        n_trials: Number of configurations to try
+        workers: Trials trained at the same time
+        threads_per_trial: CPU threads per trial (default: CPUs / workers)
+        epochs: Maximum epochs per trial
+        architectures: Architectures to include
+        seed: Random seed for sampling configurations
+        cache_dir: Dataset cache directory
+        rebuild_cache: Rebuild the dataset cache even if it exists
+
+    Returns:
+        list: Ranked result rows
+    """
+    threads_per_trial = threads_per_trial or max( 1, (os.cpu_count() or 1) // workers )
+
+    if rebuild_cache or not os.path.exists( os.path.join( cache_dir, "meta.json" ) ) :
+        cache_dataset( cache_dir )
+
+    trials = sample_trials( n_trials, list( architectures ), seed )
+    print( f"🔍 Running {len( trials )} trials on {workers} workers x {threads_per_trial} threads" )
+
+    # Spawn so TensorFlow is never forked after initialising its thread pools
+    context = multiprocessing.get_context( "spawn" )
+    results = []
+
+    with context.Manager() as manager :
+        reports = manager.dict()
+        lock = manager.Lock()
+
+        with ProcessPoolExecutor( max_workers=workers, mp_context=context,
+                                  initializer=_init_worker, initargs=(threads_per_trial,) ) as executor :
+            futures = [
+                executor.submit( run_trial, trial_id, architecture, model_params, training_params,
+                                 cache_dir, epochs, reports, lock )
+                for trial_id, (architecture, model_params, training_params) in enumerate( trials )
+            ]
+
+            for future in as_completed( futures ) :
+                row = future.result()
+                results.append( row )
+                summary = (f"pinball {row['val_pinball']:.5f}, {row['epochs_run']} epochs"
+                           if row["status"] != "failed" else row["error"])
+                print( f"   • Trial {row['trial']} ({row['architecture']}) {row['status']}: {summary}" )
+
+    ranked = rank_results( results )
+    json_path, csv_path = save_results( ranked )
+    print_results( ranked )
+    print( f"\n💾 Results saved to {json_path} and {csv_path}" )
+
+    return ranked
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser( description="Parallel hyperparameter search" )
+    parser.add_argument( "--trials", type=int, default=12 )
+    parser.add_argument( "--workers", type=int, default=2 )
+    parser.add_argument( "--threads-per-trial", type=int, default=None )
+    parser.add_argument( "--epochs", type=int, default=SEARCH_EPOCHS )
+    parser.add_argument( "--architectures", default=",".join( SEARCH_SPACE ),
+                         help="Comma-separated subset of: " + ", ".join( SEARCH_SPACE ) )
+    parser.add_argument( "--seed", type=int, default=42 )
+    parser.add_argument( "--rebuild-cache", action="store_true" )
+    args = parser.parse_args()
+
+    print( "=" * 60 )
+    print( "🔬 HYPERPARAMETER SEARCH" )
+    print( "=" * 60 )
+
+    run_search(
+        n_trials=args.trials,
+        workers=args.workers,
+        threads_per_trial=args.threads_per_trial,
+        epochs=args.epochs,
+        architectures=args.architectures.split( "," ),
+        seed=args.seed,
+        rebuild_cache=args.rebuild_cache
+    )
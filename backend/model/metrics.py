@@ -1,6 +1,9 @@
 import numpy as np
 from typing import Union
 
+QUANTILE_LEVELS = (0.1, 0.5, 0.9)
+EVAL_CHUNK_SIZE = 1_000_000  # Rows per chunk in evaluate_grouped()
+
 
 def rmse ( y_true: np.ndarray, y_pred: np.ndarray ) -> float :
     """
@@ -93,6 +96,31 @@ def r2_score ( y_true: np.ndarray, y_pred: np.ndarray ) -> float :
     return float( 1 - (ss_res / ss_tot) )
 
 
+def pinball_loss ( y_true: np.ndarray, y_pred: np.ndarray, q: float ) -> float :
+    """
+    Calculate pinball (quantile) loss.
+
+    Args:
+        y_true: True values
+        y_pred: Predicted values for quantile q
+        q: Quantile level (e.g., 0.1, 0.5, 0.9)
+
+    Returns:
+        float: Mean pinball loss
+    """
+    y_true = np.asarray( y_true )
+    y_pred = np.asarray( y_pred )
+
+    if len( y_true ) != len( y_pred ) :
+        raise ValueError( "Input arrays must have the same length" )
+
+    if not 0 < q < 1 :
+        raise ValueError( "Quantile must be between 0 and 1" )
+
+    error = y_true - y_pred
+    return float( np.mean( np.maximum( q * error, (q - 1) * error ) ) )
+
+
 def evaluate_predictions ( y_true: np.ndarray, y_pred: np.ndarray ) -> dict :
     """
     Calculate all evaluation metrics.
@@ -109,4 +137,140 @@ def evaluate_predictions ( y_true: np.ndarray, y_pred: np.ndarray ) -> dict :
         "mae" : mae( y_true, y_pred ),
         "mape" : mape( y_true, y_pred ),
         "r2" : r2_score( y_true, y_pred )
-    }
\ No newline at end of file
+    }
+
+
+def quantile_name ( q: float ) -> str :
+    """Output/head name for a quantile level, e.g. 0.1 -> 'q10'."""
+    return f"q{int( round( q * 100 ) )}"
+
+
+class GroupedMetrics :
+    """
+    Streaming per-group accumulator for quantile forecast metrics.
+
+    Every update() reduces a chunk of rows into per-group sums with
+    np.bincount, so memory stays bounded by the chunk size and the number of
+    groups no matter how many rows are evaluated. RMSE, MAE, MAPE, R² and
+    pinball loss per quantile, plus interval coverage, are derived from the
+    sums in results(). Accumulators can be combined with merge().
+    """
+
+    def __init__ ( self, num_groups: int, quantiles=QUANTILE_LEVELS, interval=(0.1, 0.9) ) :
+        self.num_groups = int( num_groups )
+        self.quantiles = np.asarray( quantiles, dtype=np.float64 )
+        self.interval = (list( quantiles ).index( interval[0] ), list( quantiles ).index( interval[1] ))
+
+        shape = (len( self.quantiles ), self.num_groups)
+        self.count = np.zeros( self.num_groups )
+        self.nonzero = np.zeros( self.num_groups )
+        self.sum_y = np.zeros( self.num_groups )
+        self.sum_y2 = np.zeros( self.num_groups )
+        self.covered = np.zeros( self.num_groups )
+        self.sq_err = np.zeros( shape )
+        self.abs_err = np.zeros( shape )
+        self.abs_pct_err = np.zeros( shape )
+        self.pinball = np.zeros( shape )
+
+    def update ( self, y_true: np.ndarray, y_pred: np.ndarray, groups: np.ndarray ) :
+        """
+        Add a chunk of rows.
+
+        Args:
+            y_true: True values (rows,)
+            y_pred: Predictions (rows, num_quantiles), one column per quantile
+            groups: Group index per row in [0, num_groups)
+        """
+        y = np.asarray( y_true, dtype=np.float64 ).ravel()
+        pred = np.asarray( y_pred, dtype=np.float64 ).reshape( len( y ), len( self.quantiles ) )
+        groups = np.asarray( groups ).ravel()
+
+        def group_sum ( values ) :
+            return np.bincount( groups, weights=values, minlength=self.num_groups )
+
+        error = y[:, np.newaxis] - pred
+        nonzero = y != 0
+        inverse_abs_y = np.divide( 1.0, np.abs( y ), out=np.zeros_like( y ), where=nonzero )
+        lower, upper = pred[:, self.interval[0]], pred[:, self.interval[1]]
+
+        self.count += np.bincount( groups, minlength=self.num_groups )
+        self.nonzero += group_sum( nonzero.astype( np.float64 ) )
+        self.sum_y += group_sum( y )
+        self.sum_y2 += group_sum( y * y )
+        self.covered += group_sum( ((y >= lower) & (y <= upper)).astype( np.float64 ) )
+
+        pinball = np.maximum( self.quantiles * error, (self.quantiles - 1) * error )
+        for j in range( len( self.quantiles ) ) :
+            self.sq_err[j] += group_sum( error[:, j] ** 2 )
+            self.abs_err[j] += group_sum( np.abs( error[:, j] ) )
+            self.abs_pct_err[j] += group_sum( np.abs( error[:, j] ) * inverse_abs_y )
+            self.pinball[j] += group_sum( pinball[:, j] )
+
+    def merge ( self, other: "GroupedMetrics" ) :
+        """Add the sums of another accumulator with the same groups and quantiles."""
+        for name in ("count", "nonzero", "sum_y", "sum_y2", "covered",
+                     "sq_err", "abs_err", "abs_pct_err", "pinball") :
+            setattr( self, name, getattr( self, name ) + getattr( other, name ) )
+
+    def results ( self, labels=None ) -> dict :
+        """
+        Metrics for every non-empty group.
+
+        Args:
+            labels: Optional sequence mapping group index -> label
+
+        Returns:
+            dict: label -> {"count", "coverage", "<quantile name>": {rmse, mae, mape, r2, pinball}}
+        """
+        lo, hi = self.interval
+        coverage_name = f"coverage_{quantile_name( self.quantiles[lo] )}_{quantile_name( self.quantiles[hi] )}"
+        ss_tot = self.sum_y2 - self.sum_y ** 2 / np.maximum( self.count, 1 )
+
+        output = {}
+        for g in np.flatnonzero( self.count ) :
+            n = self.count[g]
+            group = {"count" : int( n ), coverage_name : float( self.covered[g] / n )}
+
+            for j, q in enumerate( self.quantiles ) :
+                group[quantile_name( q )] = {
+                    "rmse" : float( np.sqrt( self.sq_err[j, g] / n ) ),
+                    "mae" : float( self.abs_err[j, g] / n ),
+                    "mape" : float( self.abs_pct_err[j, g] / self.nonzero[g] * 100 ) if self.nonzero[g] else None,
+                    "r2" : float( 1 - self.sq_err[j, g] / ss_tot[g] ) if ss_tot[g] > 0 else 0.0,
+                    "pinball" : float( self.pinball[j, g] / n ),
+                }
+
+            output[labels[g] if labels is not None else int( g )] = group
+
+        return output
+
+
+def evaluate_grouped ( y_true: np.ndarray, y_pred: np.ndarray, groupings: dict,
+                       quantiles=QUANTILE_LEVELS, chunk_size: int = EVAL_CHUNK_SIZE ) -> dict :
+    """
+    Compute all metrics for several groupings in one chunked pass over the rows.
+
+    Args:
+        y_true: True values (rows,)
+        y_pred: Predictions (rows, num_quantiles)
+        groupings: name -> (group_ids, labels); group_ids has one entry per row
+            and labels maps group index -> label (None for an overall group)
+        quantiles: Quantile level of each prediction column
+        chunk_size: Rows reduced per step
+
+    Returns:
+        dict: name -> GroupedMetrics.results()
+    """
+    accumulators = {}
+    for name, (group_ids, labels) in groupings.items() :
+        num_groups = len( labels ) if labels is not None else int( np.max( group_ids ) ) + 1
+        accumulators[name] = GroupedMetrics( num_groups, quantiles )
+
+    for start in range( 0, len( y_true ), chunk_size ) :
+        end = start + chunk_size
+        y_chunk = np.asarray( y_true[start :end] )
+        pred_chunk = np.asarray( y_pred[start :end] )
+        for name, (group_ids, _) in groupings.items() :
+            accumulators[name].update( y_chunk, pred_chunk, np.asarray( group_ids[start :end] ) )
+
+    return {name : accumulators[name].results( groupings[name][1] ) for name in groupings}
@@ -0,0 +1,225 @@
+"""
+Versioned registry of serving artifacts.
+
+Every training run that changes the served model publishes an immutable
+bundle - model, coin scalers and encoder from the same run - into its own
+version directory, together with a manifest of SHA-256 checksums. A CURRENT
+pointer file names the version the API should serve; it is only ever swapped
+with os.replace(), so readers see either the old or the new version.
+
+The API (services/model_registry.py) watches CURRENT and hot-swaps bundles.
+Each publish keeps the newest KEEP_VERSIONS versions (and CURRENT, whatever
+its age) and deletes older ones, since every run stores a full model copy.
+
+Usage:
+    python registry.py list
+    python registry.py promote <version>    # roll back / forward
+    python registry.py prune --keep 5
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+
+REGISTRY_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/registry"
+VERSIONS_DIR = "versions"
+CURRENT_POINTER = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_VERSIONS = 10  # Versions kept for rollback; older ones are deleted on publish
+
+
+def file_sha256 ( path: str ) -> str :
+    """SHA-256 of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open( path, "rb" ) as f :
+        for chunk in iter( lambda : f.read( 1 << 20 ), b"" ) :
+            digest.update( chunk )
+    return digest.hexdigest()
+
+
+def version_dir ( version: str, registry_dir: str = REGISTRY_DIR ) -> str :
+    """Directory holding one version's artifacts."""
+    return os.path.join( registry_dir, VERSIONS_DIR, version )
+
+
+def publish_version ( files: dict, metadata: dict = None, registry_dir: str = REGISTRY_DIR,
+                      make_current: bool = True, keep: int = KEEP_VERSIONS ) -> str :
+    """
+    Copy a set of artifacts into a new immutable version.
+
+    Args:
+        files: Bundle file name -> source path, e.g. {"model.keras": MODEL_PATH}
+        metadata: Extra information stored in the manifest (mode, metrics, ...)
+        registry_dir: Registry root
+        make_current: Point CURRENT at the new version once it is complete
+        keep: Versions to keep afterwards (see prune_versions); None keeps all
+
+    Returns:
+        str: The new version identifier
+
+    Raises:
+        FileNotFoundError: If a source artifact is missing
+    """
+    for name, path in files.items() :
+        if not os.path.exists( path ) :
+            raise FileNotFoundError( f"Cannot publish '{name}': {path} does not exist" )
+
+    version = time.strftime( "%Y%m%d-%H%M%S" ) + "-" + uuid.uuid4().hex[:6]
+    final_dir = version_dir( version, registry_dir )
+    tmp_dir = final_dir + ".tmp"
+    os.makedirs( tmp_dir )
+
+    checksums = {}
+    for name, path in files.items() :
+        target = os.path.join( tmp_dir, name )
+        shutil.copy2( path, target )
+        checksums[name] = file_sha256( target )
+
+    manifest = {
+        "version" : version,
+        "created_at" : time.time(),
+        "files" : checksums,
+        "metadata" : metadata or {},
+    }
+    with open( os.path.join( tmp_dir, MANIFEST_FILE ), "w" ) as f :
+        json.dump( manifest, f, indent=2 )
+
+    # Bundles are never modified after publication
+    for name in list( files ) + [MANIFEST_FILE] :
+        os.chmod( os.path.join( tmp_dir, name ), 0o444 )
+
+    os.replace( tmp_dir, final_dir )
+    print( f"📦 Published model version {version} ({', '.join( files )})" )
+
+    if make_current :
+        set_current( version, registry_dir )
+
+    if keep is not None :
+        prune_versions( keep, registry_dir )
+
+    return version
+
+
+def set_current ( version: str, registry_dir: str = REGISTRY_DIR ) :
+    """
+    Atomically point CURRENT at an existing version.
+
+    Raises:
+        ValueError: If the version does not exist
+    """
+    if not os.path.exists( os.path.join( version_dir( version, registry_dir ), MANIFEST_FILE ) ) :
+        raise ValueError( f"Unknown model version '{version}'" )
+
+    tmp_path = os.path.join( registry_dir, CURRENT_POINTER + ".tmp" )
+    with open( tmp_path, "w" ) as f :
+        f.write( version )
+    os.replace( tmp_path, os.path.join( registry_dir, CURRENT_POINTER ) )
+    print( f"🔀 CURRENT model version -> {version}" )
+
+
+def get_current_version ( registry_dir: str = REGISTRY_DIR ) :
+    """Version named by CURRENT, or None if nothing has been published."""
+    pointer = os.path.join( registry_dir, CURRENT_POINTER )
+    if not os.path.exists( pointer ) :
+        return None
+    with open( pointer ) as f :
+        return f.read().strip() or None
+
+
+def load_manifest ( version: str, registry_dir: str = REGISTRY_DIR ) -> dict :
+    """Manifest of one version."""
+    with open( os.path.join( version_dir( version, registry_dir ), MANIFEST_FILE ) ) as f :
+        return json.load( f )
+
+
+def list_versions ( registry_dir: str = REGISTRY_DIR ) :
+    """Manifests of all complete versions, oldest first."""
+    root = os.path.join( registry_dir, VERSIONS_DIR )
+    if not os.path.isdir( root ) :
+        return []
+
+    manifests = [load_manifest( name, registry_dir ) for name in os.listdir( root )
+                 if not name.endswith( ".tmp" ) and os.path.exists( os.path.join( root, name, MANIFEST_FILE ) )]
+    return sorted( manifests, key=lambda manifest : manifest["created_at"] )
+
+
+def _make_writable ( function, path, _ ) :
+    # Published files are read-only, which blocks deleting them on Windows
+    os.chmod( path, 0o644 )
+    function( path )
+
+
+def prune_versions ( keep: int = KEEP_VERSIONS, registry_dir: str = REGISTRY_DIR ) -> list :
+    """
+    Delete all but the newest `keep` versions; CURRENT is never deleted.
+
+    Args:
+        keep: Number of newest versions to keep (at least 1)
+        registry_dir: Registry root
+
+    Returns:
+        list: Deleted version identifiers
+    """
+    current = get_current_version( registry_dir )
+    versions = [manifest["version"] for manifest in list_versions( registry_dir )]
+    stale = [version for version in versions[: -max( 1, keep )] if version != current]
+
+    for version in stale :
+        shutil.rmtree( version_dir( version, registry_dir ), onerror=_make_writable )
+    if stale :
+        print( f"🧹 Removed {len( stale )} old model version(s), keeping {max( 1, keep )}" )
+    return stale
+
+
+def bundle_with ( extra_files: dict, metadata: dict = None, registry_dir: str = REGISTRY_DIR ) -> str :
+    """
+    Publish a new version that is CURRENT plus some added/replaced files.
+
+    Used when an artifact derived from the current model (e.g. a distilled
+    student) is produced after the fact.
+
+    Args:
+        extra_files: Bundle file name -> source path to add or replace
+        metadata: Extra manifest information
+
+    Returns:
+        str: The new version identifier
+
+    Raises:
+        ValueError: If nothing has been published yet
+    """
+    current = get_current_version( registry_dir )
+    if current is None :
+        raise ValueError( "No current model version to extend" )
+
+    source_dir = version_dir( current, registry_dir )
+    files = {name : os.path.join( source_dir, name ) for name in load_manifest( current, registry_dir )["files"]}
+    files.update( extra_files )
+
+    return publish_version( files, dict( metadata or {}, parent_version=current ), registry_dir )
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser( description="Inspect and promote model versions" )
+    subparsers = parser.add_subparsers( dest="command", required=True )
+    subparsers.add_parser( "list", help="List published versions" )
+    promote = subparsers.add_parser( "promote", help="Point CURRENT at a version" )
+    promote.add_argument( "version" )
+    prune = subparsers.add_parser( "prune", help="Delete old versions (never CURRENT)" )
+    prune.add_argument( "--keep", type=int, default=KEEP_VERSIONS )
+    args = parser.parse_args()
+
+    if args.command == "list" :
+        current = get_current_version()
+        for manifest in list_versions() :
+            marker = "➡️" if manifest["version"] == current else "  "
+            mode = manifest["metadata"].get( "mode", "" )
+            print( f"{marker} {manifest['version']}  {mode:<12} {', '.join( manifest['files'] )}" )
+    elif args.command == "prune" :
+        prune_versions( args.keep )
+    else :
+        set_current( args.version )
@@ -0,0 +1,340 @@
+"""
+Streaming robust scaler backed by a mergeable quantile sketch.
+
+RobustScaler is fitted once and frozen, so an asset breaking to new highs
+(the gold/silver problem run_complete_fix.py works around) is scaled far
+outside the range the model was trained on until the next full refit.
+StreamingRobustScaler keeps the same (x - median) / IQR transform, but the
+median and IQR come from a DDSketch-style log-bucketed quantile sketch that
+absorbs each new price in O(1) and can be refreshed from appended rows
+without retraining.
+
+The sketch has a relative accuracy guarantee (every quantile is within
+RELATIVE_ACCURACY of a true one), two sketches with the same accuracy can be
+merged bucket by bucket, and observations are exponentially decayed with a
+half-life in rows, so recent prices dominate the statistics. Decay uses
+forward weighting: each new observation gets a weight growth times larger
+than the previous one, and the buckets are only renormalised when the
+weight gets large, which keeps updates O(1) amortised.
+
+Scalers are stored as plain arrays in one .npz file rather than pickled
+objects, so the API can load them as model.streaming_scaler without the
+training code on its import path.
+"""
+
+import os
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.005
+DEFAULT_HALF_LIFE = 365  # Rows after which an observation counts half
+QUANTILE_RANGE = (25.0, 75.0)
+_RENORMALIZE_WEIGHT = 1e100
+
+
+class _BucketStore :
+    """Dense bucket counts for consecutive integer keys, grown on demand."""
+
+    __slots__ = ("offset", "counts")
+
+    def __init__ ( self, offset: int = 0, counts: np.ndarray = None ) :
+        self.offset = offset
+        self.counts = counts if counts is not None else np.zeros( 0, dtype=np.float64 )
+
+    def add ( self, key: int, weight: float ) :
+        if len( self.counts ) == 0 :
+            self.offset = key
+            self.counts = np.zeros( 8, dtype=np.float64 )
+        elif key < self.offset :
+            grow = max( self.offset - key, len( self.counts ) // 2 )
+            self.counts = np.concatenate( [np.zeros( grow ), self.counts] )
+            self.offset -= grow
+        elif key >= self.offset + len( self.counts ) :
+            grow = max( key - self.offset - len( self.counts ) + 1, len( self.counts ) // 2 )
+            self.counts = np.concatenate( [self.counts, np.zeros( grow )] )
+        self.counts[key - self.offset] += weight
+
+    def add_many ( self, keys: np.ndarray, weights: np.ndarray ) :
+        if len( keys ) == 0 :
+            return
+        # Make room for the whole batch once, then scatter-add
+        self.add( int( keys.min() ), 0.0 )
+        self.add( int( keys.max() ), 0.0 )
+        np.add.at( self.counts, keys - self.offset, weights )
+
+    def merged ( self, other, self_factor: float, other_factor: float ) :
+        """New store with self_factor * self + other_factor * other."""
+        if len( self.counts ) == 0 :
+            return _BucketStore( other.offset, other.counts * other_factor )
+        if len( other.counts ) == 0 :
+            return _BucketStore( self.offset, self.counts * self_factor )
+        low = min( self.offset, other.offset )
+        high = max( self.offset + len( self.counts ), other.offset + len( other.counts ) )
+        counts = np.zeros( high - low )
+        counts[self.offset - low :self.offset - low + len( self.counts )] += self.counts * self_factor
+        counts[other.offset - low :other.offset - low + len( other.counts )] += other.counts * other_factor
+        return _BucketStore( low, counts )
+
+
+class QuantileSketch :
+    """
+    Decayed, mergeable quantile sketch with relative accuracy (DDSketch layout).
+
+    Positive values go to bucket ceil(log_gamma(x)), negative values to a
+    mirrored store, and zeros are counted separately.
+    """
+
+    def __init__ ( self, relative_accuracy: float = RELATIVE_ACCURACY, half_life: float = DEFAULT_HALF_LIFE ) :
+        self.relative_accuracy = relative_accuracy
+        self.half_life = half_life
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log( self.gamma )
+        self.growth = 2.0 ** (1.0 / half_life) if half_life else 1.0
+        self.positive = _BucketStore()
+        self.negative = _BucketStore()
+        self.zero_count = 0.0
+        self.weight = 1.0  # Weight of the next observation
+        self.total = 0.0
+
+    def _key ( self, magnitude ) :
+        return np.ceil( np.log( magnitude ) / self.log_gamma ).astype( np.int64 )
+
+    def _renormalize ( self ) :
+        factor = 1.0 / self.weight
+        self.positive.counts *= factor
+        self.negative.counts *= factor
+        self.zero_count *= factor
+        self.total *= factor
+        self.weight = 1.0
+
+    def add ( self, value: float ) :
+        """Absorb one observation in O(1) (amortised)."""
+        if value > 0 :
+            self.positive.add( int( self._key( value ) ), self.weight )
+        elif value < 0 :
+            self.negative.add( int( self._key( -value ) ), self.weight )
+        else :
+            self.zero_count += self.weight
+        self.total += self.weight
+        self.weight *= self.growth
+        if self.weight > _RENORMALIZE_WEIGHT :
+            self._renormalize()
+
+    def add_many ( self, values ) :
+        """Absorb observations in order; same result as add() per value, vectorised."""
+        values = np.asarray( values, dtype=np.float64 ).ravel()
+        values = values[np.isfinite( values )]
+        # Renormalise in chunks so the geometric weights stay finite
+        chunk = max( 1, int( np.log( _RENORMALIZE_WEIGHT ) / max( np.log( self.growth ), 1e-300 ) ) // 2 )
+        for start in range( 0, len( values ), chunk ) :
+            part = values[start :start + chunk]
+            weights = self.weight * self.growth ** np.arange( len( part ) )
+            positive, negative = part > 0, part < 0
+            self.positive.add_many( self._key( part[positive] ), weights[positive] )
+            self.negative.add_many( self._key( -part[negative] ), weights[negative] )
+            self.zero_count += float( weights[part == 0].sum() )
+            self.total += float( weights.sum() )
+            self.weight *= self.growth ** len( part )
+            if self.weight > _RENORMALIZE_WEIGHT :
+                self._renormalize()
+
+    def quantile ( self, q: float ) -> float :
+        """
+        Value at quantile q (0-1) of the decayed distribution.
+
+        Raises:
+            ValueError: If the sketch is empty
+        """
+        if self.total <= 0 :
+            raise ValueError( "Quantile of an empty sketch" )
+
+        rank = q * self.total
+        # Most negative first: the negative store is walked from its largest key down
+        cumulative = np.cumsum( self.negative.counts[::-1] )
+        if len( cumulative ) and rank < cumulative[-1] :
+            index = int( np.searchsorted( cumulative, rank, side="right" ) )
+            key = self.negative.offset + len( self.negative.counts ) - 1 - index
+            return -2 * self.gamma ** key / (self.gamma + 1)
+        rank -= cumulative[-1] if len( cumulative ) else 0.0
+
+        if rank < self.zero_count :
+            return 0.0
+        rank -= self.zero_count
+
+        cumulative = np.cumsum( self.positive.counts )
+        index = min( int( np.searchsorted( cumulative, rank, side="right" ) ), len( cumulative ) - 1 )
+        key = self.positive.offset + index
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def merge ( self, other ) :
+        """
+        Fold another sketch with the same accuracy into this one.
+
+        Both sketches are expressed in decayed units as of now before their
+        buckets are added, so the result is the same as having streamed both.
+        """
+        if not np.isclose( self.gamma, other.gamma ) :
+            raise ValueError( "Sketches with different relative accuracy cannot be merged" )
+
+        self_factor, other_factor = 1.0 / self.weight, 1.0 / other.weight
+        self.positive = self.positive.merged( other.positive, self_factor, other_factor )
+        self.negative = self.negative.merged( other.negative, self_factor, other_factor )
+        self.zero_count = self.zero_count * self_factor + other.zero_count * other_factor
+        self.total = self.total * self_factor + other.total * other_factor
+        self.weight = 1.0
+        return self
+
+
+class StreamingRobustScaler :
+    """
+    Drop-in replacement for sklearn's RobustScaler on single-column data.
+
+    fit/transform/inverse_transform behave like RobustScaler with the default
+    quantile range; update()/partial_fit() keep absorbing new observations,
+    and center_/scale_ follow the sketch the next time they are used.
+
+    rows_seen and last_value record how much of the asset's price file has
+    been absorbed, so refresh() only feeds rows appended since then.
+    """
+
+    def __init__ ( self, relative_accuracy: float = RELATIVE_ACCURACY, half_life: float = DEFAULT_HALF_LIFE,
+                   quantile_range=QUANTILE_RANGE ) :
+        self.quantile_range = quantile_range
+        self.sketch = QuantileSketch( relative_accuracy, half_life )
+        self.rows_seen = 0
+        self.last_value = np.nan
+        self._stale = True
+        self._center = 0.0
+        self._scale = 1.0
+
+    def _refresh_statistics ( self ) :
+        low, high = self.quantile_range
+        self._center = self.sketch.quantile( 0.5 )
+        scale = self.sketch.quantile( high / 100 ) - self.sketch.quantile( low / 100 )
+        # Same handling of a constant series as RobustScaler
+        self._scale = scale if scale > 10 * np.finfo( np.float64 ).eps else 1.0
+        self._stale = False
+
+    @property
+    def center_ ( self ) -> np.ndarray :
+        if self._stale :
+            self._refresh_statistics()
+        return np.array( [self._center] )
+
+    @property
+    def scale_ ( self ) -> np.ndarray :
+        if self._stale :
+            self._refresh_statistics()
+        return np.array( [self._scale] )
+
+    def partial_fit ( self, X ) :
+        """Absorb observations in time order."""
+        values = np.asarray( X, dtype=np.float64 ).ravel()
+        if len( values ) :
+            self.sketch.add_many( values )
+            self.rows_seen += len( values )
+            self.last_value = float( values[-1] )
+            self._stale = True
+        return self
+
+    def update ( self, value: float ) :
+        """Absorb a single observation in O(1)."""
+        self.sketch.add( float( value ) )
+        self.rows_seen += 1
+        self.last_value = float( value )
+        self._stale = True
+        return self
+
+    def fit ( self, X ) :
+        self.sketch = QuantileSketch( self.sketch.relative_accuracy, self.sketch.half_life )
+        self.rows_seen = 0
+        return self.partial_fit( X )
+
+    def transform ( self, X ) :
+        return (np.asarray( X, dtype=np.float64 ) - self.center_) / self.scale_
+
+    def inverse_transform ( self, X ) :
+        return np.asarray( X, dtype=np.float64 ) * self.scale_ + self.center_
+
+    def fit_transform ( self, X ) :
+        return self.fit( X ).transform( X )
+
+    def refresh ( self, prices ) -> int :
+        """
+        Absorb the rows of an asset's full price history not seen yet.
+
+        Args:
+            prices: The asset's complete Close series, oldest first
+
+        Returns:
+            int: Rows absorbed; 0 if nothing is new or the history no longer
+                lines up with what was absorbed (e.g. a rewritten file)
+        """
+        prices = np.asarray( prices, dtype=np.float64 ).ravel()
+        if len( prices ) <= self.rows_seen or self.rows_seen == 0 :
+            return 0
+        if not np.isclose( prices[self.rows_seen - 1], self.last_value ) :
+            return 0
+        new = prices[self.rows_seen :]
+        self.partial_fit( new )
+        return len( new )
+
+
+def save_scalers ( scalers: dict, path: str ) :
+    """
+    Write per-asset streaming scalers to one .npz of flat arrays.
+
+    Bucket counts of all assets are concatenated; per-asset offsets and
+    lengths locate each asset's slice. Written atomically.
+    """
+    assets = sorted( scalers )
+    params, positive, negative = [], [], []
+    for asset in assets :
+        scaler = scalers[asset]
+        sketch = scaler.sketch
+        params.append( [sketch.relative_accuracy, sketch.half_life, sketch.zero_count, sketch.weight, sketch.total,
+                        scaler.quantile_range[0], scaler.quantile_range[1], scaler.rows_seen, scaler.last_value,
+                        sketch.positive.offset, len( sketch.positive.counts ),
+                        sketch.negative.offset, len( sketch.negative.counts )] )
+        positive.append( sketch.positive.counts )
+        negative.append( sketch.negative.counts )
+
+    os.makedirs( os.path.dirname( path ) or ".", exist_ok=True )
+    tmp_path = path[:-len( ".npz" )] + ".tmp.npz" if path.endswith( ".npz" ) else path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        assets=np.array( assets, dtype=str ),
+        params=np.array( params, dtype=np.float64 ).reshape( len( assets ), 13 ),
+        positive=np.concatenate( positive ) if positive else np.zeros( 0 ),
+        negative=np.concatenate( negative ) if negative else np.zeros( 0 ),
+    )
+    os.replace( tmp_path, path )
+
+
+def load_scalers ( path: str ) -> dict :
+    """Read scalers written by save_scalers()."""
+    with np.load( path ) as data :
+        assets, params = data["assets"], data["params"]
+        positive, negative = data["positive"], data["negative"]
+
+    scalers = {}
+    positive_start = negative_start = 0
+    for asset, row in zip( assets, params ) :
+        (accuracy, half_life, zero_count, weight, total, low, high, rows_seen, last_value,
+         positive_offset, positive_length, negative_offset, negative_length) = row
+
+        scaler = StreamingRobustScaler( accuracy, half_life, (low, high) )
+        sketch = scaler.sketch
+        sketch.zero_count, sketch.weight, sketch.total = zero_count, weight, total
+        positive_length, negative_length = int( positive_length ), int( negative_length )
+        sketch.positive = _BucketStore( int( positive_offset ),
+                                        positive[positive_start :positive_start + positive_length].copy() )
+        sketch.negative = _BucketStore( int( negative_offset ),
+                                        negative[negative_start :negative_start + negative_length].copy() )
+        positive_start += positive_length
+        negative_start += negative_length
+
+        scaler.rows_seen, scaler.last_value = int( rows_seen ), float( last_value )
+        scalers[str( asset )] = scaler
+
+    return scalers
@@ -2,17 +2,63 @@ import tensorflow as tf
 import numpy as np
 import os
 import json
+from contextlib import contextmanager
+
+try :
+    import fcntl
+except ImportError :  # Windows
+    fcntl = None
+    import msvcrt
 
 # Import from local modules
-from dataset import load_dataset
-from build_transformer import build_transformer
-from metrics import rmse, mae, mape, r2_score, evaluate_predictions
+from dataset import (load_dataset, load_coin_dataset, load_training_artifacts, load_feature_config,
+                     scaler_config, refresh_streaming_scalers, lookback_days, split_train_val, windows_from_end,
+                     ENCODER_PATH, FEATURES_PATH)
+from assets import asset_class_groups
+from features import DEFAULT_FEATURES, parse_features
+from build_transformer import build_transformer, default_patch_sizes, MODEL_BUILDERS
+from metrics import pinball_loss, evaluate_grouped
+from checkpointing import ShuffledWindows, TrainingSnapshot
+from registry import publish_version
 
 SEQ_LEN = 30
 EPOCHS = 20
 BATCH_SIZE = 256
+EVAL_BATCH_SIZE = 4096
 MODEL_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_transformer.keras"
 METRICS_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/training_metrics.json"
+BEST_MODEL_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_transformer.best.keras"
+SNAPSHOT_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/snapshots"
+VALIDATION_SPLIT = 0.1  # Newest share of each asset's windows held out for validation
+SHUFFLE_SEED = 42
+SNAPSHOT_EVERY_EPOCHS = 1
+
+QUANTILES = {"q10" : 0.1, "q50" : 0.5, "q90" : 0.9}
+
+# Incremental (warm-start) training configuration
+INCREMENTAL_RECENT_WINDOWS = 30  # Newest windows per asset to fine-tune on
+INCREMENTAL_VAL_WINDOWS = 5  # Windows per asset before the gate windows, held out for early stopping
+INCREMENTAL_GATE_WINDOWS = 5  # Newest windows per asset held out for the accept/reject decision
+INCREMENTAL_REPLAY_RATIO = 1.0  # Older windows replayed per recent window
+INCREMENTAL_EPOCHS = 3
+INCREMENTAL_LEARNING_RATE = 1e-4
+
+# Per-asset fine-tuning configuration
+COIN_FINETUNE_EPOCHS = 10
+COIN_FINETUNE_LEARNING_RATE = 1e-3
+COIN_EMBEDDING_LAYER = "coin_embedding"
+
+# Ensemble members trained next to the transformer, and where they are saved
+ENSEMBLE_MEMBER_PATHS = {
+    "lstm" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_lstm.keras",
+    "cnn_lstm" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_cnn_lstm.keras",
+}
+ENSEMBLE_WEIGHTS_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/ensemble_weights.json"
+ENSEMBLE_MIN_ASSET_WINDOWS = 5  # Fewer validation windows than this -> global weights
+
+# Line prefixes parsed by services/training_jobs.py
+PROGRESS_PREFIX = "[progress]"
+METRICS_PREFIX = "[metrics]"
 
 
 def quantile_loss ( q ) :
@@ -33,53 +79,278 @@ def quantile_loss ( q ) :
     return loss
 
 
-def evaluate_model ( model, X, y, coin_ids ) :
+class ProgressReporter( tf.keras.callbacks.Callback ) :
+    """Print one machine-readable progress line per epoch for the job manager."""
+
+    def on_epoch_end ( self, epoch, logs=None ) :
+        progress = {"epoch" : epoch + 1, "epochs" : self.params.get( "epochs" )}
+        progress.update( {key : float( value ) for key, value in (logs or {}).items()} )
+        print( f"{PROGRESS_PREFIX} {json.dumps( progress )}", flush=True )
+
+
+def report_metrics ( metrics: dict ) :
+    """Print the final metrics of a run as one machine-readable line."""
+    print( f"{METRICS_PREFIX} {json.dumps( metrics )}", flush=True )
+
+
+def compile_model ( model, learning_rate: float = 0.001 ) :
+    """
+    Compile a quantile model with one pinball loss per output head.
+
+    Args:
+        model: Model with q10/q50/q90 outputs
+        learning_rate: Adam learning rate
+
+    Returns:
+        The compiled model
+    """
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam( learning_rate=learning_rate ),
+        loss={name : quantile_loss( q ) for name, q in QUANTILES.items()},
+        metrics={name : "mae" for name in QUANTILES}
+    )
+    return model
+
+
+def load_trained_model ( path: str = MODEL_PATH ) :
+    """
+    Load a saved quantile model without its compiled state.
+
+    Args:
+        path: Path to the .keras file
+
+    Returns:
+        tf.keras.Model: The loaded model (call compile_model() before fitting)
+    """
+    custom_objects = {
+        'quantile_loss' : quantile_loss,
+        'loss' : quantile_loss( 0.5 )
+    }
+    return tf.keras.models.load_model( path, custom_objects=custom_objects, compile=False )
+
+
+def model_seq_len ( model ) -> int :
+    """Input window length a model was built for."""
+    return int( model.inputs[0].shape[1] or SEQ_LEN )
+
+
+def saved_features ( model ) -> tuple :
+    """
+    Input features of a saved model, checked against its input width.
+
+    Raises:
+        ValueError: If the saved feature list does not match the model
+    """
+    features = load_feature_config()
+    if int( model.inputs[0].shape[2] ) != len( features ) :
+        raise ValueError( f"Saved model takes {model.inputs[0].shape[2]} input channels but the training "
+                          f"artifacts list {len( features )} features {list( features )}. Run a full training." )
+    return features
+
+
+def save_model_atomic ( model, path: str = MODEL_PATH ) :
+    """
+    Save a model so that readers never see a partially written file.
+
+    The model is written to a temporary file in the same directory and then
+    moved over the target with os.replace(), which is atomic.
+
+    Args:
+        model: Model to save
+        path: Destination .keras path
+    """
+    os.makedirs( os.path.dirname( path ), exist_ok=True )
+    tmp_path = os.path.splitext( path )[0] + ".tmp.keras"
+    model.save( tmp_path )
+    os.replace( tmp_path, path )
+
+
+@contextmanager
+def model_lock ( path: str = MODEL_PATH ) :
+    """
+    Hold an exclusive lock on a saved model across processes.
+
+    Wrap read-modify-write updates of the model file (reload, patch, save,
+    publish) so concurrent runs apply them one after another instead of the
+    last writer dropping the other's changes. Blocks until the lock is free.
+
+    Args:
+        path: Model path; the lock is the file path + ".lock"
+    """
+    os.makedirs( os.path.dirname( path ), exist_ok=True )
+    with open( path + ".lock", "a+" ) as f :
+        if fcntl is not None :
+            fcntl.flock( f.fileno(), fcntl.LOCK_EX )
+        else :
+            f.seek( 0 )
+            while True :
+                try :
+                    msvcrt.locking( f.fileno(), msvcrt.LK_LOCK, 1 )  # Retries for ~10s, then raises
+                    break
+                except OSError :
+                    continue
+        try :
+            yield
+        finally :
+            if fcntl is not None :
+                fcntl.flock( f.fileno(), fcntl.LOCK_UN )
+            else :
+                f.seek( 0 )
+                msvcrt.locking( f.fileno(), msvcrt.LK_UNLCK, 1 )
+
+
+def publish_serving_bundle ( metadata: dict ) :
+    """
+    Publish the saved model with the scalers and encoder it was trained with
+    as a new registry version, which the API then hot-swaps in.
+
+    Args:
+        metadata: Run information stored in the version manifest
+
+    Returns:
+        str: The new version, or None if publishing failed
+    """
+    scaler_type, scaler_path = scaler_config()
+    files = {
+        "model.keras" : MODEL_PATH,
+        "coin_scalers.npz" if scaler_type == "streaming" else "coin_scalers.pkl" : scaler_path,
+        "encoder.pkl" : ENCODER_PATH
+    }
+    if os.path.exists( FEATURES_PATH ) :
+        files["features.json"] = FEATURES_PATH
+    # Ensemble members share the encoder and scalers, so they travel along
+    for name, path in ENSEMBLE_MEMBER_PATHS.items() :
+        if os.path.exists( path ) :
+            files[f"{name}.keras"] = path
+    if os.path.exists( ENSEMBLE_WEIGHTS_PATH ) :
+        files["ensemble_weights.json"] = ENSEMBLE_WEIGHTS_PATH
+
+    try :
+        return publish_version( files, metadata )
+    except Exception as e :
+        print( f"⚠️ Could not publish model version: {e}" )
+        return None
+
+
+def predict_quantiles ( model, X, coin_ids, batch_size: int = EVAL_BATCH_SIZE ) -> np.ndarray :
+    """
+    Run inference once and cache the q10/q50/q90 outputs in one array.
+
+    Args:
+        model: Trained model
+        X: Input sequences
+        coin_ids: Coin identifiers
+        batch_size: Samples per inference call
+
+    Returns:
+        np.ndarray: Predictions of shape (samples, 3), columns in QUANTILES order
+    """
+    predictions = np.empty( (len( X ), len( QUANTILES )), dtype=np.float32 )
+    for start in range( 0, len( X ), batch_size ) :
+        end = start + batch_size
+        outputs = model.predict_on_batch( [X[start :end], coin_ids[start :end]] )
+        for j, output in enumerate( outputs ) :
+            predictions[start :end, j] = np.asarray( output ).reshape( -1 )
+
+    return predictions
+
+
+def mean_pinball_loss ( model, X, y, coin_ids, predictions: np.ndarray = None ) -> float :
+    """
+    Average pinball loss over the q10/q50/q90 heads.
+
+    Args:
+        model: Trained model
+        X: Input sequences
+        y: True values
+        coin_ids: Coin identifiers
+        predictions: Cached output of predict_quantiles(), computed if None
+
+    Returns:
+        float: Mean pinball loss across quantiles
+    """
+    if predictions is None :
+        predictions = predict_quantiles( model, X, coin_ids )
+    y_true = y.flatten()
+
+    return float( np.mean( [
+        pinball_loss( y_true, predictions[:, j], q )
+        for j, q in enumerate( QUANTILES.values() )
+    ] ) )
+
+
+def evaluate_model ( model, X, y, coin_ids, predictions: np.ndarray = None, coin_names: dict = None ) :
     """
     Evaluate model performance on the dataset.
 
+    Overall, per-asset and per-asset-class metrics for every quantile are
+    computed in a single chunked pass over cached predictions.
+
     Args:
         model: Trained model
         X: Input sequences
         y: True values
         coin_ids: Coin identifiers
+        predictions: Cached output of predict_quantiles(), computed if None
+        coin_names: Encoder mapping asset -> index, used to label groups
 
     Returns:
-        dict: Evaluation metrics for each quantile
+        dict: Overall metrics for each quantile, q10-q90 coverage, and
+            per_asset / per_asset_class breakdowns
     """
     print( "\n📊 Evaluating model performance..." )
 
-    # Get predictions - returns a list [q10, q50, q90]
-    predictions = model.predict( [X, coin_ids], verbose=0 )
+    if predictions is None :
+        predictions = predict_quantiles( model, X, coin_ids )
 
-    # Extract predictions from list
-    q10_pred = predictions[0].flatten()
-    q50_pred = predictions[1].flatten()
-    q90_pred = predictions[2].flatten()
-    y_true = y.flatten()
+    coin_ids = np.asarray( coin_ids )
+    idx_to_coin = {idx : coin for coin, idx in (coin_names or {}).items()}
+    num_coins = int( coin_ids.max() ) + 1
+    asset_labels = [idx_to_coin.get( idx, str( idx ) ) for idx in range( num_coins )]
 
-    # Calculate metrics for each quantile
-    metrics_results = {
-        "q10" : evaluate_predictions( y_true, q10_pred ),
-        "q50" : evaluate_predictions( y_true, q50_pred ),
-        "q90" : evaluate_predictions( y_true, q90_pred )
-    }
+    class_labels, class_of_coin = asset_class_groups( asset_labels )
+    class_of_coin = np.array( class_of_coin )
+
+    grouped = evaluate_grouped(
+        y.reshape( -1 ),
+        predictions,
+        {
+            "overall" : (np.zeros( len( coin_ids ), dtype=np.int64 ), ["overall"]),
+            "per_asset" : (coin_ids, asset_labels),
+            "per_asset_class" : (class_of_coin[coin_ids], class_labels),
+        },
+        quantiles=tuple( QUANTILES.values() )
+    )
+
+    overall = grouped["overall"]["overall"]
+    metrics_results = {name : overall[name] for name in QUANTILES}
+    metrics_results["coverage_q10_q90"] = overall["coverage_q10_q90"]
+    metrics_results["per_asset"] = grouped["per_asset"]
+    metrics_results["per_asset_class"] = grouped["per_asset_class"]
 
     # Print results
     print( "\n" + "=" * 60 )
     print( "📈 EVALUATION METRICS" )
     print( "=" * 60 )
 
-    for quantile, metrics in metrics_results.items() :
+    for quantile in QUANTILES :
+        metrics = metrics_results[quantile]
         print( f"\n{quantile.upper()} (Quantile {quantile[1 :]}):" )
         print( f"   • RMSE: {metrics['rmse']:.4f}" )
         print( f"   • MAE:  {metrics['mae']:.4f}" )
         print( f"   • MAPE: {metrics['mape']:.2f}%" )
         print( f"   • R²:   {metrics['r2']:.4f}" )
+        print( f"   • Pinball: {metrics['pinball']:.4f}" )
+
+    print( f"\nQ10-Q90 coverage: {metrics_results['coverage_q10_q90'] * 100:.1f}% (target 80%)" )
+    for asset_class, metrics in metrics_results["per_asset_class"].items() :
+        print( f"   • {asset_class}: coverage {metrics['coverage_q10_q90'] * 100:.1f}%, "
+               f"q50 pinball {metrics['q50']['pinball']:.4f} ({metrics['count']} samples)" )
 
     return metrics_results
 
 
-def calculate_prediction_intervals ( model, X, coin_ids ) :
+def calculate_prediction_intervals ( model, X, coin_ids, predictions: np.ndarray = None ) :
     """
     Calculate prediction interval statistics.
 
@@ -87,16 +358,15 @@ def calculate_prediction_intervals ( model, X, coin_ids ) :
         model: Trained model
         X: Input sequences
         coin_ids: Coin identifiers
+        predictions: Cached output of predict_quantiles(), computed if None
 
     Returns:
         dict: Prediction interval statistics
     """
-    predictions = model.predict( [X, coin_ids], verbose=0 )
+    if predictions is None :
+        predictions = predict_quantiles( model, X, coin_ids )
 
-    # Extract predictions from list [q10, q50, q90]
-    q10 = predictions[0].flatten()
-    q50 = predictions[1].flatten()
-    q90 = predictions[2].flatten()
+    q10, q50, q90 = predictions[:, 0], predictions[:, 1], predictions[:, 2]
 
     # Calculate interval widths
     lower_interval = q50 - q10
@@ -122,31 +392,39 @@ def calculate_prediction_intervals ( model, X, coin_ids ) :
     return interval_stats
 
 
-def save_training_results ( history, metrics_results, interval_stats ) :
+def save_training_results ( history, metrics_results, interval_stats, seq_len: int = SEQ_LEN,
+                            patch_sizes=None, features=DEFAULT_FEATURES, scaler_type: str = "robust" ) :
     """
     Save training history and metrics to file.
 
     Args:
-        history: Training history object
+        history: Training history object, or its history dict
         metrics_results: Evaluation metrics
         interval_stats: Prediction interval statistics
+        seq_len: Input window length of the model
+        patch_sizes: Patch sizes of the long-context mode, if used
+        features: Input features of the model
+        scaler_type: "robust" or "streaming" per-asset scalers
     """
+    history = getattr( history, "history", history )
     results = {
         "training_history" : {
-            "loss" : [float( x ) for x in history.history['loss']],
-            "val_loss" : [float( x ) for x in history.history['val_loss']],
-            "q10_loss" : [float( x ) for x in history.history['q10_loss']],
-            "q50_loss" : [float( x ) for x in history.history['q50_loss']],
-            "q90_loss" : [float( x ) for x in history.history['q90_loss']],
+            "loss" : [float( x ) for x in history['loss']],
+            "val_loss" : [float( x ) for x in history['val_loss']],
+            "q10_loss" : [float( x ) for x in history['q10_loss']],
+            "q50_loss" : [float( x ) for x in history['q50_loss']],
+            "q90_loss" : [float( x ) for x in history['q90_loss']],
         },
         "evaluation_metrics" : metrics_results,
         "prediction_intervals" : interval_stats,
         "model_config" : {
-            "seq_len" : SEQ_LEN,
+            "seq_len" : seq_len,
+            "patch_sizes" : list( patch_sizes ) if patch_sizes else None,
+            "features" : list( features ),
             "epochs" : EPOCHS,
             "batch_size" : BATCH_SIZE,
-            "scaler_type" : "coin_specific_robust",
-            "lookback_window" : "730_days"
+            "scaler_type" : f"coin_specific_{scaler_type}",
+            "lookback_window" : f"{lookback_days( seq_len )}_days"
         }
     }
 
@@ -157,7 +435,171 @@ def save_training_results ( history, metrics_results, interval_stats ) :
     print( f"\n💾 Training results saved to {METRICS_PATH}" )
 
 
-def main () :
+def ensemble_weights ( y_val, member_predictions: dict, coin_ids_val, coin_to_idx: dict,
+                       min_windows: int = ENSEMBLE_MIN_ASSET_WINDOWS ) -> dict :
+    """
+    Per-asset ensemble weights proportional to inverse validation pinball loss.
+
+    Args:
+        y_val: Validation targets
+        member_predictions: Member name -> (samples, 3) validation predictions
+        coin_ids_val: Coin identifiers of the validation windows
+        coin_to_idx: Encoder mapping asset -> index
+        min_windows: Assets with fewer validation windows use the global weights
+
+    Returns:
+        dict: {"members", "global": {member: w}, "per_asset": {asset: {member: w}}}
+    """
+    y_true = y_val.reshape( -1 )
+    coin_ids_val = np.asarray( coin_ids_val )
+    members = list( member_predictions )
+    num_groups = len( coin_to_idx )
+    counts = np.bincount( coin_ids_val, minlength=num_groups )
+
+    # Mean pinball over the three heads, per member and per asset
+    asset_loss = np.zeros( (len( members ), num_groups) )
+    global_loss = np.zeros( len( members ) )
+    for m, name in enumerate( members ) :
+        error = y_true[:, None] - member_predictions[name]
+        levels = np.array( list( QUANTILES.values() ) )
+        loss = np.maximum( levels * error, (levels - 1) * error ).mean( axis=1 )
+        asset_loss[m] = np.bincount( coin_ids_val, weights=loss, minlength=num_groups ) / np.maximum( counts, 1 )
+        global_loss[m] = loss.mean()
+
+    def normalise ( losses ) :
+        inverse = 1.0 / np.maximum( losses, 1e-12 )
+        return {name : float( w ) for name, w in zip( members, inverse / inverse.sum() )}
+
+    global_weights = normalise( global_loss )
+    per_asset = {
+        coin : normalise( asset_loss[:, idx] ) if counts[idx] >= min_windows else global_weights
+        for coin, idx in coin_to_idx.items() if idx < num_groups
+    }
+
+    return {
+        "members" : members,
+        "global" : global_weights,
+        "per_asset" : per_asset,
+        "validation_pinball" : {name : float( loss ) for name, loss in zip( members, global_loss )}
+    }
+
+
+def train_ensemble_members ( X, y, coin_ids, num_coins: int, train_idx, val_idx,
+                             transformer_val_predictions: np.ndarray, coin_to_idx: dict,
+                             epochs: int = EPOCHS, seq_len: int = SEQ_LEN ) -> dict :
+    """
+    Train the LSTM and CNN-LSTM members and derive per-asset ensemble weights.
+
+    Args:
+        X, y, coin_ids: Full dataset
+        num_coins: Number of coins in the encoder
+        train_idx, val_idx: Split shared with the transformer
+        transformer_val_predictions: Transformer predictions on val_idx
+        coin_to_idx: Encoder mapping asset -> index
+        epochs: Maximum epochs per member
+        seq_len: Input window length (same as the transformer's)
+
+    Returns:
+        dict: Validation pinball loss and global weight of every member
+    """
+    X_train, ids_train, y_train = X[train_idx], coin_ids[train_idx], y[train_idx]
+    X_val, ids_val, y_val = X[val_idx], coin_ids[val_idx], y[val_idx]
+    member_predictions = {"transformer" : transformer_val_predictions}
+
+    for name, path in ENSEMBLE_MEMBER_PATHS.items() :
+        print( f"\n🧩 Training ensemble member: {name}" )
+        model = MODEL_BUILDERS[name]( seq_len, num_coins, num_features=X.shape[2] )
+        compile_model( model )
+        model.fit(
+            [X_train, ids_train],
+            {q : y_train for q in QUANTILES},
+            validation_data=([X_val, ids_val], {q : y_val for q in QUANTILES}),
+            epochs=epochs,
+            batch_size=BATCH_SIZE,
+            callbacks=[
+                tf.keras.callbacks.EarlyStopping( monitor='val_loss', patience=5, restore_best_weights=True, verbose=1 ),
+                tf.keras.callbacks.ReduceLROnPlateau( monitor='val_loss', factor=0.5, patience=3, min_lr=1e-6, verbose=1 ),
+                ProgressReporter()
+            ],
+            verbose=1
+        )
+        save_model_atomic( model, path )
+        print( f"✅ {name} saved to {path}" )
+        member_predictions[name] = predict_quantiles( model, X_val, ids_val )
+
+    weights = ensemble_weights( y_val, member_predictions, ids_val, coin_to_idx )
+    os.makedirs( os.path.dirname( ENSEMBLE_WEIGHTS_PATH ), exist_ok=True )
+    with open( ENSEMBLE_WEIGHTS_PATH, 'w' ) as f :
+        json.dump( weights, f, indent=2 )
+
+    # Score the ensembles the API can serve on the same windows
+    stacked = np.stack( [member_predictions[name] for name in weights["members"]] )
+    per_window = np.array( [[weights["per_asset"].get( coin, weights["global"] )[name] for name in weights["members"]]
+                            for coin in sorted( coin_to_idx, key=coin_to_idx.get )] )[ids_val]
+    candidates = {
+        "mean" : stacked.mean( axis=0 ),
+        "per_asset" : np.einsum( "mnq,nm->nq", stacked, per_window ),
+    }
+    scores = {
+        kind : float( np.mean( [pinball_loss( y_val.reshape( -1 ), pred[:, j], q )
+                                for j, q in enumerate( QUANTILES.values() )] ) )
+        for kind, pred in candidates.items()
+    }
+
+    print( "\n📊 Ensemble validation pinball loss:" )
+    for name, loss in weights["validation_pinball"].items() :
+        print( f"   • {name}: {loss:.6f} (global weight {weights['global'][name]:.2f})" )
+    for kind, loss in scores.items() :
+        print( f"   • ensemble ({kind}): {loss:.6f}" )
+
+    return {
+        "validation_pinball" : weights["validation_pinball"],
+        "global_weights" : weights["global"],
+        "ensemble_pinball" : scores
+    }
+
+
+def train_ensemble ( epochs: int = EPOCHS ) :
+    """
+    Train only the ensemble members against the saved transformer, reusing
+    its scalers and encoder, and publish the result.
+
+    Args:
+        epochs: Maximum epochs per member
+
+    Returns:
+        dict: Ensemble summary
+    """
+    coin_scalers, coin_to_idx = load_training_artifacts()
+    transformer_model = load_trained_model( MODEL_PATH )
+    seq_len = model_seq_len( transformer_model )
+
+    X, y, coin_ids, _ = load_dataset( seq_len=seq_len, save_artifacts=False, coin_scalers=coin_scalers,
+                                      coin_to_idx=coin_to_idx, features=saved_features( transformer_model ) )
+    train_idx, val_idx = split_train_val( coin_ids, VALIDATION_SPLIT )
+    transformer_val = predict_quantiles( transformer_model, X[val_idx], coin_ids[val_idx] )
+
+    summary = train_ensemble_members( X, y, coin_ids, len( coin_to_idx ), train_idx, val_idx,
+                                      transformer_val, coin_to_idx, epochs=epochs, seq_len=seq_len )
+    summary["model_version"] = publish_serving_bundle( {"mode" : "ensemble", **summary} )
+    report_metrics( {"mode" : "ensemble", **summary} )
+    return summary
+
+
+def main ( resume: bool = True, ensemble: bool = True, seq_len: int = SEQ_LEN, patch_sizes=None,
+           features=DEFAULT_FEATURES, scaler_type: str = "robust" ) :
+    """
+    Train the transformer from scratch.
+
+    Args:
+        resume: Continue from the latest training snapshot if one exists for
+            the same data, instead of starting over
+        ensemble: Also train the LSTM and CNN-LSTM ensemble members
+        seq_len: Input window length, e.g. 365 or 730 for long context
+        patch_sizes: Patch sizes for the long-context transformer, or "auto"
+        features: Input channels, e.g. OHLCV_FEATURES (see features.py)
+        scaler_type: "robust" or "streaming" per-asset scalers
+    """
     print( "=" * 60 )
     print( "🚀 CRYPTO TRANSFORMER TRAINING" )
     print( "=" * 60 )
@@ -167,7 +609,7 @@ def main () :
     # Load dataset
     print( "\n📦 Loading dataset with coin-specific scalers..." )
     try :
-        X, y, coin_ids, num_coins = load_dataset()
+        X, y, coin_ids, num_coins = load_dataset( seq_len=seq_len, features=features, scaler_type=scaler_type )
     except Exception as e :
         print( f"❌ Failed to load dataset: {e}" )
         print( "\nTroubleshooting:" )
@@ -180,85 +622,121 @@ def main () :
     print( f"\n📊 Dataset Info:" )
     print( f"   • Coins: {num_coins}" )
     print( f"   • Samples: {len( X )}" )
-    print( f"   • Sequence Length: {SEQ_LEN}" )
+    print( f"   • Sequence Length: {seq_len}" )
     print( f"   • Input Shape: {X.shape}" )
-    print( f"   • Using: Coin-specific RobustScalers" )
+    print( f"   • Features: {', '.join( features )}" )
+    print( f"   • Using: Coin-specific {'streaming ' if scaler_type == 'streaming' else ''}RobustScalers" )
     print( f"   • Training window: Last 730 days per asset" )
 
     # Build model using the function from build_transformer module
     print( "\n🏗️ Building transformer model..." )
-    transformer_model = build_transformer( SEQ_LEN, num_coins )
+    if patch_sizes == "auto" :
+        patch_sizes = default_patch_sizes( seq_len )
+    if patch_sizes :
+        print( f"   • Long-context mode, patch sizes: {list( patch_sizes )}" )
+    transformer_model = build_transformer( seq_len, num_coins, patch_sizes=patch_sizes, num_features=len( features ) )
 
     print( f"\n📈 Model Architecture:" )
     transformer_model.summary()
 
     # Compile model
     print( "\n⚙️ Compiling model with quantile losses..." )
-    transformer_model.compile(
-        optimizer=tf.keras.optimizers.Adam( learning_rate=0.001 ),
-        loss={
-            "q10" : quantile_loss( 0.1 ),
-            "q50" : quantile_loss( 0.5 ),
-            "q90" : quantile_loss( 0.9 ),
-        },
-        metrics={
-            "q10" : "mae",
-            "q50" : "mae",
-            "q90" : "mae",
-        }
-    )
+    compile_model( transformer_model )
+
+    # Hold out the newest windows of every asset; the ensemble members use the
+    # same split so their per-asset validation losses are comparable
+    train_idx, val_idx = split_train_val( coin_ids, VALIDATION_SPLIT )
+    train_data = ShuffledWindows( X[train_idx], coin_ids[train_idx], y[train_idx], BATCH_SIZE,
+                                  output_names=QUANTILES, seed=SHUFFLE_SEED )
+    validation_data = ([X[val_idx], coin_ids[val_idx]], {name : y[val_idx] for name in QUANTILES})
 
     # Callbacks
-    callbacks = [
-        tf.keras.callbacks.EarlyStopping(
-            monitor='loss',
-            patience=5,
-            restore_best_weights=True,
-            verbose=1
-        ),
-        tf.keras.callbacks.ReduceLROnPlateau(
-            monitor='loss',
-            factor=0.5,
-            patience=3,
-            min_lr=1e-6,
-            verbose=1
-        ),
-        tf.keras.callbacks.ModelCheckpoint(
-            MODEL_PATH,
-            monitor='val_loss',
-            save_best_only=True,
-            verbose=1
-        )
-    ]
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor='loss',
+        patience=5,
+        restore_best_weights=True,
+        verbose=1
+    )
+    reduce_lr = tf.keras.callbacks.ReduceLROnPlateau(
+        monitor='loss',
+        factor=0.5,
+        patience=3,
+        min_lr=1e-6,
+        verbose=1
+    )
+    # Best-epoch checkpoint goes to its own file so an interrupted write can
+    # never corrupt the model the API is serving
+    checkpoint = tf.keras.callbacks.ModelCheckpoint(
+        BEST_MODEL_PATH,
+        monitor='val_loss',
+        save_best_only=True,
+        verbose=1
+    )
+    snapshot = TrainingSnapshot(
+        SNAPSHOT_DIR, train_data,
+        stateful_callbacks=[early_stopping, reduce_lr, checkpoint],
+        every_epochs=SNAPSHOT_EVERY_EPOCHS,
+        fingerprint={"samples" : int( len( X ) ), "num_coins" : int( num_coins ), "seq_len" : seq_len,
+                     "patch_sizes" : list( patch_sizes ) if patch_sizes else None, "features" : list( features )}
+    )
+    callbacks = [early_stopping, reduce_lr, ProgressReporter(), checkpoint, snapshot]
+
+    initial_epoch = snapshot.restore( transformer_model ) if resume else 0
 
     # Train model
     print( f"\n🎯 Training for {EPOCHS} epochs..." )
     print( "=" * 60 )
 
-    history = transformer_model.fit(
-        [X, coin_ids],
-        {"q10" : y, "q50" : y, "q90" : y},
+    transformer_model.fit(
+        train_data,
+        validation_data=validation_data,
         epochs=EPOCHS,
-        batch_size=BATCH_SIZE,
-        validation_split=0.1,
+        initial_epoch=initial_epoch,
         callbacks=callbacks,
         verbose=1
     )
+    # Full history across resumed runs
+    history = snapshot.history
+
+    # Run inference once and reuse it for all metrics
+    predictions = predict_quantiles( transformer_model, X, coin_ids )
+    _, coin_to_idx = load_training_artifacts()
 
     # Evaluate model
-    metrics_results = evaluate_model( transformer_model, X, y, coin_ids )
+    metrics_results = evaluate_model( transformer_model, X, y, coin_ids,
+                                      predictions=predictions, coin_names=coin_to_idx )
 
     # Calculate prediction intervals
-    interval_stats = calculate_prediction_intervals( transformer_model, X, coin_ids )
+    interval_stats = calculate_prediction_intervals( transformer_model, X, coin_ids, predictions=predictions )
 
-    # Save model (if not already saved by ModelCheckpoint)
+    # Save model
     print( "\n💾 Saving final model..." )
-    os.makedirs( os.path.dirname( MODEL_PATH ), exist_ok=True )
-    transformer_model.save( MODEL_PATH )
+    save_model_atomic( transformer_model, MODEL_PATH )
     print( f"✅ Model saved to {MODEL_PATH}" )
 
+    # Ensemble members on the same data and split
+    if ensemble :
+        ensemble_summary = train_ensemble_members( X, y, coin_ids, num_coins, train_idx, val_idx,
+                                                   predictions[val_idx], coin_to_idx, seq_len=seq_len )
+
     # Save training results
-    save_training_results( history, metrics_results, interval_stats )
+    save_training_results( history, metrics_results, interval_stats, seq_len=seq_len, patch_sizes=patch_sizes,
+                           features=features, scaler_type=scaler_type )
+    summary = {
+        "mode" : "full",
+        "epochs_run" : len( history['loss'] ),
+        "final_loss" : float( history['loss'][-1] ),
+        "final_val_loss" : float( history['val_loss'][-1] ),
+        "evaluation_metrics" : {name : metrics_results[name] for name in QUANTILES},
+        "coverage_q10_q90" : metrics_results["coverage_q10_q90"]
+    }
+    if ensemble :
+        summary["ensemble"] = ensemble_summary
+    summary["model_version"] = publish_serving_bundle( summary )
+    report_metrics( summary )
+
+    # The run finished, so the next one starts from scratch
+    snapshot.clear()
 
     print( "\n" + "=" * 60 )
     print( "🎉 TRAINING COMPLETE!" )
@@ -266,7 +744,7 @@ def main () :
     print( f"\n📁 Outputs:" )
     print( f"   • Model: {MODEL_PATH}" )
     print( f"   • Metrics: {METRICS_PATH}" )
-    print( f"   • Scalers: coin_scalers.pkl (coin-specific)" )
+    print( f"   • Scalers: {os.path.basename( scaler_config()[1] )} (coin-specific)" )
     print( f"   • Encoder: encoder.pkl" )
 
     print( f"\n🧪 Next Steps:" )
@@ -275,5 +753,339 @@ def main () :
     print( f"   3. Check predictions for gold/silver match current prices" )
 
 
+def incremental_train ( recent_windows: int = INCREMENTAL_RECENT_WINDOWS,
+                        val_windows: int = INCREMENTAL_VAL_WINDOWS,
+                        gate_windows: int = INCREMENTAL_GATE_WINDOWS,
+                        replay_ratio: float = INCREMENTAL_REPLAY_RATIO,
+                        epochs: int = INCREMENTAL_EPOCHS,
+                        learning_rate: float = INCREMENTAL_LEARNING_RATE,
+                        seed: int = 42 ) :
+    """
+    Warm-start the saved model on newly appended data.
+
+    Reuses the existing model, scalers and encoder, fine-tunes on the newest
+    windows of every asset plus a random replay sample of older windows, and
+    only replaces the saved model if pinball loss on the newest windows of
+    every asset does not regress. Those gate windows are never used for
+    training or early stopping (which restores the best epoch on its own
+    validation windows), so the decision is made on unseen data.
+
+    Args:
+        recent_windows: Windows per asset to fine-tune on, before the held-out ones
+        val_windows: Windows per asset held out for early stopping
+        gate_windows: Newest windows per asset held out for the accept/reject decision
+        replay_ratio: Older windows sampled per recent window
+        epochs: Maximum fine-tuning epochs
+        learning_rate: Adam learning rate for fine-tuning
+        seed: Random seed for the replay sample
+
+    Returns:
+        dict: Gate losses before/after and whether the model was replaced
+    """
+    print( "=" * 60 )
+    print( "🔁 INCREMENTAL TRANSFORMER TRAINING" )
+    print( "=" * 60 )
+
+    if not os.path.exists( MODEL_PATH ) :
+        print( f"⚠️ No saved model at {MODEL_PATH}, running full training instead" )
+        main()
+        return None
+
+    coin_scalers, coin_to_idx = load_training_artifacts()
+    model = load_trained_model( MODEL_PATH )
+    X, y, coin_ids, num_coins = load_dataset(
+        seq_len=model_seq_len( model ), save_artifacts=False, coin_scalers=coin_scalers, coin_to_idx=coin_to_idx,
+        features=saved_features( model )
+    )
+
+    # Split each coin's block (newest last) into gate / validation / recent / older
+    offset = windows_from_end( coin_ids )
+    held_out = gate_windows + val_windows
+    gate_mask = offset < gate_windows
+    val_mask = (offset >= gate_windows) & (offset < held_out)
+    recent_mask = (offset >= held_out) & (offset < held_out + recent_windows)
+    older_idx = np.flatnonzero( offset >= held_out + recent_windows )
+
+    rng = np.random.default_rng( seed )
+    replay_size = min( len( older_idx ), int( recent_mask.sum() * replay_ratio ) )
+    replay_idx = rng.choice( older_idx, size=replay_size, replace=False )
+    train_idx = np.concatenate( [np.flatnonzero( recent_mask ), replay_idx] )
+
+    X_val, y_val, ids_val = X[val_mask], y[val_mask], coin_ids[val_mask]
+    X_gate, y_gate, ids_gate = X[gate_mask], y[gate_mask], coin_ids[gate_mask]
+
+    print( f"\n📊 Incremental split:" )
+    print( f"   • Recent windows: {int( recent_mask.sum() )}" )
+    print( f"   • Replay windows: {replay_size}" )
+    print( f"   • Validation windows: {int( val_mask.sum() )}" )
+    print( f"   • Gate windows: {int( gate_mask.sum() )}" )
+
+    model = compile_model( model, learning_rate=learning_rate )
+    baseline_loss = mean_pinball_loss( model, X_gate, y_gate, ids_gate )
+    print( f"\n📏 Gate pinball loss before: {baseline_loss:.6f}" )
+
+    model.fit(
+        [X[train_idx], coin_ids[train_idx]],
+        {name : y[train_idx] for name in QUANTILES},
+        validation_data=([X_val, ids_val], {name : y_val for name in QUANTILES}),
+        epochs=epochs,
+        batch_size=BATCH_SIZE,
+        shuffle=True,
+        callbacks=[
+            tf.keras.callbacks.EarlyStopping(
+                monitor='val_loss',
+                patience=1,
+                restore_best_weights=True,
+                verbose=1
+            ),
+            ProgressReporter()
+        ],
+        verbose=1
+    )
+
+    updated_loss = mean_pinball_loss( model, X_gate, y_gate, ids_gate )
+    print( f"📏 Gate pinball loss after:  {updated_loss:.6f}" )
+
+    replaced = updated_loss <= baseline_loss
+    if replaced :
+        save_model_atomic( model, MODEL_PATH )
+        print( f"✅ Gate loss did not regress, model saved to {MODEL_PATH}" )
+    else :
+        print( "⚠️ Gate loss regressed, keeping the existing model" )
+
+    result = {
+        "gate_pinball_before" : baseline_loss,
+        "gate_pinball_after" : updated_loss,
+        "replaced" : bool( replaced ),
+        "train_samples" : int( len( train_idx ) ),
+        "val_samples" : int( val_mask.sum() ),
+        "gate_samples" : int( gate_mask.sum() ),
+        "epochs" : epochs
+    }
+
+    # Record the update next to the full-training metrics
+    results = {}
+    if os.path.exists( METRICS_PATH ) :
+        with open( METRICS_PATH ) as f :
+            results = json.load( f )
+    results["last_incremental_update"] = result
+    os.makedirs( os.path.dirname( METRICS_PATH ), exist_ok=True )
+    with open( METRICS_PATH, 'w' ) as f :
+        json.dump( results, f, indent=2 )
+
+    if replaced :
+        result["model_version"] = publish_serving_bundle( {"mode" : "incremental", **result} )
+    report_metrics( {"mode" : "incremental", **result} )
+    return result
+
+
+def finetune_coin ( coin: str, epochs: int = COIN_FINETUNE_EPOCHS,
+                    learning_rate: float = COIN_FINETUNE_LEARNING_RATE,
+                    val_windows: int = INCREMENTAL_VAL_WINDOWS,
+                    gate_windows: int = INCREMENTAL_GATE_WINDOWS ) :
+    """
+    Fine-tune a single asset without touching any other asset's predictions.
+
+    All shared weights (transformer blocks, dense layers and quantile heads)
+    are frozen; only the asset's row of the coin embedding is trained, on that
+    asset's windows only. The updated row is then patched into the model
+    currently on disk and written back atomically, so other rows - including
+    rows updated by concurrent fine-tunes of other assets - are preserved:
+    the reload, patch, save and publish run under model_lock().
+    As in incremental_train(), the row is only kept if pinball loss on the
+    asset's newest windows, held out from training and early stopping, does
+    not regress.
+
+    Args:
+        coin: Asset identifier (must already be in the encoder)
+        epochs: Maximum fine-tuning epochs
+        learning_rate: Adam learning rate for the embedding row
+        val_windows: Windows of the asset before the gate windows, held out for early stopping
+        gate_windows: Newest windows of the asset held out for the accept/reject decision
+
+    Returns:
+        dict: Gate losses before/after and whether the model was replaced
+
+    Raises:
+        ValueError: If the asset is not part of the trained model
+        FileNotFoundError: If there is no trained model yet
+    """
+    print( "=" * 60 )
+    print( f"🎯 FINE-TUNING {coin.upper()}" )
+    print( "=" * 60 )
+
+    if not os.path.exists( MODEL_PATH ) :
+        raise FileNotFoundError( f"No trained model at {MODEL_PATH}. Run a full training first." )
+
+    coin_scalers, coin_to_idx = load_training_artifacts()
+    if coin not in coin_to_idx or coin not in coin_scalers :
+        raise ValueError(
+            f"'{coin}' is not part of the trained model. Run a full training to add new assets."
+        )
+
+    coin_index = coin_to_idx[coin]
+    model = load_trained_model( MODEL_PATH )
+    X, y, coin_ids = load_coin_dataset( coin, coin_scalers[coin], coin_index, seq_len=model_seq_len( model ),
+                                        features=saved_features( model ) )
+    held_out = val_windows + gate_windows
+    if len( X ) <= held_out :
+        raise ValueError( f"Not enough windows for '{coin}' to fine-tune ({len( X )})" )
+
+    # Oldest to newest: training / early-stopping validation / gate
+    X_train, y_train, ids_train = X[:-held_out], y[:-held_out], coin_ids[:-held_out]
+    X_val, y_val, ids_val = (X[-held_out :-gate_windows], y[-held_out :-gate_windows],
+                             coin_ids[-held_out :-gate_windows])
+    X_gate, y_gate, ids_gate = X[-gate_windows :], y[-gate_windows :], coin_ids[-gate_windows :]
+
+    for layer in model.layers :
+        layer.trainable = layer.name == COIN_EMBEDDING_LAYER
+    compile_model( model, learning_rate=learning_rate )
+
+    embedding = model.get_layer( COIN_EMBEDDING_LAYER )
+    original_rows = embedding.get_weights()[0].copy()
+
+    baseline_loss = mean_pinball_loss( model, X_gate, y_gate, ids_gate )
+    print( f"\n📏 Gate pinball loss before: {baseline_loss:.6f}" )
+
+    model.fit(
+        [X_train, ids_train],
+        {name : y_train for name in QUANTILES},
+        validation_data=([X_val, ids_val], {name : y_val for name in QUANTILES}),
+        epochs=epochs,
+        batch_size=BATCH_SIZE,
+        shuffle=True,
+        callbacks=[
+            tf.keras.callbacks.EarlyStopping(
+                monitor='val_loss',
+                patience=2,
+                restore_best_weights=True,
+                verbose=1
+            ),
+            ProgressReporter()
+        ],
+        verbose=1
+    )
+
+    updated_loss = mean_pinball_loss( model, X_gate, y_gate, ids_gate )
+    print( f"📏 Gate pinball loss after:  {updated_loss:.6f}" )
+
+    replaced = updated_loss <= baseline_loss
+    result = {
+        "coin" : coin,
+        "gate_pinball_before" : baseline_loss,
+        "gate_pinball_after" : updated_loss,
+        "replaced" : bool( replaced ),
+        "train_samples" : int( len( X_train ) ),
+        "val_samples" : int( len( X_val ) ),
+        "gate_samples" : int( len( X_gate ) )
+    }
+
+    if replaced :
+        new_row = embedding.get_weights()[0][coin_index]
+        row_change = float( np.abs( new_row - original_rows[coin_index] ).max() )
+
+        # Patch only this asset's row into the latest model on disk and publish it; the
+        # lock serialises concurrent fine-tunes so none of their rows is lost
+        with model_lock( MODEL_PATH ) :
+            latest = load_trained_model( MODEL_PATH )
+            latest_embedding = latest.get_layer( COIN_EMBEDDING_LAYER )
+            rows = latest_embedding.get_weights()[0]
+            rows[coin_index] = new_row
+            latest_embedding.set_weights( [rows] )
+            save_model_atomic( latest, MODEL_PATH )
+            print( f"✅ Updated embedding row {coin_index} (max change {row_change:.4f}), saved to {MODEL_PATH}" )
+            result["model_version"] = publish_serving_bundle( {"mode" : "coin", **result} )
+    else :
+        print( "⚠️ Gate loss regressed, keeping the existing model" )
+
+    report_metrics( {"mode" : "coin", **result} )
+    return result
+
+
+def refresh_scalers () :
+    """
+    Update the streaming scalers with newly appended prices and publish them
+    with the current model, without retraining.
+
+    Returns:
+        dict: Rows absorbed per asset and the published version
+    """
+    print( "=" * 60 )
+    print( "📐 REFRESHING STREAMING SCALERS" )
+    print( "=" * 60 )
+
+    absorbed = refresh_streaming_scalers()
+    updated = {coin : rows for coin, rows in absorbed.items() if rows}
+    for coin, rows in sorted( updated.items() ) :
+        print( f"   • {coin}: {rows} new rows" )
+    print( f"✅ {len( updated )} of {len( absorbed )} scalers updated" )
+
+    result = {"assets_updated" : len( updated ), "rows_absorbed" : int( sum( updated.values() ) )}
+    if updated :
+        result["model_version"] = publish_serving_bundle( {"mode" : "scalers", **result} )
+    report_metrics( {"mode" : "scalers", **result} )
+    return result
+
+
 if __name__ == "__main__" :
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser( description="Train the quantile transformer" )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Fine-tune the saved model on recent windows instead of training from scratch"
+    )
+    parser.add_argument(
+        "--coin",
+        help="Fine-tune only this asset's embedding, leaving all other assets unchanged"
+    )
+    parser.add_argument(
+        "--no-resume", action="store_true",
+        help="Ignore any training snapshot and start the full training run from scratch"
+    )
+    parser.add_argument(
+        "--ensemble", action="store_true",
+        help="Only train the LSTM and CNN-LSTM ensemble members against the saved transformer"
+    )
+    parser.add_argument(
+        "--no-ensemble", action="store_true",
+        help="Train only the transformer in a full run"
+    )
+    parser.add_argument(
+        "--seq-len", type=int, default=SEQ_LEN,
+        help="Input window length of a full run, e.g. 365 or 730 for long context"
+    )
+    parser.add_argument(
+        "--patch-sizes",
+        help="Long-context transformer: comma-separated patch sizes (e.g. 25 or 25,100) or 'auto'"
+    )
+    parser.add_argument(
+        "--scaler", choices=["robust", "streaming"], default="robust",
+        help="Per-asset scalers of a full run; streaming scalers can be refreshed without retraining"
+    )
+    parser.add_argument(
+        "--refresh-scalers", action="store_true",
+        help="Feed newly appended prices into the streaming scalers and publish them with the current model"
+    )
+    parser.add_argument(
+        "--features", default="close",
+        help="Input channels of a full run: 'close', 'ohlcv' or a comma-separated list starting with close"
+    )
+    args = parser.parse_args()
+
+    patch_sizes = args.patch_sizes
+    if patch_sizes and patch_sizes != "auto" :
+        patch_sizes = tuple( int( p ) for p in patch_sizes.split( "," ) )
+
+    if args.refresh_scalers :
+        refresh_scalers()
+    elif args.coin :
+        finetune_coin( args.coin )
+    elif args.incremental :
+        incremental_train()
+    elif args.ensemble :
+        train_ensemble()
+    else :
+        main( resume=not args.no_resume, ensemble=not args.no_ensemble,
+              seq_len=args.seq_len, patch_sizes=patch_sizes, features=parse_features( args.features ),
+              scaler_type=args.scaler )
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Closed-form GARCH(1,1) volatility forecasts for horizon scaling.
+
+The model forecasts one step ahead; longer horizons used to stretch the
+one-step quantile offsets by sqrt(days_ahead) and then clamp the result.
+That assumes today's volatility persists unchanged for the whole horizon.
+Under GARCH(1,1) the expected variance decays geometrically towards its
+long-run level, so the variance summed over k steps has a closed form:
+
+    k * long_run + (next - long_run) * (1 - persistence^k) / (1 - persistence)
+
+which is k * next for persistence 1 (EWMA, the integrated case). The
+horizon scale is the square root of that sum over the one-step variance.
+
+Every asset is fitted at once: the Gaussian likelihood of a grid of
+(alpha, persistence) pairs is filtered over a (rows, assets) return matrix
+in one pass, with the long-run variance targeted to each asset's mean
+squared return, and each asset keeps its best pair. Refitting the whole
+universe takes about a tenth of a second.
+
+Numpy only, so the API can import it as model.vol_forecast.
+"""
+
+import numpy as np
+
+ALPHAS = (0.02, 0.04, 0.06, 0.09, 0.13, 0.18)
+PERSISTENCES = (0.80, 0.90, 0.95, 0.975, 0.99, 1.0)  # 1.0 is EWMA
+MIN_VARIANCE = 1e-16
+MIN_PRICE_RATIO = 1e-6  # Lowest one-step quantile, relative to the current price
+
+
+def align_returns ( series ) -> np.ndarray :
+    """
+    Simple returns of several price series as one right-aligned matrix.
+
+    Args:
+        series: Iterable of 1-D price arrays, oldest first
+
+    Returns:
+        np.ndarray: (rows, assets) returns, NaN-padded at the top for
+            shorter histories
+    """
+    returns = [np.diff( prices ) / prices[:-1] for prices in map( np.asarray, series )]
+    rows = max( (len( r ) for r in returns), default=0 )
+    matrix = np.full( (rows, len( returns )), np.nan )
+    for j, values in enumerate( returns ) :
+        if len( values ) :
+            matrix[rows - len( values ) :, j] = values
+    return matrix
+
+
+def filter_variance ( returns: np.ndarray, alpha, beta, long_run, keep_path: bool = False ) :
+    """
+    Run the GARCH(1,1) variance recursion over a return matrix.
+
+    h[t+1] = long_run * (1 - alpha - beta) + alpha * r[t]^2 + beta * h[t],
+    started at long_run. Rows where an asset has no return leave its
+    variance unchanged. Parameters broadcast against (assets,), so a
+    (grid, 1) column of parameters filters every grid point at once.
+
+    Args:
+        returns: (rows, assets) returns with NaN for missing rows
+        alpha, beta: Reaction and decay coefficients
+        long_run: Long-run variance per asset
+        keep_path: Also return the variance forecast after every row
+
+    Returns:
+        tuple: (next variance, log-likelihood, path or None); path[t] is
+            the variance forecast for the row after t
+    """
+    alpha = np.asarray( alpha, dtype=np.float64 )
+    beta = np.asarray( beta, dtype=np.float64 )
+    long_run = np.asarray( long_run, dtype=np.float64 )
+    omega = long_run * (1 - alpha - beta)
+
+    shape = np.broadcast_shapes( alpha.shape, beta.shape, long_run.shape, np.shape( returns )[1 :] )
+    variance = np.broadcast_to( long_run, shape ).copy()
+    loglik = np.zeros_like( variance )
+    path = np.empty( (len( returns ),) + variance.shape ) if keep_path else None
+
+    for t, row in enumerate( returns ) :
+        valid = ~np.isnan( row )
+        squared = np.where( valid, row, 0.0 ) ** 2
+        loglik -= np.where( valid, 0.5 * (np.log( variance ) + squared / variance), 0.0 )
+        variance = np.where( valid, np.maximum( omega + alpha * squared + beta * variance, MIN_VARIANCE ), variance )
+        if keep_path :
+            path[t] = variance
+
+    return variance, loglik, path
+
+
+def horizon_variance ( next_variance, long_run, persistence, steps ) :
+    """
+    Expected variance summed over the next `steps` rows.
+
+    Args:
+        next_variance: One-step variance forecast
+        long_run: Long-run variance
+        persistence: alpha + beta
+        steps: Horizon in rows
+
+    Returns:
+        np.ndarray: Cumulative variance
+    """
+    next_variance = np.asarray( next_variance, dtype=np.float64 )
+    persistence = np.asarray( persistence, dtype=np.float64 )
+    integrated = persistence >= 1
+    safe = np.where( integrated, 0.5, persistence )
+    decayed = (next_variance - long_run) * (1 - safe ** steps) / (1 - safe)
+    return np.where( integrated, steps * next_variance, steps * long_run + decayed )
+
+
+def horizon_scale ( next_variance, long_run, persistence, steps ) :
+    """Ratio of the horizon's standard deviation to the one-step one (1 for steps=1)."""
+    cumulative = horizon_variance( next_variance, long_run, persistence, steps )
+    return np.sqrt( np.maximum( cumulative, 0.0 ) / np.maximum( next_variance, MIN_VARIANCE ) )
+
+
+def scale_quantiles ( current, q10, q50, q90, scale ) :
+    """
+    Stretch one-step quantile forecasts to a longer horizon.
+
+    Each quantile's log distance from the current price is multiplied by
+    the horizon scale, so prices stay positive at any scale without
+    clamping; the three are sorted afterwards in case the one-step
+    quantiles crossed.
+
+    Args:
+        current: Last observed prices
+        q10, q50, q90: One-step quantile forecasts in price units
+        scale: Horizon scale from horizon_scale()
+
+    Returns:
+        tuple: (q10, q50, q90) for the horizon
+    """
+    current = np.asarray( current, dtype=np.float64 )
+    floor = current * MIN_PRICE_RATIO
+    quantiles = np.stack( [np.maximum( np.asarray( q, dtype=np.float64 ), floor ) for q in (q10, q50, q90)] )
+    scaled = np.sort( current * np.exp( np.log( quantiles / current ) * scale ), axis=0 )
+    return scaled[0], scaled[1], scaled[2]
+
+
+class VolatilityModel :
+    """Fitted GARCH(1,1) parameters and current variance forecast of many assets."""
+
+    def __init__ ( self, alpha: np.ndarray, beta: np.ndarray, long_run: np.ndarray, next_variance: np.ndarray ) :
+        self.alpha = alpha
+        self.beta = beta
+        self.long_run = long_run
+        self.next_variance = next_variance
+
+    @property
+    def persistence ( self ) -> np.ndarray :
+        return self.alpha + self.beta
+
+    @classmethod
+    def fit ( cls, returns: np.ndarray ) -> "VolatilityModel" :
+        """
+        Fit every column of a return matrix over the (alpha, persistence) grid.
+
+        Args:
+            returns: (rows, assets) returns with NaN for missing rows
+
+        Returns:
+            VolatilityModel: Best parameters per asset by Gaussian likelihood
+        """
+        returns = np.asarray( returns, dtype=np.float64 )
+        grid = [(a, p - a) for a in ALPHAS for p in PERSISTENCES if p - a > 0]
+        alpha = np.array( [a for a, _ in grid] )[:, None]
+        beta = np.array( [b for _, b in grid] )[:, None]
+
+        with np.errstate( invalid="ignore" ) :
+            long_run = np.nanmean( returns ** 2, axis=0 )
+        long_run = np.maximum( np.nan_to_num( long_run ), MIN_VARIANCE )
+
+        variance, loglik, _ = filter_variance( returns, alpha, beta, long_run )
+        best = np.argmax( loglik, axis=0 )
+        columns = np.arange( returns.shape[1] )
+
+        return cls( alpha[best, 0], beta[best, 0], long_run, variance[best, columns] )
+
+    def scale ( self, steps ) -> np.ndarray :
+        """Horizon scale of every asset for `steps` rows ahead."""
+        return horizon_scale( self.next_variance, self.long_run, self.persistence, steps )
+
+    def variance_path ( self, returns: np.ndarray ) -> np.ndarray :
+        """One-step variance forecast after every row, with the fitted parameters."""
+        return filter_variance( returns, self.alpha, self.beta, self.long_run, keep_path=True )[2]
@@ -1,11 +1,13 @@
 import joblib
 import os
 
+from model.assets import ASSET_CATEGORIES, get_asset_category
+from services.model_registry import registry
+
 ENCODER_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/encoder.pkl"
 DATA_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/data"
 MODEL_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models"
 
-
 def load_coin_encoder () :
     """Load the coin encoders from disk."""
     if not os.path.exists( ENCODER_PATH ) :
@@ -20,12 +22,18 @@ def load_coin_encoder () :
         raise ValueError( f"Error loading coin encoders: {e}" )
 
 
-# Load encoders once at module level
-try :
-    coin_encoder = load_coin_encoder()
-except Exception as e :
-    print( f"⚠️ Warning: {e}" )
-    coin_encoder = {}
+def get_coin_encoder () :
+    """
+    Encoder of the model version currently being served.
+
+    Taken from the same registry bundle as the model and scalers, so it is
+    swapped together with them when a new version is deployed.
+
+    Returns:
+        dict: Asset -> index, empty if no model version is loaded
+    """
+    bundle = registry.current()
+    return bundle.coin_encoder if bundle is not None else {}
 
 
 def has_coin_data ( coin: str ) :
@@ -42,6 +50,18 @@ def has_coin_data ( coin: str ) :
     return os.path.exists( data_path )
 
 
+def get_assets_with_data () :
+    """
+    All assets with a price file in the data directory.
+
+    Returns:
+        list: Sorted asset identifiers
+    """
+    if not os.path.isdir( DATA_DIR ) :
+        return []
+    return sorted( coin for coin in os.listdir( DATA_DIR ) if has_coin_data( coin ) )
+
+
 def has_coin_model ( coin: str ) :
     """
     Check if a coin has a trained model.
@@ -68,7 +88,7 @@ def is_coin_ready ( coin: str ) :
         bool: True if coin is ready for predictions
     """
     return (
-            coin in coin_encoder and
+            coin in get_coin_encoder() and
             has_coin_data( coin ) and
             has_coin_model( coin )
     )
@@ -82,6 +102,7 @@ def get_all_coins () :
     Returns:
         list: Sorted list of coin identifiers that are ready
     """
+    coin_encoder = get_coin_encoder()
     if not coin_encoder :
         return []
 
@@ -102,6 +123,7 @@ def get_all_coins_in_encoder () :
     Returns:
         list: Sorted list of all coin identifiers in encoder
     """
+    coin_encoder = get_coin_encoder()
     if not coin_encoder :
         return []
     return sorted( list( coin_encoder.keys() ) )
@@ -120,6 +142,7 @@ def get_coin_index ( coin: str ) :
     Raises:
         ValueError: If coin not found
     """
+    coin_encoder = get_coin_encoder()
     if coin not in coin_encoder :
         raise ValueError( f"Coin '{coin}' not found in encoders" )
 
@@ -136,7 +159,7 @@ def is_coin_available ( coin: str ) :
     Returns:
         bool: True if coin is available
     """
-    return coin in coin_encoder
+    return coin in get_coin_encoder()
 
 
 def get_coin_status ( coin: str ) :
@@ -151,7 +174,7 @@ def get_coin_status ( coin: str ) :
     """
     return {
         "coin" : coin,
-        "in_encoder" : coin in coin_encoder,
+        "in_encoder" : coin in get_coin_encoder(),
         "has_data" : has_coin_data( coin ),
         "has_model" : has_coin_model( coin ),
         "ready" : is_coin_ready( coin )
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Architecture name used in ensemble_weights.json -> model name in a bundle
+ENSEMBLE_MEMBERS = {
+    "transformer" : "teacher",
+    "lstm" : "lstm",
+    "cnn_lstm" : "cnn_lstm"
+}
+
+# "per_asset" uses validation-based weights per asset, "mean" averages quantiles
+ENSEMBLE_WEIGHTINGS = ("per_asset", "mean")
+
+# One thread per member: TensorFlow releases the GIL inside ops, so the
+# members run concurrently and ensemble latency stays close to the slowest one
+_executor = ThreadPoolExecutor( max_workers=len( ENSEMBLE_MEMBERS ), thread_name_prefix="ensemble" )
+
+
+def available_members ( bundle ) -> List[str] :
+    """Ensemble members present in a bundle, in ENSEMBLE_MEMBERS order."""
+    return [name for name, model_name in ENSEMBLE_MEMBERS.items() if model_name in bundle.models]
+
+
+def member_weights ( bundle, assets: List[str], members: List[str], weighting: str = "per_asset" ) -> np.ndarray :
+    """
+    Weights of every member for every requested asset.
+
+    Falls back to the global weights for unknown assets and to equal weights
+    when the bundle has no ensemble_weights.json or a member is missing from it.
+
+    Args:
+        bundle: Model bundle being served
+        assets: Asset of each window
+        members: Members taking part
+        weighting: "per_asset" or "mean"
+
+    Returns:
+        np.ndarray: Weights of shape (windows, members), rows summing to 1
+    """
+    equal = np.full( (len( assets ), len( members )), 1.0 / len( members ) )
+    weights = bundle.ensemble_weights
+    if weighting == "mean" or not weights or not set( members ) <= set( weights.get( "global", {} ) ) :
+        return equal
+
+    rows = []
+    for asset in assets :
+        asset_weights = weights.get( "per_asset", {} ).get( asset, weights["global"] )
+        rows.append( [asset_weights[name] for name in members] )
+
+    rows = np.asarray( rows, dtype=np.float64 )
+    return rows / rows.sum( axis=1, keepdims=True )
+
+
+def predict_ensemble ( bundle, X: np.ndarray, asset_ids: np.ndarray, assets: List[str],
+                       weighting: str = "per_asset" ) -> Tuple[np.ndarray, Dict[str, list]] :
+    """
+    Run all members concurrently on one stacked batch and combine their quantiles.
+
+    Args:
+        bundle: Model bundle being served
+        X: Scaled windows of shape (windows, seq_len, 1), at least as long as
+            the longest member's input; each member sees its newest steps
+        asset_ids: Encoded asset ids of shape (windows, 1)
+        assets: Asset name of each window
+        weighting: "per_asset" or "mean"
+
+    Returns:
+        tuple: (predictions of shape (windows, 3), {member: weight per window})
+
+    Raises:
+        ValueError: If the bundle has fewer than two members or weighting is unknown
+    """
+    if weighting not in ENSEMBLE_WEIGHTINGS :
+        raise ValueError( f"Unknown ensemble weighting '{weighting}'. Choose one of {list( ENSEMBLE_WEIGHTINGS )}" )
+
+    members = available_members( bundle )
+    if len( members ) < 2 :
+        raise ValueError( f"Ensemble not available in model version {bundle.version}. "
+                          "Run train_model.py --ensemble to train the members" )
+
+    def run ( name ) :
+        model_name = ENSEMBLE_MEMBERS[name]
+        window = X[:, -bundle.seq_lens[model_name]:]
+        outputs = bundle.models[model_name]( [window, asset_ids], training=False )
+        return np.concatenate( [np.asarray( output ).reshape( -1, 1 ) for output in outputs], axis=1 )
+
+    futures = [_executor.submit( run, name ) for name in members]
+    stacked = np.stack( [future.result() for future in futures] )  # (members, windows, 3)
+
+    weights = member_weights( bundle, assets, members, weighting )
+    combined = np.einsum( "mnq,nm->nq", stacked, weights )
+
+    return combined, {name : weights[:, m].tolist() for m, name in enumerate( members )}
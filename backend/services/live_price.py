@@ -1,8 +1,17 @@
+import time
 import yfinance as yf
-from typing import Optional
+import pandas as pd
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
 import requests
 
 REQUEST_TIMEOUT = 10
+MAX_FETCH_WORKERS = 8
+MAX_REQUEST_FETCHES = 4  # Fallback calls one fetch_quotes() call keeps in flight
+
+# Shared pool, so concurrent bulk requests together stay within MAX_FETCH_WORKERS upstream calls
+_executor = ThreadPoolExecutor( max_workers=MAX_FETCH_WORKERS, thread_name_prefix="live-price" )
 
 # Mapping of internal asset names to Yahoo Finance symbols
 SYMBOL_MAP = {
@@ -141,6 +150,121 @@ def get_live_price ( asset: str ) -> float :
         raise ValueError( f"Error fetching live price for '{asset}': {e}" )
 
 
+def _download_closes ( symbols: List[str], timeout: float = REQUEST_TIMEOUT ) -> Dict[str, float] :
+    """
+    Latest close of many Yahoo symbols in one grouped request.
+
+    During trading hours the current day's bar is the live price.
+
+    Args:
+        symbols: Yahoo Finance symbols
+        timeout: Request timeout in seconds
+
+    Returns:
+        dict: Symbol -> price, for the symbols that returned data
+    """
+    data = yf.download( symbols, period="5d", interval="1d", progress=False, threads=False,
+                        auto_adjust=False, timeout=timeout )
+    if data is None or data.empty :
+        return {}
+
+    close = data["Close"]
+    if isinstance( close, pd.Series ) :
+        close = close.to_frame( symbols[0] )
+
+    prices = {}
+    for symbol in symbols :
+        if symbol in close.columns :
+            series = close[symbol].dropna()
+            if len( series ) and series.iloc[-1] > 0 :
+                prices[symbol] = float( series.iloc[-1] )
+    return prices
+
+
+def fetch_quotes ( assets: list, timeout: float = REQUEST_TIMEOUT ) -> Tuple[Dict[str, float], Dict[str, str]] :
+    """
+    Fetch live prices for many assets concurrently.
+
+    All symbols are first requested together in one grouped download; any
+    symbol missing from it falls back to get_live_price() on the shared
+    pool of MAX_FETCH_WORKERS threads, with at most MAX_REQUEST_FETCHES of
+    this call's symbols in flight at once. Each fallback call gets `timeout`
+    seconds from when it starts running. yfinance calls cannot be
+    interrupted, so a call that overruns is reported and left to finish in
+    the background; if overrunning calls fill the pool and a symbol cannot
+    start within `timeout`, it and all later symbols are reported as
+    unavailable instead of being queued behind them.
+
+    Args:
+        assets: Asset identifiers
+        timeout: Seconds per upstream call
+
+    Returns:
+        tuple: (asset -> price, asset -> error message)
+    """
+    prices, errors = {}, {}
+    symbols = {}
+    for asset in dict.fromkeys( assets ) :
+        if asset in SYMBOL_MAP :
+            symbols[asset] = SYMBOL_MAP[asset]
+        else :
+            errors[asset] = f"Asset '{asset}' not found"
+
+    if symbols :
+        try :
+            closes = _download_closes( sorted( set( symbols.values() ) ), timeout )
+        except Exception :
+            closes = {}  # Every symbol falls back to a single-quote request below
+        for asset, symbol in symbols.items() :
+            if symbol in closes :
+                prices[asset] = closes[symbol]
+
+    remaining = deque( asset for asset in symbols if asset not in prices )
+    started = {}  # Asset -> monotonic time its call began, written by the worker
+
+    def fetch ( asset ) :
+        started[asset] = time.monotonic()
+        return get_live_price( asset )
+
+    in_flight = {}  # Future -> (asset, submitted at)
+    saturated = False
+    while remaining or in_flight :
+        while remaining and not saturated and len( in_flight ) < MAX_REQUEST_FETCHES :
+            asset = remaining.popleft()
+            in_flight[_executor.submit( fetch, asset )] = (asset, time.monotonic())
+        if saturated :
+            for asset in remaining :
+                errors[asset] = "Live price service busy, try again later"
+            remaining.clear()
+        if not in_flight :
+            break
+
+        # Running calls time out from their start, queued ones from their submission
+        next_deadline = min( started.get( asset, submitted ) for asset, submitted in in_flight.values() ) + timeout
+        done, _ = wait( in_flight, timeout=max( 0.0, next_deadline - time.monotonic() ),
+                        return_when=FIRST_COMPLETED )
+
+        now = time.monotonic()
+        for future, (asset, submitted) in list( in_flight.items() ) :
+            if future in done :
+                try :
+                    prices[asset] = future.result()
+                except Exception as e :
+                    errors[asset] = str( e )
+            elif asset in started :
+                if now - started[asset] < timeout :
+                    continue
+                errors[asset] = f"Timed out after {timeout:g}s"
+            elif now - submitted >= timeout and future.cancel() :
+                errors[asset] = "Live price service busy, try again later"
+                saturated = True
+            else :
+                continue
+            del in_flight[future]
+
+    return prices, errors
+
+
 def get_multiple_prices ( assets: list ) -> dict :
     """
     Fetch live prices for multiple Indian market assets.
@@ -149,19 +273,13 @@ def get_multiple_prices ( assets: list ) -> dict :
         assets: List of asset identifiers
 
     Returns:
-        dict: Mapping of asset -> price
+        dict: Mapping of asset -> price; assets that failed are left out
+            (use fetch_quotes() for the reasons)
     """
     if not assets :
         return {}
 
-    prices = {}
-    for asset in assets :
-        try :
-            prices[asset] = get_live_price( asset )
-        except Exception as e :
-            print( f"Error fetching price for {asset}: {e}" )
-            continue
-
+    prices, _ = fetch_quotes( assets )
     return prices
 
 
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.market_calendar import in_session
+
+MAX_TICKS = 2000  # Live observations kept per asset
+
+
+class LiveTickBuffer :
+    """
+    Recent live prices of every asset, kept in memory to extend stored history.
+
+    Each asset keeps a ring buffer of its last MAX_TICKS (timestamp, price)
+    observations, fed by every quote stored in the quote cache. When a
+    forecast window is assembled, the ticks newer than the last stored row
+    are grouped into bars of the history's spacing and appended to it, so
+    predictions see intraday moves before the next ingestion run. Quotes
+    are polled around the clock, but a closed market keeps returning its
+    last close, so only ticks inside the asset's trading sessions make bars.
+
+    Nothing is written to disk: the ingestion scripts rewrite the price files
+    from upstream history, which then covers the same bars, and ticks at or
+    before the last stored bar are ignored and dropped.
+    """
+
+    def __init__ ( self, max_ticks: int = MAX_TICKS ) :
+        self.max_ticks = max_ticks
+        self._ticks: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record ( self, asset: str, price: float, timestamp: Optional[float] = None ) :
+        """
+        Add a live observation.
+
+        Args:
+            asset: Asset identifier
+            price: Observed price
+            timestamp: Unix time of the observation (now if None)
+        """
+        if not price > 0 :
+            return
+        timestamp = time.time() if timestamp is None else float( timestamp )
+        with self._lock :
+            ticks = self._ticks.get( asset )
+            if ticks is None :
+                ticks = self._ticks[asset] = deque( maxlen=self.max_ticks )
+            if ticks and timestamp <= ticks[-1][0] :
+                return  # Out of order or repeated
+            ticks.append( (timestamp, float( price )) )
+
+    def record_quote ( self, asset: str, quote ) :
+        """Quote cache listener: record a stored Quote."""
+        self.record( asset, quote.price, quote.fetched_at )
+
+    def ticks ( self, asset: str ) -> List[Tuple[float, float]] :
+        """Buffered (timestamp, price) observations of an asset, oldest first."""
+        with self._lock :
+            return list( self._ticks.get( asset, () ) )
+
+    def has_ticks ( self, asset: str ) -> bool :
+        with self._lock :
+            return bool( self._ticks.get( asset ) )
+
+    def bars_after ( self, asset: str, last_timestamp, bar_seconds: float,
+                     last_close: Optional[float] = None ) -> np.ndarray :
+        """
+        Live ticks after the last stored row, as OHLCV bars.
+
+        Ticks are grouped into bars of bar_seconds aligned like the stored
+        timestamps (in their UTC offset, so daily bars follow the local
+        date). Only bars after the one holding last_timestamp are returned;
+        older ticks are dropped from the buffer.
+
+        Ticks outside the asset's sessions (weekends, outside trading hours,
+        see market_calendar.SESSIONS) are left out. Exchange holidays are not
+        in the calendar, so a bar whose ticks all equal the previous close is
+        taken as a closed market repeating that close and left out as well.
+
+        Args:
+            asset: Asset identifier
+            last_timestamp: Timestamp of the last stored row
+            bar_seconds: Spacing of the stored rows
+            last_close: Close of the last stored row
+
+        Returns:
+            np.ndarray: (bars, 5) Open/High/Low/Close/Volume, oldest first;
+                volume is NaN as live quotes carry none
+        """
+        last = pd.Timestamp( last_timestamp )
+        offset = last.utcoffset().total_seconds() if last.tzinfo is not None else 0.0
+        if last.tzinfo is None :
+            last = last.tz_localize( "UTC" )
+        last_bar = np.floor( (last.timestamp() + offset) / bar_seconds )
+
+        with self._lock :
+            ticks = self._ticks.get( asset )
+            if not ticks :
+                return np.empty( (0, 5) )
+            # Ticks in bars the history already covers will not be needed again
+            while ticks and np.floor( (ticks[0][0] + offset) / bar_seconds ) <= last_bar :
+                ticks.popleft()
+            observed = np.array( ticks, dtype=np.float64 ).reshape( -1, 2 )
+
+        observed = observed[in_session( asset, observed[:, 0] )]
+        if not len( observed ) :
+            return np.empty( (0, 5) )
+
+        bar_ids = np.floor( (observed[:, 0] + offset) / bar_seconds )
+        starts = np.flatnonzero( np.r_[True, bar_ids[1 :] != bar_ids[:-1]] )
+        prices = observed[:, 1]
+        bars = np.column_stack( [
+            prices[starts],
+            np.maximum.reduceat( prices, starts ),
+            np.minimum.reduceat( prices, starts ),
+            prices[np.r_[starts[1 :], len( prices )] - 1],
+            np.full( len( starts ), np.nan ),
+        ] )
+
+        keep = np.ones( len( bars ), dtype=bool )
+        previous = last_close
+        for i, (open_, high, low, close, _) in enumerate( bars ) :
+            if previous is not None and open_ == high == low == close == previous :
+                keep[i] = False
+            else :
+                previous = close
+        return bars[keep]
+
+
+# Shared buffer, fed by the quote cache (registered in main.py) and read by the predictor
+live_ticks = LiveTickBuffer()
@@ -0,0 +1,163 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from services.coins import get_asset_category
+
+SECONDS_PER_DAY = 86400
+DAYS_PER_YEAR = 365.25  # Calendar days; rows per year of calendar-day grids (PriceMatrixCache.daily_matrix)
+
+# Trading days per year and hours per trading day of each market, measured
+# from the stored histories. bar_seconds is the row spacing assumed when a
+# file has no timestamps: crypto files come from CoinGecko's market_chart,
+# which returns hourly points for the 90-day range fetch_data.py requests.
+CALENDARS = {
+    "nse" : {"trading_days" : 248, "session_hours" : 6.25, "bar_seconds" : SECONDS_PER_DAY},
+    "futures" : {"trading_days" : 252, "session_hours" : 23, "bar_seconds" : SECONDS_PER_DAY},
+    "fx" : {"trading_days" : 260, "session_hours" : 24, "bar_seconds" : SECONDS_PER_DAY},
+    "crypto" : {"trading_days" : 365, "session_hours" : 24, "bar_seconds" : 3600},
+}
+
+# When each market is open, for telling live quotes of a session from quotes
+# of a closed market (which keep repeating the last close). Weekdays count
+# from Monday = 0; hours are local to the timezone, None for round the clock.
+SESSIONS = {
+    "nse" : {"timezone" : "Asia/Kolkata", "weekdays" : (0, 1, 2, 3, 4), "hours" : ("09:15", "15:30")},
+    "futures" : {"timezone" : "America/New_York", "weekdays" : (0, 1, 2, 3, 4), "hours" : None},
+    "fx" : {"timezone" : "UTC", "weekdays" : (0, 1, 2, 3, 4), "hours" : None},
+    "crypto" : {"timezone" : "UTC", "weekdays" : (0, 1, 2, 3, 4, 5, 6), "hours" : None},
+}
+
+# Categories not listed here trade on NSE; uncategorised assets are crypto
+CATEGORY_CALENDARS = {
+    "commodities" : "futures",
+    "currency" : "fx",
+}
+
+
+def get_calendar ( asset: str ) -> str :
+    """
+    Trading calendar of an asset.
+
+    Args:
+        asset: Asset identifier
+
+    Returns:
+        str: Key of CALENDARS
+    """
+    category = get_asset_category( asset )
+    if category is None :
+        return "crypto"
+    return CATEGORY_CALENDARS.get( category, "nse" )
+
+
+def in_session ( asset: str, times ) -> np.ndarray :
+    """
+    Whether the asset's market is open at each time.
+
+    Only weekdays and session hours are known, not exchange holidays.
+
+    Args:
+        asset: Asset identifier
+        times: Unix times
+
+    Returns:
+        np.ndarray: Boolean mask
+    """
+    session = SESSIONS[get_calendar( asset )]
+    local = pd.to_datetime( np.asarray( times, dtype=np.float64 ), unit="s", utc=True ).tz_convert( session["timezone"] )
+    is_open = np.isin( local.weekday, session["weekdays"] )
+    if session["hours"] is not None :
+        opens, closes = (int( h ) * 60 + int( m ) for h, m in (t.split( ":" ) for t in session["hours"]))
+        minutes = np.asarray( local.hour * 60 + local.minute )
+        is_open &= (minutes >= opens) & (minutes < closes)
+    return np.asarray( is_open )
+
+
+def infer_bar_seconds ( timestamps ) -> Optional[float] :
+    """
+    Typical spacing of rows, as the median gap between timestamps.
+
+    The median ignores weekend and holiday gaps in daily data.
+
+    Args:
+        timestamps: Timestamp strings or datetimes, oldest first
+
+    Returns:
+        float: Seconds between rows, or None if it cannot be determined
+    """
+    if timestamps is None or len( timestamps ) < 2 :
+        return None
+    try :
+        parsed = pd.to_datetime( pd.Series( timestamps ), utc=True )
+    except (ValueError, TypeError) :
+        return None
+
+    gaps = parsed.diff().dt.total_seconds().to_numpy()[1 :]
+    gaps = gaps[np.isfinite( gaps ) & (gaps > 0)]
+    return float( np.median( gaps ) ) if len( gaps ) else None
+
+
+def local_days ( timestamps ) -> np.ndarray :
+    """
+    Calendar date of each timestamp in its own UTC offset.
+
+    A daily NSE bar stamped 2025-12-26 00:00+05:30 belongs to 26 December
+    even though that is still the 25th in UTC, so the date is read before
+    any timezone conversion.
+
+    Args:
+        timestamps: Timestamp strings like "2025-12-26 00:00:00+05:30"
+
+    Returns:
+        np.ndarray: Days since 1970-01-01 (int64), -1 where unparseable
+    """
+    dates = pd.to_datetime( pd.Series( timestamps ).astype( str ).str[:10], format="%Y-%m-%d", errors="coerce" )
+    days = dates.to_numpy( dtype="datetime64[D]" ).astype( np.int64 )
+    return np.where( dates.isna().to_numpy(), -1, days )
+
+
+def spaced_days ( rows: int, end_time: float, bar_seconds: float ) -> np.ndarray :
+    """
+    UTC dates of evenly spaced rows whose last row is at end_time.
+
+    For files without timestamps (the crypto histories), whose points end
+    when they were fetched.
+
+    Args:
+        rows: Number of rows
+        end_time: Unix time of the last row, e.g. the file's modification time
+        bar_seconds: Row spacing
+
+    Returns:
+        np.ndarray: Days since 1970-01-01 (int64)
+    """
+    times = end_time - bar_seconds * np.arange( rows - 1, -1, -1 )
+    return np.floor( times / SECONDS_PER_DAY ).astype( np.int64 )
+
+
+def periods_per_year ( asset: str, bar_seconds: Optional[float] = None ) -> float :
+    """
+    Number of rows per year, for annualising per-row returns.
+
+    Daily rows count trading days and intraday rows count the bars that fit
+    in each trading session; weekly or coarser rows count calendar time.
+
+    Args:
+        asset: Asset identifier
+        bar_seconds: Row spacing, e.g. from infer_bar_seconds(); defaults
+            to the calendar's usual spacing
+
+    Returns:
+        float: Rows per year
+    """
+    calendar = CALENDARS[get_calendar( asset )]
+    if bar_seconds is None :
+        bar_seconds = calendar["bar_seconds"]
+
+    if bar_seconds > 1.5 * SECONDS_PER_DAY :
+        return DAYS_PER_YEAR * SECONDS_PER_DAY / bar_seconds
+
+    bars_per_session = max( 1.0, calendar["session_hours"] * 3600 / bar_seconds )
+    return calendar["trading_days"] * bars_per_session
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import joblib
+import numpy as np
+import tensorflow as tf
+
+from model.registry import REGISTRY_DIR, CURRENT_POINTER, MANIFEST_FILE, file_sha256, version_dir
+from model.streaming_scaler import load_scalers
+
+# Artifacts served before the registry existed, used until a version is published
+LEGACY_VERSION = "legacy"
+LEGACY_FILES = {
+    "model.keras" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_transformer.keras",
+    "student.keras" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_student.keras",
+    "coin_scalers.pkl" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/coin_scalers.pkl",
+    "coin_scalers.npz" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/coin_scalers.npz",
+    "encoder.pkl" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/encoder.pkl",
+    "features.json" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/features.json",
+    "lstm.keras" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_lstm.keras",
+    "cnn_lstm.keras" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_cnn_lstm.keras",
+    "ensemble_weights.json" : "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/ensemble_weights.json"
+}
+
+# Bundle file -> model name served by the predictor
+MODEL_FILES = {
+    "model.keras" : "teacher",
+    "student.keras" : "student",
+    "lstm.keras" : "lstm",
+    "cnn_lstm.keras" : "cnn_lstm"
+}
+
+WATCH_INTERVAL_SECONDS = 5.0
+DEFAULT_SEQ_LEN = 30
+DEFAULT_FEATURES = ("close",)
+
+
+def quantile_loss ( q ) :
+    """Quantile loss function, needed to deserialize saved models."""
+
+    def loss ( y_true, y_pred ) :
+        error = y_true - y_pred
+        return tf.reduce_mean( tf.maximum( q * error, (q - 1) * error ) )
+
+    return loss
+
+
+class ModelBundle :
+    """
+    Model(s), coin scalers and encoder from one training run, fully loaded.
+
+    A bundle is never mutated after construction; a new version always means
+    a new bundle, so a request holding a reference keeps a consistent view.
+    """
+
+    def __init__ ( self, version: str, files: Dict[str, str], manifest: Optional[dict] = None ) :
+        self.version = version
+        self.manifest = manifest or {}
+        self.loaded_at = time.time()
+
+        custom_objects = {
+            'quantile_loss' : quantile_loss,
+            'loss' : quantile_loss( 0.5 )
+        }
+        self.models = {}
+        for file_name, model_name in MODEL_FILES.items() :
+            path = files.get( file_name )
+            if path and os.path.exists( path ) :
+                self.models[model_name] = tf.keras.models.load_model( path, custom_objects=custom_objects, compile=False )
+
+        if "teacher" not in self.models :
+            raise FileNotFoundError( f"Model file missing from version {version}" )
+
+        # Input window of every model; long-context models need more history
+        self.seq_lens = {name : int( model.inputs[0].shape[1] or DEFAULT_SEQ_LEN )
+                         for name, model in self.models.items()}
+
+        # Input channels and scaler kind the models were trained with
+        preprocessing = {}
+        features_path = files.get( "features.json" )
+        if features_path and os.path.exists( features_path ) :
+            with open( features_path ) as f :
+                preprocessing = json.load( f )
+        self.features = tuple( preprocessing.get( "features", DEFAULT_FEATURES ) )
+
+        # Streaming scalers are stored as arrays, RobustScalers as a pickle
+        streaming_path = files.get( "coin_scalers.npz" )
+        if streaming_path and os.path.exists( streaming_path ) and (
+                preprocessing.get( "scaler" ) == "streaming" or "coin_scalers.pkl" not in files) :
+            self.coin_scalers = load_scalers( streaming_path )
+        else :
+            self.coin_scalers = joblib.load( files["coin_scalers.pkl"] )
+        self.coin_encoder = joblib.load( files["encoder.pkl"] )
+
+        # Optional per-asset weights for the ensemble members
+        self.ensemble_weights = None
+        weights_path = files.get( "ensemble_weights.json" )
+        if weights_path and os.path.exists( weights_path ) :
+            with open( weights_path ) as f :
+                self.ensemble_weights = json.load( f )
+
+    def warm_up ( self ) :
+        """Run every model once so the first real request does not pay for it."""
+        coin_id = np.zeros( (1, 1), dtype=np.int32 )
+        for name, model in self.models.items() :
+            X = np.zeros( (1, self.seq_lens[name], len( self.features )), dtype=np.float32 )
+            model( [X, coin_id], training=False )
+
+    def info ( self ) -> dict :
+        """Summary used by the API."""
+        return {
+            "version" : self.version,
+            "loaded_at" : self.loaded_at,
+            "models" : sorted( self.models ),
+            "seq_lens" : self.seq_lens,
+            "features" : list( self.features ),
+            "assets" : len( self.coin_encoder ),
+            "metadata" : self.manifest.get( "metadata", {} )
+        }
+
+
+def load_version ( version: str, registry_dir: str = REGISTRY_DIR ) -> ModelBundle :
+    """
+    Load and verify one published version.
+
+    Raises:
+        ValueError: If a file does not match the manifest checksum
+    """
+    directory = version_dir( version, registry_dir )
+    with open( os.path.join( directory, MANIFEST_FILE ) ) as f :
+        manifest = json.load( f )
+
+    files = {}
+    for name, checksum in manifest["files"].items() :
+        path = os.path.join( directory, name )
+        if file_sha256( path ) != checksum :
+            raise ValueError( f"Checksum mismatch for {name} in model version {version}" )
+        files[name] = path
+
+    return ModelBundle( version, files, manifest )
+
+
+class ModelRegistry :
+    """
+    Serves the bundle named by the registry's CURRENT pointer.
+
+    current() returns an immutable bundle. A watcher thread polls CURRENT and,
+    when it changes, loads and warms the new bundle completely before
+    replacing the reference, so requests in flight finish on the old bundle
+    and new requests see the new one; none are dropped or see a mix of
+    artifacts. If loading fails the old bundle keeps serving.
+    """
+
+    def __init__ ( self, registry_dir: str = REGISTRY_DIR, interval: float = WATCH_INTERVAL_SECONDS ) :
+        self.registry_dir = registry_dir
+        self.interval = interval
+        self._bundle = None
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._failed_version = None
+        self.last_error = None
+
+    def _current_version ( self ) -> Optional[str] :
+        pointer = os.path.join( self.registry_dir, CURRENT_POINTER )
+        if not os.path.exists( pointer ) :
+            return None
+        with open( pointer ) as f :
+            return f.read().strip() or None
+
+    def _load ( self, version: Optional[str] ) -> ModelBundle :
+        if version is None :
+            bundle = ModelBundle( LEGACY_VERSION, LEGACY_FILES )
+        else :
+            bundle = load_version( version, self.registry_dir )
+        bundle.warm_up()
+        return bundle
+
+    def refresh ( self ) -> bool :
+        """
+        Load the CURRENT version if it differs from the one being served.
+
+        Returns:
+            bool: True if a new bundle was swapped in
+        """
+        with self._load_lock :
+            version = self._current_version()
+            served = self._bundle.version if self._bundle else None
+            target = version or LEGACY_VERSION
+            if target == served or target == self._failed_version :
+                return False
+
+            try :
+                bundle = self._load( version )
+            except Exception as e :
+                # Not retried until CURRENT points somewhere else
+                self._failed_version = target
+                self.last_error = f"{target}: {e}"
+                print( f"⚠️ Could not load model version {target}: {e}" )
+                return False
+
+            # Single reference assignment: the swap is atomic for readers
+            self._bundle = bundle
+            self._failed_version = None
+            self.last_error = None
+            print( f"✅ Serving model version {bundle.version} (previous: {served})" )
+            return True
+
+    def current ( self ) -> Optional[ModelBundle] :
+        """The bundle to serve, loading it on first use."""
+        bundle = self._bundle
+        if bundle is None :
+            self.refresh()
+            bundle = self._bundle
+        return bundle
+
+    def current_version ( self ) -> Optional[str] :
+        """Version being served, or None if nothing is loaded."""
+        bundle = self._bundle
+        return bundle.version if bundle else None
+
+    def start_watcher ( self ) :
+        """Poll CURRENT in a background thread and hot-swap new versions."""
+        if self._watcher is not None :
+            return
+
+        def watch () :
+            while not self._stop.wait( self.interval ) :
+                try :
+                    self.refresh()
+                except Exception as e :
+                    print( f"⚠️ Model watcher error: {e}" )
+
+        self._watcher = threading.Thread( target=watch, name="model-registry-watcher", daemon=True )
+        self._watcher.start()
+
+    def stop_watcher ( self ) :
+        self._stop.set()
+
+
+# Shared registry used by the predictor and the API
+registry = ModelRegistry()
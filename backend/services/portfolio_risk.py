@@ -0,0 +1,267 @@
+import threading
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.coins import get_assets_with_data
+from services.market_calendar import DAYS_PER_YEAR
+from services.risk_engine import PriceMatrixCache, price_matrix_cache
+
+DEFAULT_DECAY = 0.94  # RiskMetrics daily decay
+MAX_SIMULATIONS = 10000
+SIMULATION_SEED = 42
+
+
+class EwmaCovariance :
+    """
+    Exponentially weighted covariance of date-aligned daily returns.
+
+    Uses the zero-mean RiskMetrics recursion cov = decay * cov + (1 - decay) * r r',
+    applied per pair only on rows where both assets have a return, so assets
+    with shorter histories do not drag their pairs towards zero. The sum of
+    the weights is tracked per pair and divided out, which removes the bias
+    while a pair has only a few observations.
+    """
+
+    def __init__ ( self, num_assets: int, decay: float = DEFAULT_DECAY ) :
+        if not 0 < decay < 1 :
+            raise ValueError( "Decay must be between 0 and 1" )
+        self.decay = decay
+        self._products = np.zeros( (num_assets, num_assets) )
+        self._weights = np.zeros( (num_assets, num_assets) )
+
+    def update ( self, returns: np.ndarray ) :
+        """
+        Absorb new rows of returns.
+
+        Args:
+            returns: (rows, assets) returns, oldest first, NaN where an asset
+                has no return on that row
+        """
+        for row in np.atleast_2d( returns ) :
+            valid = ~np.isnan( row )
+            if not valid.any() :
+                continue
+            values = np.where( valid, row, 0.0 )
+            pairs = np.outer( valid, valid )
+            factor = np.where( pairs, self.decay, 1.0 )
+            self._products = self._products * factor + (1 - self.decay) * np.outer( values, values )
+            self._weights = self._weights * factor + (1 - self.decay) * pairs
+
+    def copy ( self ) -> "EwmaCovariance" :
+        clone = EwmaCovariance( len( self._products ), self.decay )
+        clone._products = self._products.copy()
+        clone._weights = self._weights.copy()
+        return clone
+
+    def covariance ( self ) -> np.ndarray :
+        """Daily covariance matrix, NaN for pairs that never overlapped."""
+        with np.errstate( divide="ignore", invalid="ignore" ) :
+            return np.where( self._weights > 0, self._products / self._weights, np.nan )
+
+
+def _factor ( cov: np.ndarray ) -> np.ndarray :
+    """Matrix L with L L' = cov; falls back to clipped eigenvalues if cov is not positive definite."""
+    try :
+        return np.linalg.cholesky( cov )
+    except np.linalg.LinAlgError :
+        eigenvalues, eigenvectors = np.linalg.eigh( cov )
+        return eigenvectors * np.sqrt( np.maximum( eigenvalues, 0.0 ) )
+
+
+def parametric_var_cvar ( cov: np.ndarray, weights: np.ndarray, confidence: float = 0.95,
+                          horizon_days: int = 1 ) -> Tuple[np.ndarray, np.ndarray] :
+    """
+    Gaussian VaR and CVaR of one or many portfolios.
+
+    Args:
+        cov: (assets, assets) daily covariance
+        weights: (portfolios, assets) or (assets,) weights
+        confidence: Confidence level
+        horizon_days: Holding period; variance scales linearly with it
+
+    Returns:
+        tuple: (var, cvar) per portfolio, as negative returns like var_cvar()
+    """
+    weights = np.atleast_2d( weights )
+    sigma = np.sqrt( np.einsum( "pi,ij,pj->p", weights, cov, weights ) * horizon_days )
+    normal = NormalDist()
+    z = normal.inv_cdf( 1 - confidence )
+    return z * sigma, -sigma * normal.pdf( z ) / (1 - confidence)
+
+
+def monte_carlo_var_cvar ( normals: np.ndarray, cov: np.ndarray, weights: np.ndarray,
+                           confidence: float = 0.95, horizon_days: int = 1 ) -> Tuple[np.ndarray, np.ndarray] :
+    """
+    Simulated VaR and CVaR of one or many portfolios.
+
+    Correlated asset returns are normals @ L' with L L' = cov, so the
+    portfolio returns of every portfolio are one matrix product
+    normals @ (weights @ L)' instead of simulating each asset separately.
+
+    Args:
+        normals: (simulations, assets) standard normal draws
+        cov: (assets, assets) daily covariance
+        weights: (portfolios, assets) or (assets,) weights
+        confidence: Confidence level
+        horizon_days: Holding period
+
+    Returns:
+        tuple: (var, cvar) per portfolio, as negative returns
+    """
+    weights = np.atleast_2d( weights )
+    simulated = normals @ (weights @ _factor( cov )).T * np.sqrt( horizon_days )
+    var = np.quantile( simulated, 1 - confidence, axis=0 )
+    tail = simulated <= var
+    cvar = np.where( tail, simulated, 0.0 ).sum( axis=0 ) / tail.sum( axis=0 )
+    return var, cvar
+
+
+class PortfolioRiskTracker :
+    """
+    Covariance of every asset with data, kept current without re-reading history.
+
+    Returns come from PriceMatrixCache.daily_matrix(), which puts every asset
+    on one calendar-day grid: rows of different assets are paired by date,
+    and hourly crypto histories become daily closes first. Every grid day
+    except the newest is final, so those returns are absorbed into the
+    covariance once; the newest day (possibly still trading) is applied to
+    a copy on each refresh. A catalog change or a rewritten history
+    rebuilds it. Standard normal draws are generated once per rebuild, so
+    Monte Carlo results are stable between calls and a query costs a few
+    matrix products.
+    """
+
+    def __init__ ( self, cache: PriceMatrixCache = price_matrix_cache, decay: float = DEFAULT_DECAY ) :
+        self.cache = cache
+        self.decay = decay
+        self.assets: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._start_day: Optional[int] = None
+        self._prices: Optional[np.ndarray] = None  # Grid rows absorbed into _committed
+        self._committed: Optional[EwmaCovariance] = None
+        self._covariance: Optional[EwmaCovariance] = None
+        self._normals: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _is_extension ( self, days: np.ndarray, prices: np.ndarray, assets: List[str] ) -> bool :
+        if self._committed is None or assets != self.assets or not len( days ) or days[0] != self._start_day :
+            return False
+        absorbed = len( self._prices )
+        return len( prices ) >= absorbed and np.array_equal( prices[:absorbed], self._prices, equal_nan=True )
+
+    def refresh ( self ) :
+        """Absorb new prices, rebuilding only if the catalog or a history changed."""
+        days, prices, assets = self.cache.daily_matrix( get_assets_with_data() )
+
+        with self._lock :
+            if not self._is_extension( days, prices, assets ) :
+                self.assets = assets
+                self._index = {asset : i for i, asset in enumerate( self.assets )}
+                self._start_day = int( days[0] ) if len( days ) else None
+                self._prices = prices[:1]
+                self._committed = EwmaCovariance( len( self.assets ), self.decay )
+                rng = np.random.default_rng( SIMULATION_SEED )
+                self._normals = rng.standard_normal( (MAX_SIMULATIONS, len( self.assets )) )
+
+            with np.errstate( divide="ignore", invalid="ignore" ) :
+                returns = np.diff( prices, axis=0 ) / prices[:-1]
+
+            # Returns up to the second newest day are final; the newest may still change
+            absorbed = len( self._prices )
+            final = max( len( prices ) - 1, absorbed )
+            self._committed.update( returns[absorbed - 1 : final - 1] )
+            self._prices = prices[:final]
+
+            self._covariance = self._committed.copy()
+            self._covariance.update( returns[final - 1 :] )
+
+    def risk ( self, weights: Dict[str, float], confidence: float = 0.95, horizon_days: int = 1,
+               simulations: int = MAX_SIMULATIONS ) -> dict :
+        """
+        Parametric and Monte Carlo VaR/CVaR of a portfolio.
+
+        Args:
+            weights: Asset -> weight; normalised to sum to 1
+            confidence: Confidence level
+            horizon_days: Holding period in calendar days
+            simulations: Number of Monte Carlo draws (at most MAX_SIMULATIONS)
+
+        Returns:
+            dict: Normalised weights, annualised volatility and VaR/CVaR in
+                percent, rounded like calculate_all_risk_metrics(); the grid has
+                one row per calendar day, so volatility is annualised with
+                DAYS_PER_YEAR whatever the assets' trading calendars
+
+        Raises:
+            ValueError: On invalid weights or parameters, or unknown assets
+        """
+        if not 0 < confidence < 1 :
+            raise ValueError( "Confidence must be between 0 and 1" )
+        if horizon_days < 1 :
+            raise ValueError( "Horizon must be at least 1 day" )
+        if not 1 <= simulations <= MAX_SIMULATIONS :
+            raise ValueError( f"Simulations must be between 1 and {MAX_SIMULATIONS}" )
+        if not weights :
+            raise ValueError( "Portfolio has no assets" )
+        if any( w < 0 for w in weights.values() ) :
+            raise ValueError( "Weights must not be negative" )
+        total = sum( weights.values() )
+        if total <= 0 :
+            raise ValueError( "Weights must sum to more than 0" )
+
+        with self._lock :
+            missing = [asset for asset in weights if asset not in self._index]
+            if missing :
+                raise ValueError( f"No price data for: {missing}" )
+
+            columns = [self._index[asset] for asset in weights]
+            cov = self._covariance.covariance()[np.ix_( columns, columns )]
+            normals = self._normals[:simulations, columns]
+
+        if np.isnan( cov ).any() :
+            raise ValueError( "Some assets in the portfolio have no overlapping history" )
+
+        w = np.array( list( weights.values() ), dtype=np.float64 ) / total
+        daily_vol = float( np.sqrt( w @ cov @ w ) )
+        var, cvar = parametric_var_cvar( cov, w, confidence, horizon_days )
+        mc_var, mc_cvar = monte_carlo_var_cvar( normals, cov, w, confidence, horizon_days )
+
+        return {
+            "weights" : {asset : round( float( value ), 4 ) for asset, value in zip( weights, w )},
+            "confidence" : confidence,
+            "horizon_days" : horizon_days,
+            "volatility" : round( float( daily_vol * np.sqrt( DAYS_PER_YEAR ) ) * 100, 2 ),
+            "parametric" : {
+                "var" : round( float( var[0] ) * 100, 2 ),
+                "cvar" : round( float( cvar[0] ) * 100, 2 ),
+            },
+            "monte_carlo" : {
+                "var" : round( float( mc_var[0] ) * 100, 2 ),
+                "cvar" : round( float( mc_cvar[0] ) * 100, 2 ),
+                "simulations" : simulations,
+            },
+        }
+
+
+# Shared tracker used by the API
+portfolio_tracker = PortfolioRiskTracker()
+
+
+def calculate_portfolio_risk ( weights: Dict[str, float], confidence: float = 0.95, horizon_days: int = 1,
+                               simulations: int = MAX_SIMULATIONS ) -> dict :
+    """
+    Portfolio VaR/CVaR from the shared covariance, refreshed with any new prices first.
+
+    Args:
+        weights: Asset -> weight
+        confidence: Confidence level
+        horizon_days: Holding period in calendar days
+        simulations: Number of Monte Carlo draws
+
+    Returns:
+        dict: See PortfolioRiskTracker.risk()
+    """
+    portfolio_tracker.refresh()
+    return portfolio_tracker.risk( weights, confidence, horizon_days, simulations )
@@ -1,68 +1,33 @@
 import os
 import numpy as np
 import pandas as pd
-import joblib
-import tensorflow as tf
 
-MODEL_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/saved/crypto_transformer.keras"
-SCALER_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/scalers/coin_scalers.pkl"
-ENCODER_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/encoders/encoder.pkl"
-DATA_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/data"
-SEQ_LEN = 30
-
-
-def quantile_loss ( q ) :
-    """Quantile loss function for model compilation."""
+from services.model_registry import registry
+from services.ensemble import ENSEMBLE_MEMBERS, available_members, predict_ensemble
+from services.volatility import volatility_forecaster
+from services.live_ticks import live_ticks
+from services.market_calendar import DAYS_PER_YEAR, infer_bar_seconds, periods_per_year
+from model.features import extend_features, build_feature_series
+from model.vol_forecast import scale_quantiles
 
-    def loss ( y_true, y_pred ) :
-        error = y_true - y_pred
-        return tf.reduce_mean( tf.maximum( q * error, (q - 1) * error ) )
+DATA_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/data"
 
-    return loss
+# Models that can be selected per request
+MODEL_TYPES = ("teacher", "student", "ensemble")
 
 
-# Load model and preprocessing artifacts once
-try :
-    # Load with custom objects for quantile loss
-    custom_objects = {
-        'quantile_loss' : quantile_loss,
-        'loss' : quantile_loss( 0.5 )  # Default loss
-    }
-    model = tf.keras.models.load_model( MODEL_PATH, custom_objects=custom_objects, compile=False )
-
-    # Recompile with quantile losses
-    model.compile(
-        optimizer=tf.keras.optimizers.Adam( learning_rate=0.001 ),
-        loss={
-            "q10" : quantile_loss( 0.1 ),
-            "q50" : quantile_loss( 0.5 ),
-            "q90" : quantile_loss( 0.9 ),
-        }
-    )
-
-    scaler = joblib.load( SCALER_PATH )
-    asset_encoder = joblib.load( ENCODER_PATH )
-    print( "✅ Model and preprocessing artifacts loaded successfully" )
-except FileNotFoundError as e :
-    print( f"⚠️ File not found: {e}" )
-    print( "Please train the model first by running train_model.py" )
-    model = None
-    scaler = None
-    asset_encoder = None
-except Exception as e :
-    print( f"⚠️ Error loading model artifacts: {e}" )
-    model = None
-    scaler = None
-    asset_encoder = None
-
-
-def predict_price ( asset: str, days_ahead: int = 1 ) :
+def predict_price ( asset: str, days_ahead: int = 1, model_type: str = "teacher",
+                    ensemble_weighting: str = "per_asset" ) :
     """
     Predict future price for an Indian market asset using quantile regression.
 
     Args:
         asset: Asset identifier (e.g., 'nifty50', 'reliance', 'gold')
         days_ahead: Number of days into the future to predict (1-30)
+        model_type: "teacher" for the full transformer, "student" for the
+            distilled low-latency model, or "ensemble" for the combined
+            transformer / LSTM / CNN-LSTM
+        ensemble_weighting: "per_asset" or "mean" (ensemble only)
 
     Returns:
         dict: Predictions with q10 (conservative), q50 (expected), q90 (optimistic)
@@ -71,12 +36,25 @@ def predict_price ( asset: str, days_ahead: int = 1 ) :
         ValueError: If asset not found or insufficient data
         RuntimeError: If model not loaded
     """
+    # One bundle for the whole request, even if a new version is swapped in meanwhile
+    bundle = registry.current()
+
     # Validate model is loaded
-    if model is None or scaler is None or asset_encoder is None :
+    if bundle is None :
         raise RuntimeError(
             "Model not loaded. Please train the model first by running train_model.py"
         )
 
+    if model_type not in MODEL_TYPES :
+        raise ValueError( f"Unknown model '{model_type}'. Choose one of {list( MODEL_TYPES )}" )
+
+    if model_type == "student" and model_type not in bundle.models :
+        raise ValueError( f"Student model not available in version {bundle.version}. "
+                          "Run distill.py to create it" )
+
+    scaler = bundle.coin_scalers
+    asset_encoder = bundle.coin_encoder
+
     # Validate asset exists
     if asset not in asset_encoder :
         available = list( asset_encoder.keys() )[:10]
@@ -105,9 +83,22 @@ def predict_price ( asset: str, days_ahead: int = 1 ) :
     except Exception as e :
         raise ValueError( f"Error reading data for '{asset}': {e}" )
 
-    if len( prices ) < SEQ_LEN :
+    # Live prices newer than the stored history are appended as extra bars
+    bar_seconds = _bar_seconds( df )
+    live_bars = _live_bars( asset, df, bar_seconds )
+    if len( live_bars ) :
+        prices = np.concatenate( [prices, live_bars[:, 3 :4]] )
+
+    # Window length of the selected model(s); long-context models need more history
+    if model_type == "ensemble" :
+        seq_len = max( [bundle.seq_lens[ENSEMBLE_MEMBERS[name]] for name in available_members( bundle )],
+                       default=bundle.seq_lens["teacher"] )
+    else :
+        seq_len = bundle.seq_lens[model_type]
+
+    if len( prices ) < seq_len :
         raise ValueError(
-            f"Not enough data for '{asset}'. Need at least {SEQ_LEN} data points, got {len( prices )}"
+            f"Not enough data for '{asset}'. Need at least {seq_len} data points, got {len( prices )}"
         )
 
     # Get asset-specific scaler
@@ -124,13 +115,28 @@ def predict_price ( asset: str, days_ahead: int = 1 ) :
     except Exception as e :
         raise ValueError( f"Error scaling prices for '{asset}': {e}" )
 
-    X = prices_scaled[-SEQ_LEN :].reshape( 1, SEQ_LEN, 1 )
+    # Extra input channels come from the asset's feature cache, updated for appended rows only
+    if len( bundle.features ) > 1 :
+        try :
+            feature_matrix = extend_features( path, df, live_bars )
+            prices_scaled = build_feature_series( prices_scaled, feature_matrix, bundle.features )
+        except Exception as e :
+            raise ValueError( f"Error computing features for '{asset}': {e}" )
+
+    X = prices_scaled[-seq_len :].reshape( 1, seq_len, len( bundle.features ) )
     asset_id = np.array( [[asset_encoder[asset]]], dtype=np.int32 )
 
-    # Make prediction
+    # Make prediction (direct call; predict() adds per-call overhead for one window)
+    ensemble_weights = None
     try :
-        predictions = model.predict( [X, asset_id], verbose=0 )
-        q10, q50, q90 = predictions
+        if model_type == "ensemble" :
+            combined, ensemble_weights = predict_ensemble( bundle, X, asset_id, [asset], ensemble_weighting )
+            q10, q50, q90 = combined[:, 0], combined[:, 1], combined[:, 2]
+        else :
+            predictions = bundle.models[model_type]( [X, asset_id], training=False )
+            q10, q50, q90 = [np.asarray( p ) for p in predictions]
+    except ValueError :
+        raise
     except Exception as e :
         raise ValueError( f"Prediction failed for '{asset}': {e}" )
 
@@ -145,39 +151,11 @@ def predict_price ( asset: str, days_ahead: int = 1 ) :
     # Get current price
     current_price = float( prices[-1][0] )
 
-    # Adjust predictions based on days_ahead with bounds checking
-    if days_ahead > 1 :
-        # Volatility scales with square root of time (standard finance assumption)
-        scale_factor = np.sqrt( days_ahead )
-
-        # Cap scale factor to prevent unrealistic predictions
-        max_scale = np.sqrt( 30 )  # Maximum reasonable scale
-        scale_factor = min( scale_factor, max_scale )
-
-        # Calculate price changes
-        q10_change = (q10 - current_price) * scale_factor
-        q50_change = (q50 - current_price) * scale_factor
-        q90_change = (q90 - current_price) * scale_factor
-
-        # Apply scaled changes
-        q10 = current_price + q10_change
-        q50 = current_price + q50_change
-        q90 = current_price + q90_change
-
-        # Ensure predictions maintain proper ordering and reasonable bounds
-        # Predictions should not be negative
-        q10 = max( 0.01, q10 )
-        q50 = max( 0.01, q50 )
-        q90 = max( 0.01, q90 )
-
-        # Ensure proper quantile ordering (q10 < q50 < q90)
-        q10 = min( q10, q50 * 0.95 )
-        q90 = max( q90, q50 * 1.05 )
-
-        # Prevent extreme predictions (more than 50% change seems unrealistic for most assets)
-        max_change_pct = 0.50  # 50% max change
-        q10 = max( q10, current_price * (1 - max_change_pct) )
-        q90 = min( q90, current_price * (1 + max_change_pct) )
+    # Stretch the one-row forecast with the asset's GARCH(1,1) volatility over the horizon
+    steps = horizon_rows( asset, days_ahead, bar_seconds )
+    if steps > 1 :
+        scale_factor = volatility_forecaster.horizon_scale( asset, steps )
+        q10, q50, q90 = scale_quantiles( current_price, q10, q50, q90, scale_factor )
 
     # Determine currency based on asset type
     currency = "INR"
@@ -186,16 +164,64 @@ def predict_price ( asset: str, days_ahead: int = 1 ) :
     elif asset in ['usdinr', 'gbpinr', 'eurinr'] :
         currency = "INR per unit"
 
-    return {
+    result = {
         "asset" : asset,
         "q10" : round( float( q10 ), 2 ),
         "q50" : round( float( q50 ), 2 ),
         "q90" : round( float( q90 ), 2 ),
         "current_price" : round( float( current_price ), 2 ),
         "days_ahead" : days_ahead,
+        "horizon_rows" : steps,
         "prediction_range" : round( float( q90 - q10 ), 2 ),
-        "currency" : currency
+        "currency" : currency,
+        "model" : model_type,
+        "model_version" : bundle.version,
+        "live_rows" : len( live_bars )
     }
+    if ensemble_weights is not None :
+        result["ensemble"] = {
+            "weighting" : ensemble_weighting,
+            "weights" : {name : round( w[0], 4 ) for name, w in ensemble_weights.items()}
+        }
+
+    return result
+
+
+def _bar_seconds ( df: pd.DataFrame ) :
+    """Row spacing of a price file, or None if it has no timestamps."""
+    if "timestamp" not in df.columns :
+        return None
+    return infer_bar_seconds( df["timestamp"].values[-100 :] )
+
+
+def horizon_rows ( asset: str, days_ahead: int, bar_seconds=None ) -> int :
+    """
+    Number of rows of an asset's history covering days_ahead calendar days.
+
+    The models and the volatility forecast step one row at a time, which is
+    an hour for crypto and a trading day for daily NSE data.
+
+    Args:
+        asset: Asset identifier
+        days_ahead: Horizon in calendar days
+        bar_seconds: Row spacing (the calendar's usual spacing if None)
+
+    Returns:
+        int: Horizon in rows, at least 1
+    """
+    return max( 1, int( round( days_ahead * periods_per_year( asset, bar_seconds ) / DAYS_PER_YEAR ) ) )
+
+
+def _live_bars ( asset: str, df: pd.DataFrame, bar_seconds=None ) -> np.ndarray :
+    """
+    Bars built from live ticks after the last stored row (see services.live_ticks).
+
+    Needs a timestamp column to know where the stored history ends and how
+    far apart its rows are; without one no live bars are added.
+    """
+    if bar_seconds is None or not live_ticks.has_ticks( asset ) :
+        return np.empty( (0, 5) )
+    return live_ticks.bars_after( asset, df["timestamp"].values[-1], bar_seconds, float( df["Close"].values[-1] ) )
 
 
 def get_prediction_confidence ( asset: str ) :
@@ -245,9 +271,11 @@ if __name__ == "__main__" :
     print( "=" * 60 )
 
     # Check if model is loaded
-    if model is None or scaler is None or asset_encoder is None :
+    bundle = registry.current()
+    if bundle is None :
         print( "\n❌ Model not loaded. Please run train_model.py first." )
         exit( 1 )
+    asset_encoder = bundle.coin_encoder
 
     # Test various Indian market assets
     test_assets = [
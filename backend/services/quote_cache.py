@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.live_price import fetch_quotes, get_live_price
+
+QUOTES_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/cache/live_quotes.json"
+
+FRESH_SECONDS = 15  # Quotes younger than this are served without revalidation
+# Seconds between background polls of tracked assets; shorter than FRESH_SECONDS
+# (with room for the fetch itself) so tracked quotes never go stale between polls
+REFRESH_INTERVAL = 10
+TRACK_SECONDS = 15 * 60  # Assets are polled while requested within this window
+REVALIDATE_WORKERS = 4
+
+
+class Quote :
+    """A live price and when it was fetched."""
+
+    __slots__ = ("price", "fetched_at")
+
+    def __init__ ( self, price: float, fetched_at: float ) :
+        self.price = price
+        self.fetched_at = fetched_at
+
+    def age ( self, now: Optional[float] = None ) -> float :
+        return (time.time() if now is None else now) - self.fetched_at
+
+    def to_dict ( self, fresh_seconds: float = FRESH_SECONDS ) -> dict :
+        age = self.age()
+        return {
+            "price" : self.price,
+            "fetched_at" : datetime.fromtimestamp( self.fetched_at, tz=timezone.utc ).isoformat(),
+            "age_seconds" : round( age, 1 ),
+            "stale" : age > fresh_seconds,
+        }
+
+
+class QuoteCache :
+    """
+    Live quotes served from memory, kept fresh by a background refresher.
+
+    A request returns the cached quote immediately with its age. If the quote
+    is older than fresh_seconds, a background revalidation is started (at most
+    one per asset at a time) and the stale quote is still returned; only an
+    asset that has never been fetched waits for the upstream call. Assets
+    requested within track_seconds are re-polled every interval seconds, so
+    popular quotes are usually fresh before anyone asks. Batch lookups,
+    revalidations and refreshes go through fetch_many, so many assets cost one
+    grouped upstream request instead of one call each. The last known quotes
+    are saved to disk and loaded on start, so a restart serves (stale) prices
+    straight away.
+    """
+
+    def __init__ ( self, fetch: Callable[[str], float] = get_live_price,
+                   fetch_many: Callable[[List[str]], Tuple[Dict[str, float], Dict[str, str]]] = fetch_quotes,
+                   path: str = QUOTES_PATH, fresh_seconds: float = FRESH_SECONDS,
+                   interval: float = REFRESH_INTERVAL, track_seconds: float = TRACK_SECONDS ) :
+        self.fetch = fetch
+        self.fetch_many = fetch_many
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.interval = interval
+        self.track_seconds = track_seconds
+
+        self._quotes: Dict[str, Quote] = {}
+        self._requested: Dict[str, float] = {}
+        self._pending = set()
+        self._listeners: List[Callable[[str, Quote], None]] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+        self._executor = ThreadPoolExecutor( max_workers=REVALIDATE_WORKERS, thread_name_prefix="quote-revalidate" )
+
+        self.load()
+
+    def get ( self, asset: str ) -> Quote :
+        """
+        Cached quote of an asset, revalidated in the background if stale.
+
+        Args:
+            asset: Asset identifier
+
+        Returns:
+            Quote: Latest known quote
+
+        Raises:
+            ValueError: If the asset has no cached quote and fetching fails
+        """
+        now = time.time()
+        with self._lock :
+            self._requested[asset] = now
+            quote = self._quotes.get( asset )
+
+        if quote is None :
+            try :
+                return self._fetch( asset )
+            except Exception :
+                self._forget( asset )
+                raise
+        if quote.age( now ) > self.fresh_seconds :
+            self._revalidate( asset )
+        return quote
+
+    def get_many ( self, assets: List[str] ) -> Tuple[Dict[str, Quote], Dict[str, str]] :
+        """
+        Cached quotes of many assets, like get() for each.
+
+        Assets never fetched before are fetched together in one bulk call;
+        stale ones are revalidated together in the background.
+
+        Args:
+            assets: Asset identifiers
+
+        Returns:
+            tuple: (asset -> Quote, asset -> error message for assets that
+                have no quote and could not be fetched)
+        """
+        assets = list( dict.fromkeys( assets ) )
+        now = time.time()
+        with self._lock :
+            for asset in assets :
+                self._requested[asset] = now
+            quotes = {asset : self._quotes[asset] for asset in assets if asset in self._quotes}
+
+        stale = [asset for asset, quote in quotes.items() if quote.age( now ) > self.fresh_seconds]
+        if stale :
+            self._revalidate( stale )
+
+        errors = {}
+        missing = [asset for asset in assets if asset not in quotes]
+        if missing :
+            prices, errors = self.fetch_many( missing )
+            for asset, price in prices.items() :
+                quotes[asset] = self.put( asset, price )
+            for asset in errors :
+                self._forget( asset )
+
+        return {asset : quotes[asset] for asset in assets if asset in quotes}, errors
+
+    def peek ( self, asset: str ) -> Optional[Quote] :
+        """Cached quote without tracking or revalidation."""
+        with self._lock :
+            return self._quotes.get( asset )
+
+    def put ( self, asset: str, price: float, fetched_at: Optional[float] = None ) -> Quote :
+        """Store a quote fetched elsewhere."""
+        quote = Quote( float( price ), time.time() if fetched_at is None else fetched_at )
+        with self._lock :
+            current = self._quotes.get( asset )
+            stored = current is None or current.fetched_at <= quote.fetched_at
+            if stored :
+                self._quotes[asset] = quote
+                self._dirty = True
+            listeners = list( self._listeners ) if stored else []
+
+        for listener in listeners :
+            try :
+                listener( asset, quote )
+            except Exception as e :
+                print( f"⚠️ Quote listener error for {asset}: {e}" )
+        return quote
+
+    def add_listener ( self, listener: Callable[[str, Quote], None] ) :
+        """Call listener(asset, quote) for every quote stored from now on."""
+        with self._lock :
+            if listener not in self._listeners :
+                self._listeners.append( listener )
+
+    def _forget ( self, asset: str ) :
+        """Stop tracking an asset that has never been priced."""
+        with self._lock :
+            if asset not in self._quotes :
+                self._requested.pop( asset, None )
+
+    def _fetch ( self, asset: str ) -> Quote :
+        return self.put( asset, self.fetch( asset ) )
+
+    def update ( self, assets: List[str] ) -> Dict[str, str] :
+        """Fetch and store many quotes at once; returns the per-asset errors."""
+        prices, errors = self.fetch_many( assets )
+        for asset, price in prices.items() :
+            self.put( asset, price )
+        return errors
+
+    def _revalidate ( self, assets ) :
+        if isinstance( assets, str ) :
+            assets = [assets]
+        with self._lock :
+            assets = [asset for asset in assets if asset not in self._pending]
+            if not assets :
+                return
+            self._pending.update( assets )
+
+        def run () :
+            try :
+                if len( assets ) == 1 :
+                    self._fetch( assets[0] )
+                else :
+                    for asset, error in self.update( assets ).items() :
+                        print( f"⚠️ Could not revalidate quote for {asset}: {error}" )
+            except Exception as e :
+                print( f"⚠️ Could not revalidate quotes for {', '.join( assets )}: {e}" )
+            finally :
+                with self._lock :
+                    self._pending.difference_update( assets )
+
+        self._executor.submit( run )
+
+    def tracked ( self ) -> List[str] :
+        """Assets requested within the last track_seconds (older requests are forgotten)."""
+        cutoff = time.time() - self.track_seconds
+        with self._lock :
+            self._requested = {asset : requested for asset, requested in self._requested.items() if requested >= cutoff}
+            return sorted( self._requested )
+
+    def refresh ( self ) :
+        """Poll every tracked asset in one bulk fetch and save the quotes."""
+        assets = self.tracked()
+        if assets :
+            for asset, error in self.update( assets ).items() :
+                print( f"⚠️ Could not refresh quote for {asset}: {error}" )
+        self.save()
+
+    def load ( self ) :
+        """Load the last saved quotes, if any."""
+        if not os.path.exists( self.path ) :
+            return
+        try :
+            with open( self.path ) as f :
+                saved = json.load( f )
+            with self._lock :
+                for asset, entry in saved.items() :
+                    self._quotes[asset] = Quote( float( entry["price"] ), float( entry["fetched_at"] ) )
+        except Exception as e :
+            print( f"⚠️ Could not load saved quotes from {self.path}: {e}" )
+
+    def save ( self ) :
+        """Write the quotes to disk if they changed (atomically, via a temporary file)."""
+        with self._lock :
+            if not self._dirty :
+                return
+            snapshot = {asset : {"price" : q.price, "fetched_at" : q.fetched_at} for asset, q in self._quotes.items()}
+            self._dirty = False
+
+        try :
+            os.makedirs( os.path.dirname( self.path ), exist_ok=True )
+            tmp_path = self.path + ".tmp"
+            with open( tmp_path, "w" ) as f :
+                json.dump( snapshot, f )
+            os.replace( tmp_path, self.path )
+        except Exception as e :
+            print( f"⚠️ Could not save quotes to {self.path}: {e}" )
+
+    def start ( self ) :
+        """Poll tracked assets in a background thread."""
+        if self._refresher is not None :
+            return
+
+        def poll () :
+            while not self._stop.wait( self.interval ) :
+                try :
+                    self.refresh()
+                except Exception as e :
+                    print( f"⚠️ Quote refresher error: {e}" )
+
+        self._refresher = threading.Thread( target=poll, name="quote-refresher", daemon=True )
+        self._refresher.start()
+
+    def stop ( self ) :
+        self._stop.set()
+        self.save()
+
+
+# Shared cache used by the API
+quote_cache = QuoteCache()
@@ -0,0 +1,193 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional, Set
+
+from services.quote_cache import Quote, QuoteCache, quote_cache
+
+STREAM_INTERVAL = 5  # Seconds between upstream polls of streamed assets
+MAX_STREAM_ASSETS = 50  # Assets per connection, which also bounds its buffer
+
+
+class Subscription :
+    """
+    One streaming client's assets and its buffer of undelivered quotes.
+
+    The buffer holds at most one quote per subscribed asset: a new quote for
+    an asset replaces the undelivered one, so a slow client skips the
+    intermediate ticks and receives only the latest price once it catches up.
+    Memory per connection is therefore bounded by its number of assets, no
+    matter how far behind it falls.
+    """
+
+    def __init__ ( self, assets: List[str], loop: asyncio.AbstractEventLoop ) :
+        self.assets = list( dict.fromkeys( assets ) )
+        self.coalesced = 0  # Ticks replaced before the client read them
+
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._buffer: Dict[str, Quote] = {}
+        self._pushed: Dict[str, float] = {}  # Asset -> fetched_at of the last quote buffered
+        self._lock = threading.Lock()
+
+    def push ( self, asset: str, quote: Quote ) :
+        """Buffer a quote (called from the poller thread); a quote already pushed is ignored."""
+        with self._lock :
+            if self._pushed.get( asset ) == quote.fetched_at :
+                return
+            self._pushed[asset] = quote.fetched_at
+            if asset in self._buffer :
+                self.coalesced += 1
+            self._buffer[asset] = quote
+        self._loop.call_soon_threadsafe( self._ready.set )
+
+    async def next ( self, timeout: Optional[float] = None ) -> Dict[str, Quote] :
+        """
+        Wait for buffered quotes and take them all.
+
+        Args:
+            timeout: Seconds to wait before returning an empty dict
+
+        Returns:
+            dict: Asset -> latest undelivered quote
+        """
+        try :
+            await asyncio.wait_for( self._ready.wait(), timeout )
+        except asyncio.TimeoutError :
+            return {}
+
+        with self._lock :
+            self._ready.clear()
+            quotes, self._buffer = self._buffer, {}
+        return quotes
+
+
+class QuoteHub :
+    """
+    Fans live quotes out to every streaming client from one upstream poller.
+
+    A single background thread polls the union of all subscribed assets
+    every interval seconds through the quote cache, so each asset is fetched
+    at most once per interval in one grouped request, however many clients
+    watch it. Assets the cache already holds a quote for that is younger
+    than the interval (e.g. refreshed by a REST request) are not fetched
+    again. Every new quote is pushed to the subscribers of its asset.
+    """
+
+    def __init__ ( self, cache: QuoteCache = quote_cache, interval: float = STREAM_INTERVAL ) :
+        self.cache = cache
+        self.interval = interval
+
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._published: Dict[str, float] = {}  # Asset -> fetched_at of the last quote pushed
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._poller = None
+
+    def subscribe ( self, assets: List[str], loop: asyncio.AbstractEventLoop ) -> Subscription :
+        """
+        Register a client for some assets.
+
+        The latest cached quote of each asset is buffered straight away, so
+        the client does not wait a full interval for its first prices.
+
+        Args:
+            assets: Asset identifiers
+            loop: Event loop of the client connection
+
+        Returns:
+            Subscription: Buffer to read quotes from; pass to unsubscribe() when done
+        """
+        subscription = Subscription( assets, loop )
+        with self._lock :
+            new_assets = [asset for asset in subscription.assets if asset not in self._subscribers]
+            for asset in subscription.assets :
+                self._subscribers.setdefault( asset, set() ).add( subscription )
+
+        for asset in subscription.assets :
+            quote = self.cache.peek( asset )
+            if quote is None :
+                continue
+            if asset in new_assets :
+                # Nobody else watches it, so the next poll must not send this quote again
+                with self._lock :
+                    self._published.setdefault( asset, quote.fetched_at )
+            subscription.push( asset, quote )
+
+        self.start()
+        self._wake.set()
+        return subscription
+
+    def unsubscribe ( self, subscription: Subscription ) :
+        with self._lock :
+            for asset in subscription.assets :
+                subscribers = self._subscribers.get( asset )
+                if subscribers is None :
+                    continue
+                subscribers.discard( subscription )
+                if not subscribers :
+                    del self._subscribers[asset]
+                    self._published.pop( asset, None )
+
+    def assets ( self ) -> List[str] :
+        """Assets with at least one subscriber."""
+        with self._lock :
+            return sorted( self._subscribers )
+
+    def clients ( self ) -> int :
+        """Number of connected subscriptions."""
+        with self._lock :
+            return len( set().union( *self._subscribers.values() ) )
+
+    def poll ( self ) :
+        """Fetch due quotes of subscribed assets and push the new ones."""
+        assets = self.assets()
+        if not assets :
+            return
+
+        due = []
+        for asset in assets :
+            quote = self.cache.peek( asset )
+            if quote is None or quote.age() >= self.interval :
+                due.append( asset )
+        if due :
+            for asset, error in self.cache.update( due ).items() :
+                print( f"⚠️ Could not stream quote for {asset}: {error}" )
+
+        for asset in assets :
+            quote = self.cache.peek( asset )
+            if quote is None :
+                continue
+            with self._lock :
+                if self._published.get( asset ) == quote.fetched_at or asset not in self._subscribers :
+                    continue
+                self._published[asset] = quote.fetched_at
+                subscribers = list( self._subscribers[asset] )
+            for subscription in subscribers :
+                subscription.push( asset, quote )
+
+    def start ( self ) :
+        """Start the poller thread (once)."""
+        with self._lock :
+            if self._poller is not None :
+                return
+
+            def run () :
+                while not self._stop.is_set() :
+                    try :
+                        self.poll()
+                    except Exception as e :
+                        print( f"⚠️ Quote stream poller error: {e}" )
+                    self._wake.wait( self.interval )
+                    self._wake.clear()
+
+            self._poller = threading.Thread( target=run, name="quote-stream", daemon=True )
+            self._poller.start()
+
+    def stop ( self ) :
+        self._stop.set()
+        self._wake.set()
+
+
+# Shared hub used by the streaming endpoint
+quote_hub = QuoteHub()
@@ -1,42 +1,29 @@
-import subprocess
-import os
 from typing import Dict
 
+from services.training_jobs import job_manager
+
 
 def retrain_coin ( coin: str ) -> Dict[str, str] :
     """
-    Trigger retraining for a specific cryptocurrency.
+    Queue retraining for a specific cryptocurrency.
 
-    This spawns a background process to retrain the model without blocking
-    the API response.
+    The job fine-tunes only this asset's embedding in a background process
+    managed by the training job queue, without blocking the API response or
+    changing other assets.
 
     Args:
         coin: Cryptocurrency identifier
 
     Returns:
-        dict: Status message
+        dict: Status message with the job id
     """
-    script_path = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/train_model.py"
-
-    if not os.path.exists( script_path ) :
-        return {
-            "status" : "error",
-            "message" : f"Training script not found at {script_path}"
-        }
-
     try :
-        # Start training process in background
-        process = subprocess.Popen(
-            ["python", script_path, coin],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            start_new_session=True  # Detach from parent process
-        )
+        job = job_manager.submit( "coin", ["--coin", coin], f"Fine-tune {coin}" )
 
         return {
-            "status" : "started",
-            "message" : f"Retraining started for {coin}",
-            "process_id" : process.pid
+            "status" : job["status"],
+            "message" : f"Retraining queued for {coin}",
+            "job_id" : job["job_id"]
         }
 
     except Exception as e :
@@ -46,62 +33,76 @@ def retrain_coin ( coin: str ) -> Dict[str, str] :
         }
 
 
-def retrain_all_coins () -> Dict[str, str] :
+def retrain_all_coins ( incremental: bool = False ) -> Dict[str, str] :
     """
-    Trigger retraining for all cryptocurrencies.
+    Queue retraining for all cryptocurrencies.
+
+    Args:
+        incremental: Warm-start from the saved model instead of training from scratch
 
     Returns:
-        dict: Status message
+        dict: Status message with the job id
     """
-    script_path = "backend/model/train_model.py"
+    try :
+        if incremental :
+            job = job_manager.submit( "incremental", ["--incremental"], "Incremental model update" )
+        else :
+            job = job_manager.submit( "full", [], "Full model retraining" )
+
+        return {
+            "status" : job["status"],
+            "message" : f"{job['description']} queued",
+            "job_id" : job["job_id"]
+        }
 
-    if not os.path.exists( script_path ) :
+    except Exception as e :
         return {
             "status" : "error",
-            "message" : f"Training script not found at {script_path}"
+            "message" : f"Failed to start retraining: {str( e )}"
         }
 
+
+def refresh_scalers () -> Dict[str, str] :
+    """
+    Queue a refresh of the streaming scalers with newly appended prices.
+
+    The updated scalers are published with the current model as a new
+    version, so predictions follow new price levels without retraining.
+
+    Returns:
+        dict: Status message with the job id
+    """
     try :
-        # Start full retraining process in background
-        process = subprocess.Popen(
-            ["python", script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            start_new_session=True
-        )
+        job = job_manager.submit( "scalers", ["--refresh-scalers"], "Streaming scaler refresh" )
 
         return {
-            "status" : "started",
-            "message" : "Full model retraining started",
-            "process_id" : process.pid
+            "status" : job["status"],
+            "message" : f"{job['description']} queued",
+            "job_id" : job["job_id"]
         }
 
     except Exception as e :
         return {
             "status" : "error",
-            "message" : f"Failed to start retraining: {str( e )}"
+            "message" : f"Failed to start scaler refresh: {str( e )}"
         }
 
 
-def check_training_status ( process_id: int ) -> Dict[str, str] :
+def check_training_status ( job_id: str ) -> Dict[str, str] :
     """
-    Check if a training process is still running.
+    Get the status, progress and metrics of a training job.
 
     Args:
-        process_id: Process ID to check
+        job_id: Job identifier returned by retrain_coin / retrain_all_coins
 
     Returns:
-        dict: Training status
+        dict: Training job state
     """
-    try :
-        # Check if process exists
-        os.kill( process_id, 0 )
+    job = job_manager.get_job( job_id )
+    if job is None :
         return {
-            "status" : "running",
-            "process_id" : process_id
+            "status" : "unknown",
+            "job_id" : job_id
         }
-    except OSError :
-        return {
-            "status" : "completed",
-            "process_id" : process_id
-        }
\ No newline at end of file
+
+    return job
@@ -0,0 +1,278 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.risk_engine import price_matrix_cache
+from services.risk_metrics import RISK_FREE_RATE, TRADING_DAYS, RiskComputation, calculate_returns
+
+DEFAULT_RESAMPLES = 1000
+DEFAULT_SEED = 42
+MAX_CHUNK_BYTES = 64 * 1024 * 1024  # Upper bound on one chunk of resampled returns
+BOOTSTRAP_METRICS = ("var", "cvar", "volatility", "sharpe_ratio")
+
+
+def default_block_size ( n: int ) -> int :
+    """Block length n^(1/3), the usual rate for block bootstraps of dependent data."""
+    return max( 1, int( round( n ** (1 / 3) ) ) )
+
+
+def effective_block_size ( n: int, block_size: Optional[int] = None ) -> int :
+    """Block length actually used for n returns: the default if None, else clamped to [1, n]."""
+    return default_block_size( n ) if block_size is None else min( max( 1, block_size ), n )
+
+
+def block_starts ( n: int, resamples: int, block_size: int, seed: int = DEFAULT_SEED ) -> np.ndarray :
+    """
+    Random block start positions for a circular block bootstrap.
+
+    Only the starts are drawn up front; the full index matrix is built chunk
+    by chunk from them, so results do not depend on the chunk size.
+
+    Args:
+        n: Number of observations
+        resamples: Number of bootstrap resamples
+        block_size: Observations per block
+        seed: Random seed
+
+    Returns:
+        np.ndarray: (resamples, blocks) start positions
+    """
+    blocks = -(-n // block_size)
+    return np.random.default_rng( seed ).integers( 0, n, size=(resamples, blocks) )
+
+
+def block_indices ( starts: np.ndarray, n: int, block_size: int ) -> np.ndarray :
+    """
+    Resampling index matrix from block starts.
+
+    Each row joins its blocks of consecutive positions, wrapping around the
+    end of the series, and is cut to n observations.
+
+    Args:
+        starts: (resamples, blocks) start positions
+        n: Number of observations
+        block_size: Observations per block
+
+    Returns:
+        np.ndarray: (resamples, n) indices into the original series
+    """
+    offsets = np.arange( block_size )
+    indices = (starts[:, :, None] + offsets) % n
+    return indices.reshape( len( starts ), -1 )[:, :n]
+
+
+def _tail_metrics ( samples: np.ndarray, confidence: float ) :
+    """VaR and CVaR of every row of resampled returns."""
+    n = samples.shape[1]
+    position = (n - 1) * (1 - confidence)
+    lower = int( np.floor( position ) )
+    upper = min( lower + 1, n - 1 )
+
+    # One partition puts the upper order statistic in place with everything
+    # smaller before it, so VaR and the CVaR tail only need that short head
+    partitioned = np.partition( samples, upper, axis=1 )
+    high = partitioned[:, upper]
+    low = partitioned[:, :upper].max( axis=1 ) if upper > lower else high
+    var = low + (high - low) * (position - lower)
+
+    head = partitioned[:, : upper + 1]
+    tail = head <= var[:, None]
+    tail_sum = np.where( tail, head, 0.0 ).sum( axis=1 )
+    tail_count = tail.sum( axis=1 )
+    ties = var == high
+    if ties.any() :
+        # Values equal to VaR may also sit after the partition point
+        extra = (partitioned[ties, upper + 1 :] == var[ties, None]).sum( axis=1 )
+        tail_sum[ties] += extra * var[ties]
+        tail_count[ties] += extra
+
+    return var, tail_sum / tail_count
+
+
+def _block_moments ( returns: np.ndarray, starts: np.ndarray, block_size: int ) :
+    """
+    Mean and population variance of every resample from block sums.
+
+    Prefix sums of the circularly extended series give each block's sum and
+    sum of squares in O(1), so moments cost O(blocks) per resample instead
+    of O(n). The last block is cut short to keep exactly n observations.
+    """
+    n = len( returns )
+    extended = np.concatenate( [returns, returns[: block_size - 1]] )
+    sums = np.concatenate( [[0.0], np.cumsum( extended )] )
+    squares = np.concatenate( [[0.0], np.cumsum( extended ** 2 )] )
+
+    lengths = np.full( starts.shape[1], block_size )
+    lengths[-1] = n - block_size * (starts.shape[1] - 1)
+    ends = starts + lengths
+
+    mean = (sums[ends] - sums[starts]).sum( axis=1 ) / n
+    variance = (squares[ends] - squares[starts]).sum( axis=1 ) / n - mean ** 2
+    return mean, np.maximum( variance, 0.0 )
+
+
+def bootstrap_distribution ( returns: np.ndarray, resamples: int = DEFAULT_RESAMPLES,
+                             block_size: Optional[int] = None, confidence: float = 0.95,
+                             periods: float = TRADING_DAYS, risk_free_rate: float = RISK_FREE_RATE,
+                             seed: int = DEFAULT_SEED, max_chunk_bytes: int = MAX_CHUNK_BYTES
+                             ) -> Dict[str, np.ndarray] :
+    """
+    Bootstrap distribution of each metric from a circular block bootstrap.
+
+    Resamples are gathered with one fancy-index per chunk instead of a
+    Python loop; chunks hold at most max_chunk_bytes of resampled returns.
+    Volatility and Sharpe ratio come from block sums without gathering.
+
+    Args:
+        returns: 1-D returns, oldest first
+        resamples: Number of bootstrap resamples
+        block_size: Observations per block (default: n^(1/3))
+        confidence: Confidence level for VaR/CVaR
+        periods: Rows per year, to annualise volatility and Sharpe ratio
+        risk_free_rate: Annual risk-free rate for the Sharpe ratio
+        seed: Random seed; the same seed gives the same distribution
+        max_chunk_bytes: Memory bound for one chunk
+
+    Returns:
+        dict: Metric name -> (resamples,) array
+
+    Raises:
+        ValueError: On invalid parameters
+    """
+    if not 0 < confidence < 1 :
+        raise ValueError( "Confidence must be between 0 and 1" )
+    if resamples < 1 :
+        raise ValueError( "Need at least one resample" )
+
+    returns = np.asarray( returns, dtype=np.float64 )
+    n = len( returns )
+    if n < 2 :
+        raise ValueError( "Need at least 2 returns to bootstrap" )
+    block_size = effective_block_size( n, block_size )
+
+    starts = block_starts( n, resamples, block_size, seed )
+    chunk = max( 1, max_chunk_bytes // (n * returns.itemsize) )
+
+    var_parts, cvar_parts = [], []
+    for begin in range( 0, resamples, chunk ) :
+        samples = returns[block_indices( starts[begin : begin + chunk], n, block_size )]
+        var, cvar = _tail_metrics( samples, confidence )
+        var_parts.append( var )
+        cvar_parts.append( cvar )
+
+    mean, variance = _block_moments( returns, starts, block_size )
+    annual_vol = np.sqrt( variance * periods )
+    with np.errstate( divide="ignore", invalid="ignore" ) :
+        sharpe = np.where( annual_vol == 0, 0.0, (mean * periods - risk_free_rate) / annual_vol )
+
+    return {
+        "var" : np.concatenate( var_parts ),
+        "cvar" : np.concatenate( cvar_parts ),
+        "volatility" : annual_vol,
+        "sharpe_ratio" : sharpe,
+    }
+
+
+def bootstrap_intervals ( prices: np.ndarray, resamples: int = DEFAULT_RESAMPLES, block_size: Optional[int] = None,
+                          confidence: float = 0.95, interval: float = 0.90, periods: float = TRADING_DAYS,
+                          seed: int = DEFAULT_SEED, max_chunk_bytes: int = MAX_CHUNK_BYTES ) -> dict :
+    """
+    Point estimates and percentile bootstrap intervals of VaR, CVaR, volatility and Sharpe ratio.
+
+    Args:
+        prices: Array of historical prices
+        resamples: Number of bootstrap resamples
+        block_size: Observations per block (default: n^(1/3))
+        confidence: Confidence level for VaR/CVaR
+        interval: Coverage of the reported interval (0.90 -> 5th to 95th percentile)
+        periods: Rows per year, to annualise volatility and Sharpe ratio
+        seed: Random seed
+        max_chunk_bytes: Memory bound for one chunk
+
+    Returns:
+        dict: Metric -> {"estimate", "lower", "upper"}, in the units and
+            rounding of calculate_all_risk_metrics(), plus the settings used
+
+    Raises:
+        ValueError: On invalid parameters or too little data
+    """
+    if not 0 < interval < 1 :
+        raise ValueError( "Interval must be between 0 and 1" )
+
+    prices = np.asarray( prices, dtype=np.float64 )
+    returns = calculate_returns( prices )
+    block_size = effective_block_size( len( returns ), block_size )  # Reported as used
+
+    estimates = RiskComputation( prices, periods ).all_metrics( confidence )
+    distribution = bootstrap_distribution(
+        returns, resamples, block_size, confidence, periods, RISK_FREE_RATE, seed, max_chunk_bytes
+    )
+
+    tail = (1 - interval) / 2 * 100
+    result = {}
+    for name, values in distribution.items() :
+        scale = 1 if name == "sharpe_ratio" else 100
+        lower, upper = np.percentile( values, [tail, 100 - tail] )
+        result[name] = {
+            "estimate" : estimates[name],
+            "lower" : round( float( lower ) * scale, 2 ),
+            "upper" : round( float( upper ) * scale, 2 ),
+        }
+
+    result.update( {
+        "resamples" : resamples,
+        "block_size" : block_size,
+        "interval" : interval,
+        "seed" : seed,
+    } )
+    return result
+
+
+def bootstrap_risk_asset ( asset: str, **kwargs ) -> dict :
+    """
+    Bootstrap intervals for one asset, annualised with its calendar.
+
+    Args:
+        asset: Asset identifier
+        **kwargs: Passed to bootstrap_intervals()
+
+    Returns:
+        dict: bootstrap_intervals() result with the asset name
+
+    Raises:
+        FileNotFoundError: If the asset has no price file
+    """
+    prices = price_matrix_cache.series( [asset] ).get( asset )
+    if prices is None :
+        raise FileNotFoundError( f"Data not found for '{asset}'" )
+
+    periods = float( price_matrix_cache.periods_per_year( [asset] )[0] )
+    result = bootstrap_intervals( prices, periods=periods, **kwargs )
+    result["asset"] = asset
+    return result
+
+
+def bootstrap_risk_all ( assets: List[str], **kwargs ) -> Dict[str, dict] :
+    """
+    Bootstrap intervals for many assets.
+
+    Every asset uses the same seed, so results are reproducible per asset
+    and do not depend on which other assets are requested.
+
+    Args:
+        assets: Asset identifiers
+        **kwargs: Passed to bootstrap_intervals()
+
+    Returns:
+        dict: Asset -> bootstrap_intervals() result; assets without enough
+            data are left out
+    """
+    series = price_matrix_cache.series( assets )
+    periods = price_matrix_cache.periods_per_year( list( series ) )
+
+    results = {}
+    for (asset, prices), asset_periods in zip( series.items(), periods ) :
+        if len( prices ) < 3 :
+            continue
+        results[asset] = bootstrap_intervals( prices, periods=float( asset_periods ), **kwargs )
+    return results
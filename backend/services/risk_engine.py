@@ -0,0 +1,281 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from services.coins import DATA_DIR
+from services.market_calendar import (CALENDARS, get_calendar, infer_bar_seconds, local_days, periods_per_year,
+                                      spaced_days)
+from services.risk_metrics import RISK_FREE_RATE, TRADING_DAYS
+
+
+class PriceMatrixCache :
+    """
+    Close prices of many assets as one (time x asset) matrix.
+
+    Histories are right-aligned so the newest price of every asset is in the
+    last row; shorter histories are padded with NaN at the top. Each CSV is
+    re-read only when its modification time changes, so repeated bulk
+    requests do not touch unchanged files. The row spacing and calendar date
+    of each file's rows are kept alongside its prices, for annualisation and
+    for aligning assets by date (daily_matrix()).
+    """
+
+    def __init__ ( self, data_dir: str = DATA_DIR ) :
+        self.data_dir = data_dir
+        self._series: Dict[str, Tuple[float, np.ndarray]] = {}
+        self._bar_seconds: Dict[str, Optional[float]] = {}
+        self._days: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _load ( self, asset: str ) -> Optional[np.ndarray] :
+        path = os.path.join( self.data_dir, asset, f"{asset}.csv" )
+        try :
+            mtime = os.path.getmtime( path )
+        except OSError :
+            return None
+
+        cached = self._series.get( asset )
+        if cached is not None and cached[0] == mtime :
+            return cached[1]
+
+        df = pd.read_csv( path, usecols=lambda column : column in ("timestamp", "Close") )
+        prices = df["Close"].to_numpy( dtype=np.float64 )
+        self._series[asset] = (mtime, prices)
+        if "timestamp" in df.columns :
+            self._bar_seconds[asset] = infer_bar_seconds( df["timestamp"] )
+            self._days[asset] = local_days( df["timestamp"] )
+        else :
+            # No timestamps (crypto): the points end when the file was written
+            self._bar_seconds[asset] = None
+            self._days[asset] = spaced_days( len( prices ), mtime, CALENDARS[get_calendar( asset )]["bar_seconds"] )
+        return prices
+
+    def periods_per_year ( self, assets: List[str] ) -> np.ndarray :
+        """Rows per year of each asset, from its calendar and the spacing of its loaded rows."""
+        return np.array( [periods_per_year( asset, self._bar_seconds.get( asset ) ) for asset in assets] )
+
+    def series ( self, assets: List[str] ) -> Dict[str, np.ndarray] :
+        """
+        Cached close prices of each asset.
+
+        Args:
+            assets: Asset identifiers
+
+        Returns:
+            dict: Asset -> prices, oldest first; assets without a readable
+                price file are left out
+        """
+        with self._lock :
+            series = {}
+            for asset in assets :
+                try :
+                    prices = self._load( asset )
+                except Exception :
+                    prices = None
+                if prices is not None and len( prices ) :
+                    series[asset] = prices
+        return series
+
+    def matrix ( self, assets: List[str] ) -> Tuple[np.ndarray, List[str]] :
+        """
+        Build the price matrix.
+
+        Args:
+            assets: Asset identifiers
+
+        Returns:
+            tuple: (prices of shape (rows, assets), assets included); assets
+                without a readable price file are left out
+        """
+        series = self.series( assets )
+        included = list( series )
+        rows = max( (len( prices ) for prices in series.values()), default=0 )
+        matrix = np.full( (rows, len( included )), np.nan )
+        for j, asset in enumerate( included ) :
+            prices = series[asset]
+            matrix[rows - len( prices ) :, j] = prices
+
+        return matrix, included
+
+    def daily_matrix ( self, assets: List[str] ) -> Tuple[np.ndarray, np.ndarray, List[str]] :
+        """
+        Close prices of many assets aligned on a common calendar-day grid.
+
+        Each asset's last close of every date is placed on that date; days it
+        did not trade (weekends, holidays) carry its previous close forward,
+        so its return over a closed stretch lands on the day trading resumes.
+        Intraday histories (crypto) thereby become daily closes. Days before
+        an asset's first close or after its last one are NaN, so a history
+        that is not up to date yet gets no made-up flat days.
+
+        Args:
+            assets: Asset identifiers
+
+        Returns:
+            tuple: (days since 1970-01-01 of each row, prices of shape
+                (days, assets), assets included)
+        """
+        series = self.series( assets )
+        with self._lock :
+            days = {asset : self._days[asset] for asset in series}
+
+        closes = {}
+        for asset, prices in series.items() :
+            asset_days = days[asset]
+            valid = (asset_days >= 0) & np.isfinite( prices )
+            asset_days, prices = asset_days[valid], prices[valid]
+            if not len( prices ) :
+                continue
+            last_of_day = np.r_[asset_days[1 :] != asset_days[:-1], True]
+            closes[asset] = (asset_days[last_of_day], prices[last_of_day])
+
+        included = list( closes )
+        if not included :
+            return np.empty( 0, dtype=np.int64 ), np.empty( (0, 0) ), included
+
+        start = min( d[0] for d, _ in closes.values() )
+        end = max( d[-1] for d, _ in closes.values() )
+        matrix = np.full( (end - start + 1, len( included )), np.nan )
+        for j, asset in enumerate( included ) :
+            asset_days, prices = closes[asset]
+            matrix[asset_days - start, j] = prices
+
+        matrix = pd.DataFrame( matrix ).ffill().to_numpy( copy=True )
+        for j, asset in enumerate( included ) :
+            matrix[closes[asset][0][-1] - start + 1 :, j] = np.nan
+        return np.arange( start, end + 1 ), matrix, included
+
+
+def masked_quantile ( values: np.ndarray, q: float ) -> np.ndarray :
+    """
+    Per-column quantile ignoring NaN, with np.percentile's linear interpolation.
+
+    Sorting puts NaN last, so each column's valid values are its first
+    count entries; the two neighbouring order statistics are gathered for all
+    columns at once instead of calling np.percentile per asset.
+
+    Args:
+        values: (rows, columns) array with NaN for missing values
+        q: Quantile in [0, 1]
+
+    Returns:
+        np.ndarray: Quantile per column (NaN for empty columns)
+    """
+    ordered = np.sort( values, axis=0 )
+    counts = np.sum( ~np.isnan( values ), axis=0 )
+    position = np.maximum( counts - 1, 0 ) * q
+    lower = np.floor( position ).astype( np.int64 )
+    upper = np.minimum( lower + 1, np.maximum( counts - 1, 0 ) )
+    fraction = position - lower
+
+    columns = np.arange( values.shape[1] )
+    low_values = ordered[lower, columns] if len( ordered ) else np.full( values.shape[1], np.nan )
+    high_values = ordered[upper, columns] if len( ordered ) else np.full( values.shape[1], np.nan )
+    result = low_values + (high_values - low_values) * fraction
+    return np.where( counts > 0, result, np.nan )
+
+
+def compute_risk_matrix ( prices: np.ndarray, confidence: float = 0.95,
+                          risk_free_rate: float = RISK_FREE_RATE,
+                          periods: Union[float, np.ndarray] = TRADING_DAYS ) -> Dict[str, np.ndarray] :
+    """
+    VaR, CVaR, volatility, Sharpe ratio and max drawdown of every column at once.
+
+    Matches calculate_all_risk_metrics() per asset (before rounding), using
+    masked reductions over the NaN-padded matrix.
+
+    Args:
+        prices: (rows, assets) prices, NaN where an asset has no data
+        confidence: Confidence level for VaR/CVaR
+        risk_free_rate: Annual risk-free rate for the Sharpe ratio
+        periods: Rows per year, one value or one per asset
+
+    Returns:
+        dict: Metric name -> array of one value per asset (NaN if an asset
+            has fewer than two prices)
+
+    Raises:
+        ValueError: If confidence is not between 0 and 1
+    """
+    if not 0 < confidence < 1 :
+        raise ValueError( "Confidence must be between 0 and 1" )
+
+    prices = np.asarray( prices, dtype=np.float64 )
+    with np.errstate( divide="ignore", invalid="ignore" ) :
+        returns = np.diff( prices, axis=0 ) / prices[:-1]
+        valid = ~np.isnan( returns )
+        counts = valid.sum( axis=0 )
+        has_returns = counts > 0
+
+        # VaR and CVaR (average of returns at or below VaR)
+        var = masked_quantile( returns, 1 - confidence )
+        tail = valid & (returns <= var)
+        cvar = np.where( tail, returns, 0.0 ).sum( axis=0 ) / tail.sum( axis=0 )
+
+        # Population std of returns, like np.std
+        zeroed = np.where( valid, returns, 0.0 )
+        mean = zeroed.sum( axis=0 ) / counts
+        variance = np.where( valid, (returns - mean) ** 2, 0.0 ).sum( axis=0 ) / counts
+        annual_vol = np.sqrt( variance ) * np.sqrt( periods )
+
+        annual_return = mean * periods
+        sharpe = np.where( annual_vol == 0, 0.0, (annual_return - risk_free_rate) / annual_vol )
+
+        # Running peak ignores the NaN padding (fmax keeps the non-NaN operand)
+        peaks = np.fmax.accumulate( prices, axis=0 )
+        drawdown = np.where( np.isnan( prices ), np.inf, (prices - peaks) / peaks )
+        max_dd = drawdown.min( axis=0 )
+
+    nan = np.full( prices.shape[1], np.nan )
+    return {
+        "var" : np.where( has_returns, var, nan ),
+        "cvar" : np.where( has_returns, cvar, nan ),
+        "volatility" : np.where( has_returns, annual_vol, nan ),
+        "sharpe_ratio" : np.where( has_returns, sharpe, nan ),
+        "max_drawdown" : np.where( has_returns, max_dd, nan ),
+    }
+
+
+def format_risk_metrics ( metrics: Dict[str, np.ndarray], assets: List[str] ) -> List[dict] :
+    """
+    Per-asset dicts in the same units and rounding as calculate_all_risk_metrics().
+
+    Assets without enough data are left out.
+    """
+    percent = {"var", "cvar", "volatility", "max_drawdown"}
+    rows = []
+    for j, asset in enumerate( assets ) :
+        if np.isnan( metrics["var"][j] ) :
+            continue
+        row = {
+            name : round( float( values[j] ) * (100 if name in percent else 1), 2 )
+            for name, values in metrics.items()
+        }
+        row["asset"] = asset
+        rows.append( row )
+    return rows
+
+
+# Shared cache used by the API
+price_matrix_cache = PriceMatrixCache()
+
+
+def calculate_risk_all ( assets: List[str], confidence: float = 0.95 ) -> List[dict] :
+    """
+    Risk metrics of many assets in one vectorised pass.
+
+    Args:
+        assets: Asset identifiers
+        confidence: Confidence level for VaR/CVaR
+
+    Returns:
+        list: One metrics dict per asset with enough data, in input order
+    """
+    prices, included = price_matrix_cache.matrix( assets )
+    if not included :
+        return []
+    periods = price_matrix_cache.periods_per_year( included )
+    return format_risk_metrics( compute_risk_matrix( prices, confidence, periods=periods ), included )
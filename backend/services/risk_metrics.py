@@ -1,6 +1,9 @@
 import numpy as np
 from typing import Tuple
 
+TRADING_DAYS = 365  # Default rows per year (daily, every day traded)
+RISK_FREE_RATE = 0.02
+
 
 def calculate_returns ( prices: np.ndarray ) -> np.ndarray :
     """
@@ -19,6 +22,95 @@ def calculate_returns ( prices: np.ndarray ) -> np.ndarray :
     return np.diff( prices ) / prices[:-1]
 
 
+class RiskComputation :
+    """
+    Every risk metric of one price series from shared intermediates.
+
+    Returns, their mean and standard deviation, the sorted returns and their
+    running sums are computed once on construction. VaR is then read from
+    the sorted returns by index and CVaR from the running sums, so any number
+    of metrics and confidence levels cost no further passes over the data.
+    """
+
+    def __init__ ( self, prices: np.ndarray, periods_per_year: float = TRADING_DAYS,
+                   risk_free_rate: float = RISK_FREE_RATE ) :
+        """
+        Args:
+            prices: Array of historical prices
+            periods_per_year: Rows per year, used to annualise (see
+                services.market_calendar.periods_per_year)
+            risk_free_rate: Annual risk-free rate for the Sharpe ratio
+        """
+        self.prices = np.asarray( prices, dtype=np.float64 )
+        self.returns = calculate_returns( self.prices )
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+
+        self.mean = float( np.mean( self.returns ) )
+        self.std = float( np.std( self.returns ) )
+        self.sorted_returns = np.sort( self.returns )
+        self._tail_sums = np.cumsum( self.sorted_returns )
+
+    def var_cvar ( self, confidence: float = 0.95 ) -> Tuple[float, float] :
+        """
+        Value at Risk and Conditional Value at Risk.
+
+        VaR interpolates between order statistics like np.percentile; CVaR is
+        the mean of the returns at or below VaR.
+
+        Args:
+            confidence: Confidence level (default: 0.95 for 95%)
+
+        Returns:
+            tuple: (VaR, CVaR) both as negative values representing losses
+        """
+        if not 0 < confidence < 1 :
+            raise ValueError( "Confidence must be between 0 and 1" )
+
+        ordered = self.sorted_returns
+        position = (len( ordered ) - 1) * (1 - confidence)
+        lower = int( np.floor( position ) )
+        upper = min( lower + 1, len( ordered ) - 1 )
+        var = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+        count = int( np.searchsorted( ordered, var, side="right" ) )
+        cvar = self._tail_sums[count - 1] / count
+
+        return float( var ), float( cvar )
+
+    def volatility ( self, annualize: bool = False ) -> float :
+        """Standard deviation of returns, optionally annualised with sqrt(periods_per_year)."""
+        if annualize :
+            return self.std * float( np.sqrt( self.periods_per_year ) )
+        return self.std
+
+    def sharpe_ratio ( self ) -> float :
+        """Annualised excess return over annualised volatility."""
+        annual_vol = self.volatility( annualize=True )
+        if annual_vol == 0 :
+            return 0.0
+
+        annual_return = self.mean * self.periods_per_year
+        return float( (annual_return - self.risk_free_rate) / annual_vol )
+
+    def max_drawdown ( self ) -> float :
+        """Largest peak-to-trough decline, as a negative fraction."""
+        cum_max = np.maximum.accumulate( self.prices )
+        return float( np.min( (self.prices - cum_max) / cum_max ) )
+
+    def all_metrics ( self, confidence: float = 0.95 ) -> dict :
+        """Every metric, as returned by calculate_all_risk_metrics()."""
+        var, cvar = self.var_cvar( confidence )
+
+        return {
+            "var" : round( var * 100, 2 ),  # As percentage
+            "cvar" : round( cvar * 100, 2 ),  # As percentage
+            "volatility" : round( self.volatility( annualize=True ) * 100, 2 ),  # As percentage
+            "sharpe_ratio" : round( self.sharpe_ratio(), 2 ),
+            "max_drawdown" : round( self.max_drawdown() * 100, 2 )  # As percentage
+        }
+
+
 def var_cvar ( prices: np.ndarray, confidence: float = 0.95 ) -> Tuple[float, float] :
     """
     Calculate Value at Risk (VaR) and Conditional Value at Risk (CVaR).
@@ -33,66 +125,38 @@ def var_cvar ( prices: np.ndarray, confidence: float = 0.95 ) -> Tuple[float, fl
     Returns:
         tuple: (VaR, CVaR) both as negative values representing losses
     """
-    if not 0 < confidence < 1 :
-        raise ValueError( "Confidence must be between 0 and 1" )
-
-    prices = np.asarray( prices )
-    returns = calculate_returns( prices )
-
-    # Calculate VaR (at the specified percentile)
-    var = np.percentile( returns, (1 - confidence) * 100 )
+    return RiskComputation( prices ).var_cvar( confidence )
 
-    # Calculate CVaR (average of returns below VaR)
-    cvar = returns[returns <= var].mean()
 
-    return float( var ), float( cvar )
-
-
-def volatility ( prices: np.ndarray, annualize: bool = False ) -> float :
+def volatility ( prices: np.ndarray, annualize: bool = False, periods_per_year: float = TRADING_DAYS ) -> float :
     """
     Calculate volatility (standard deviation of returns).
 
     Args:
         prices: Array of historical prices
-        annualize: If True, annualize the volatility (assume daily data)
+        annualize: If True, annualize the volatility
+        periods_per_year: Rows per year used to annualize
 
     Returns:
         float: Volatility value
     """
-    prices = np.asarray( prices )
-    returns = calculate_returns( prices )
-
-    vol = np.std( returns )
-
-    if annualize :
-        # Assuming daily data, annualize with sqrt(365)
-        vol *= np.sqrt( 365 )
+    return RiskComputation( prices, periods_per_year ).volatility( annualize )
 
-    return float( vol )
 
-
-def sharpe_ratio ( prices: np.ndarray, risk_free_rate: float = 0.02 ) -> float :
+def sharpe_ratio ( prices: np.ndarray, risk_free_rate: float = RISK_FREE_RATE,
+                   periods_per_year: float = TRADING_DAYS ) -> float :
     """
     Calculate Sharpe Ratio (risk-adjusted return).
 
     Args:
         prices: Array of historical prices
         risk_free_rate: Annual risk-free rate (default: 0.02 for 2%)
+        periods_per_year: Rows per year used to annualize
 
     Returns:
         float: Sharpe ratio
     """
-    prices = np.asarray( prices )
-    returns = calculate_returns( prices )
-
-    # Annualize returns and volatility
-    annual_return = np.mean( returns ) * 365
-    annual_vol = volatility( prices, annualize=True )
-
-    if annual_vol == 0 :
-        return 0.0
-
-    return float( (annual_return - risk_free_rate) / annual_vol )
+    return RiskComputation( prices, periods_per_year, risk_free_rate ).sharpe_ratio()
 
 
 def max_drawdown ( prices: np.ndarray ) -> float :
@@ -116,23 +180,18 @@ def max_drawdown ( prices: np.ndarray ) -> float :
     return float( np.min( drawdown ) )
 
 
-def calculate_all_risk_metrics ( prices: np.ndarray, confidence: float = 0.95 ) -> dict :
+def calculate_all_risk_metrics ( prices: np.ndarray, confidence: float = 0.95,
+                                 periods_per_year: float = TRADING_DAYS ) -> dict :
     """
     Calculate comprehensive risk metrics for a price series.
 
     Args:
         prices: Array of historical prices
         confidence: Confidence level for VaR/CVaR
+        periods_per_year: Rows per year used to annualize volatility and
+            Sharpe ratio
 
     Returns:
         dict: Dictionary containing all risk metrics
     """
-    var, cvar = var_cvar( prices, confidence )
-
-    return {
-        "var" : round( var * 100, 2 ),  # As percentage
-        "cvar" : round( cvar * 100, 2 ),  # As percentage
-        "volatility" : round( volatility( prices, annualize=True ) * 100, 2 ),  # As percentage
-        "sharpe_ratio" : round( sharpe_ratio( prices ), 2 ),
-        "max_drawdown" : round( max_drawdown( prices ) * 100, 2 )  # As percentage
-    }
\ No newline at end of file
+    return RiskComputation( prices, periods_per_year ).all_metrics( confidence )
@@ -0,0 +1,314 @@
+import bisect
+import os
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.coins import DATA_DIR
+from services.market_calendar import CALENDARS, get_calendar, infer_bar_seconds, periods_per_year
+from services.risk_metrics import TRADING_DAYS
+
+ROLLING_WINDOWS = (30, 90)
+
+
+def rolling_volatility ( returns: np.ndarray, window: int, annualize: bool = True,
+                         periods: float = TRADING_DAYS ) -> np.ndarray :
+    """
+    Rolling population std of returns from cumulative sums, O(n).
+
+    Works on a 1-D series or a (rows, assets) matrix column-wise. Returns are
+    centred on their overall mean first so the sum-of-squares difference does
+    not lose precision.
+
+    Args:
+        returns: Returns, oldest first
+        window: Window length in rows
+        annualize: Scale by sqrt(periods)
+        periods: Rows per year
+
+    Returns:
+        np.ndarray: Same shape as returns, NaN for the first window - 1 rows
+    """
+    returns = np.asarray( returns, dtype=np.float64 )
+    centred = returns - np.mean( returns, axis=0 )
+
+    zero = np.zeros( (1,) + returns.shape[1 :] )
+    sums = np.concatenate( [zero, np.cumsum( centred, axis=0 )] )
+    squares = np.concatenate( [zero, np.cumsum( centred ** 2, axis=0 )] )
+
+    window_sum = sums[window :] - sums[:-window]
+    window_squares = squares[window :] - squares[:-window]
+    variance = np.maximum( window_squares / window - (window_sum / window) ** 2, 0.0 )
+
+    result = np.full( returns.shape, np.nan )
+    result[window - 1 :] = np.sqrt( variance ) * (np.sqrt( periods ) if annualize else 1.0)
+    return result
+
+
+def rolling_max ( values: np.ndarray, window: int ) -> np.ndarray :
+    """
+    Maximum of the last `window` values at every row, with a monotonic deque.
+
+    The deque holds indices whose values are decreasing; every index is
+    pushed and popped at most once, so the whole series is O(n).
+
+    Args:
+        values: 1-D series, oldest first
+        window: Window length in rows
+
+    Returns:
+        np.ndarray: Running window maximum (partial windows at the start)
+    """
+    values = np.asarray( values, dtype=np.float64 )
+    result = np.empty( len( values ) )
+    candidates = deque()
+
+    for i, value in enumerate( values ) :
+        while candidates and values[candidates[-1]] <= value :
+            candidates.pop()
+        candidates.append( i )
+        if candidates[0] <= i - window :
+            candidates.popleft()
+        result[i] = values[candidates[0]]
+
+    return result
+
+
+def rolling_drawdown ( prices: np.ndarray, window: int ) -> np.ndarray :
+    """
+    Drawdown from the highest price of the last `window` rows.
+
+    Args:
+        prices: 1-D price series, oldest first
+        window: Window length in rows
+
+    Returns:
+        np.ndarray: Drawdown as a negative fraction (0 at a window high)
+    """
+    prices = np.asarray( prices, dtype=np.float64 )
+    return prices / rolling_max( prices, window ) - 1
+
+
+class _RankTree :
+    """
+    Fenwick tree over the ranks of a fixed series of values.
+
+    Holds a multiset of the values: a value is added or removed at its rank
+    (its position in the sorted series), and the count and sum of the held
+    values at most some value, or the k-th smallest held value, are read in
+    O(log n).
+    """
+
+    def __init__ ( self, values: np.ndarray ) :
+        order = np.argsort( values, kind="stable" )
+        rank = np.empty( len( values ), dtype=np.int64 )
+        rank[order] = np.arange( len( values ) )
+        # Plain lists: the tree is walked one scalar at a time
+        self.sorted = values[order].tolist()
+        self.rank = rank.tolist()
+
+        self._counts = [0] * (len( values ) + 1)
+        self._sums = [0.0] * (len( values ) + 1)
+        self._top = 1 << len( values ).bit_length()
+
+    def update ( self, index: int, sign: int ) :
+        """Add (sign=1) or remove (sign=-1) the value at a series index."""
+        position = self.rank[index] + 1
+        value = sign * self.sorted[position - 1]
+        while position < len( self._counts ) :
+            self._counts[position] += sign
+            self._sums[position] += value
+            position += position & -position
+
+    def at_most ( self, value: float ) :
+        """Count and sum of the held values <= value."""
+        ranks = bisect.bisect_right( self.sorted, value )
+        count, total = 0, 0.0
+        while ranks > 0 :
+            count += self._counts[ranks]
+            total += self._sums[ranks]
+            ranks -= ranks & -ranks
+        return count, total
+
+    def kth ( self, k: int ) -> float :
+        """k-th smallest held value (0-based)."""
+        position, step = 0, self._top
+        while step :
+            if position + step < len( self._counts ) and self._counts[position + step] <= k :
+                position += step
+                k -= self._counts[position]
+            step >>= 1
+        return self.sorted[position]
+
+
+def rolling_var_cvar ( returns: np.ndarray, window: int, confidence: float = 0.95 ) :
+    """
+    Rolling historical VaR and CVaR, O(n log n).
+
+    The window is held in a Fenwick tree indexed by each return's rank in
+    the whole series, keeping per-rank counts and sums. Each step removes
+    the expiring return and adds the new one; the quantile neighbours are
+    found by descending the tree, and the count and sum of the returns at or
+    below VaR are prefix queries, so no step touches the whole window.
+    VaR interpolates like np.percentile; CVaR averages the returns at or
+    below VaR, as in risk_metrics.var_cvar().
+
+    Args:
+        returns: 1-D returns, oldest first
+        window: Window length in rows
+        confidence: Confidence level
+
+    Returns:
+        tuple: (var, cvar) arrays, NaN for the first window - 1 rows
+
+    Raises:
+        ValueError: If confidence is not between 0 and 1
+    """
+    if not 0 < confidence < 1 :
+        raise ValueError( "Confidence must be between 0 and 1" )
+
+    returns = np.asarray( returns, dtype=np.float64 )
+    var = np.full( len( returns ), np.nan )
+    cvar = np.full( len( returns ), np.nan )
+
+    position = (window - 1) * (1 - confidence)
+    lower = int( np.floor( position ) )
+    upper = min( lower + 1, window - 1 )
+    fraction = position - lower
+
+    tree = _RankTree( returns )
+    for i in range( len( returns ) ) :
+        if i >= window :
+            tree.update( i - window, -1 )
+        tree.update( i, 1 )
+
+        if i >= window - 1 :
+            low, high = tree.kth( lower ), tree.kth( upper )
+            threshold = low + (high - low) * fraction
+            tail, total = tree.at_most( threshold )
+            var[i] = threshold
+            cvar[i] = total / tail
+
+    return var, cvar
+
+
+def rolling_risk_series ( prices: np.ndarray, window: int = 30, confidence: float = 0.95,
+                          periods: float = TRADING_DAYS ) -> Dict[str, np.ndarray] :
+    """
+    Rolling volatility, VaR, CVaR and drawdown of one price series.
+
+    Values are aligned with prices; the first row has no return, so return
+    based metrics start at row `window`.
+
+    Args:
+        prices: 1-D price series, oldest first
+        window: Window length in rows
+        confidence: Confidence level for VaR/CVaR
+        periods: Rows per year, to annualise volatility
+
+    Returns:
+        dict: Metric name -> array aligned with prices
+
+    Raises:
+        ValueError: If the series is shorter than window + 1 prices
+    """
+    prices = np.asarray( prices, dtype=np.float64 )
+    if window < 2 :
+        raise ValueError( "Window must be at least 2" )
+    if len( prices ) < window + 1 :
+        raise ValueError( f"Need at least {window + 1} prices for a {window}-row window, got {len( prices )}" )
+
+    returns = np.diff( prices ) / prices[:-1]
+    var, cvar = rolling_var_cvar( returns, window, confidence )
+
+    def aligned ( values ) :
+        return np.concatenate( [[np.nan], values] )
+
+    return {
+        "volatility" : aligned( rolling_volatility( returns, window, periods=periods ) ),
+        "var" : aligned( var ),
+        "cvar" : aligned( cvar ),
+        "drawdown" : rolling_drawdown( prices, window ),
+    }
+
+
+def _load_history ( asset: str, data_dir: str = DATA_DIR ) -> pd.DataFrame :
+    path = os.path.join( data_dir, asset, f"{asset}.csv" )
+    if not os.path.exists( path ) :
+        raise FileNotFoundError( f"Data not found for '{asset}'" )
+
+    df = pd.read_csv( path )
+    if "Close" not in df.columns :
+        raise ValueError( f"'Close' column not found in data for '{asset}'" )
+    return df
+
+
+def calculate_rolling_risk ( asset: str, window: int = 30, confidence: float = 0.95,
+                             data_dir: str = DATA_DIR ) -> dict :
+    """
+    Rolling risk time series of one asset, ready for charting.
+
+    Args:
+        asset: Asset identifier
+        window: Window length in trading days
+        confidence: Confidence level for VaR/CVaR
+        data_dir: Root data directory
+
+    Returns:
+        dict: Timestamps (or row numbers when the file has none) and one
+            list per metric in percent, with None where the window is not full
+
+    Raises:
+        FileNotFoundError: If the asset has no price file
+        ValueError: If there is not enough data
+    """
+    df = _load_history( asset, data_dir )
+
+    if "timestamp" in df.columns :
+        index = df["timestamp"].astype( str ).tolist()
+        periods = periods_per_year( asset, infer_bar_seconds( df["timestamp"] ) )
+    else :
+        index = list( range( len( df ) ) )
+        periods = periods_per_year( asset )
+
+    # Window is given in trading days; intraday histories need more rows
+    rows = max( 2, int( round( window * periods / CALENDARS[get_calendar( asset )]["trading_days"] ) ) )
+    series = rolling_risk_series( df["Close"].to_numpy( dtype=np.float64 ), rows, confidence, periods )
+
+    def to_list ( values ) :
+        return [None if np.isnan( v ) else round( float( v ) * 100, 4 ) for v in values]
+
+    return {
+        "asset" : asset,
+        "window" : window,
+        "window_rows" : rows,
+        "confidence" : confidence,
+        "timestamps" : index,
+        **{name : to_list( values ) for name, values in series.items()}
+    }
+
+
+def calculate_rolling_risk_many ( assets: List[str], window: int = 30, confidence: float = 0.95,
+                                  data_dir: str = DATA_DIR ) -> Dict[str, Optional[dict]] :
+    """
+    Rolling risk series of several assets.
+
+    Args:
+        assets: Asset identifiers
+        window: Window length in trading days
+        confidence: Confidence level for VaR/CVaR
+        data_dir: Root data directory
+
+    Returns:
+        dict: Asset -> calculate_rolling_risk() result, or None if the asset
+            has no data or too little of it
+    """
+    results = {}
+    for asset in assets :
+        try :
+            results[asset] = calculate_rolling_risk( asset, window, confidence, data_dir )
+        except (FileNotFoundError, ValueError) :
+            results[asset] = None
+    return results
@@ -0,0 +1,309 @@
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+TRAIN_SCRIPT_PATH = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/train_model.py"
+JOB_LOG_DIR = "C:/Users/somas/PycharmProjects/Crypto Price Tracker/backend/model/trained_models/jobs"
+
+# Training jobs allowed to run at once; the rest wait in the queue
+MAX_CONCURRENT_JOBS = 1
+
+# Finished jobs kept in memory for the /jobs endpoints
+MAX_JOB_HISTORY = 100
+
+# Line prefixes printed by train_model.py
+PROGRESS_PREFIX = "[progress]"
+METRICS_PREFIX = "[metrics]"
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class TrainingJob :
+    """State of one queued or running train_model.py invocation."""
+
+    def __init__ ( self, kind: str, args: List[str], description: str, log_path: str ) :
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.args = args
+        self.description = description
+        self.log_path = log_path
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.return_code = None
+        self.progress = None
+        self.metrics = None
+        self.error = None
+        self.process = None
+        self.cancel_requested = False
+
+    def to_dict ( self ) -> dict :
+        """JSON-serialisable view of the job."""
+        return {
+            "job_id" : self.id,
+            "kind" : self.kind,
+            "description" : self.description,
+            "status" : self.status,
+            "created_at" : self.created_at,
+            "started_at" : self.started_at,
+            "finished_at" : self.finished_at,
+            "return_code" : self.return_code,
+            "progress" : self.progress,
+            "metrics" : self.metrics,
+            "error" : self.error,
+            "log_path" : self.log_path
+        }
+
+
+class TrainingJobManager :
+    """
+    In-process queue for training runs with a bounded number of workers.
+
+    Each job runs train_model.py in a child process. A worker thread reads the
+    child's combined stdout/stderr line by line (so the pipe can never fill up
+    and block the child), appends it to a per-job log file, and parses the
+    per-epoch progress and final metrics lines.
+
+    CPU threads are split between workers so concurrent jobs do not
+    oversubscribe the machine.
+    """
+
+    def __init__ ( self, max_workers: int = MAX_CONCURRENT_JOBS,
+                   script_path: str = TRAIN_SCRIPT_PATH, log_dir: str = JOB_LOG_DIR ) :
+        self.max_workers = max( 1, max_workers )
+        self.script_path = script_path
+        self.log_dir = log_dir
+        self._jobs = OrderedDict()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _ensure_workers ( self ) :
+        """Start worker threads on first use."""
+        if self._workers :
+            return
+
+        for i in range( self.max_workers ) :
+            worker = threading.Thread( target=self._worker_loop, name=f"training-worker-{i}", daemon=True )
+            worker.start()
+            self._workers.append( worker )
+
+    def submit ( self, kind: str, args: List[str], description: str ) -> dict :
+        """
+        Queue a training run.
+
+        Args:
+            kind: Job type ("full", "incremental", "coin" or "scalers")
+            args: Command-line arguments for train_model.py
+            description: Human-readable description
+
+        Returns:
+            dict: The queued job
+
+        Raises:
+            FileNotFoundError: If the training script does not exist
+        """
+        if not os.path.exists( self.script_path ) :
+            raise FileNotFoundError( f"Training script not found at {self.script_path}" )
+
+        os.makedirs( self.log_dir, exist_ok=True )
+
+        with self._lock :
+            self._ensure_workers()
+            job = TrainingJob( kind, args, description, log_path="" )
+            job.log_path = os.path.join( self.log_dir, f"{job.id}.log" )
+            self._jobs[job.id] = job
+            self._prune_history()
+
+        self._queue.put( job.id )
+        return job.to_dict()
+
+    def list_jobs ( self ) -> List[dict] :
+        """All known jobs, newest first."""
+        with self._lock :
+            return [job.to_dict() for job in reversed( self._jobs.values() )]
+
+    def get_job ( self, job_id: str ) -> Optional[dict] :
+        """A single job, or None if unknown."""
+        with self._lock :
+            job = self._jobs.get( job_id )
+            return job.to_dict() if job else None
+
+    def get_log ( self, job_id: str, tail: int = 200 ) -> Optional[List[str]] :
+        """
+        Last lines of a job's log file.
+
+        Args:
+            job_id: Job identifier
+            tail: Number of lines to return
+
+        Returns:
+            list: Log lines, or None if the job is unknown
+        """
+        with self._lock :
+            job = self._jobs.get( job_id )
+            if job is None :
+                return None
+            log_path = job.log_path
+
+        if not os.path.exists( log_path ) :
+            return []
+
+        with open( log_path, encoding="utf-8", errors="replace" ) as f :
+            return [line.rstrip( "\n" ) for line in f.readlines()[-tail :]]
+
+    def cancel ( self, job_id: str ) -> Optional[dict] :
+        """
+        Cancel a queued job or terminate a running one.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            dict: The job after the cancel request, or None if unknown
+        """
+        with self._lock :
+            job = self._jobs.get( job_id )
+            if job is None :
+                return None
+
+            if job.status in FINISHED_STATES :
+                return job.to_dict()
+
+            job.cancel_requested = True
+            if job.status == QUEUED :
+                job.status = CANCELLED
+                job.finished_at = time.time()
+            elif job.process is not None :
+                self._terminate( job.process )
+
+            return job.to_dict()
+
+    @staticmethod
+    def _terminate ( process ) :
+        """Stop a training process and its children."""
+        try :
+            if os.name == "posix" :
+                os.killpg( os.getpgid( process.pid ), signal.SIGTERM )
+            else :
+                process.terminate()
+        except (ProcessLookupError, OSError) :
+            pass
+
+    def _prune_history ( self ) :
+        """Drop the oldest finished jobs beyond MAX_JOB_HISTORY."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max( 0, len( self._jobs ) - MAX_JOB_HISTORY )] :
+            del self._jobs[job_id]
+
+    def _thread_budget ( self ) -> Dict[str, str] :
+        """
+        Environment limiting TF/BLAS threads to this worker's share of the CPUs.
+
+        Also makes the child write its piped output as UTF-8, matching how it is
+        read; otherwise Windows encodes the pipe as the ANSI code page and the
+        first emoji progress line fails the job.
+        """
+        threads = str( max( 1, (os.cpu_count() or 1) // self.max_workers ) )
+        return {
+            "TF_NUM_INTRAOP_THREADS" : threads,
+            "TF_NUM_INTEROP_THREADS" : "1",
+            "OMP_NUM_THREADS" : threads,
+            "PYTHONUNBUFFERED" : "1",
+            "PYTHONIOENCODING" : "utf-8"
+        }
+
+    def _worker_loop ( self ) :
+        while True :
+            job_id = self._queue.get()
+            try :
+                with self._lock :
+                    job = self._jobs.get( job_id )
+                    if job is None or job.status != QUEUED :
+                        continue
+                    job.status = RUNNING
+                    job.started_at = time.time()
+
+                self._run( job )
+            except Exception as e :
+                with self._lock :
+                    job.status = FAILED
+                    job.error = str( e )
+                    job.finished_at = time.time()
+            finally :
+                self._queue.task_done()
+
+    def _run ( self, job: TrainingJob ) :
+        """Run one job to completion, streaming its output to the log file."""
+        env = dict( os.environ, **self._thread_budget() )
+
+        with open( job.log_path, "a", encoding="utf-8" ) as log :
+            process = subprocess.Popen(
+                [sys.executable, self.script_path, *job.args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                env=env,
+                start_new_session=True
+            )
+
+            with self._lock :
+                job.process = process
+                cancel_requested = job.cancel_requested
+            if cancel_requested :
+                self._terminate( process )
+
+            # Keep draining the pipe until the child exits
+            for line in process.stdout :
+                log.write( line )
+                log.flush()
+                self._parse_line( job, line )
+
+            return_code = process.wait()
+
+        with self._lock :
+            job.process = None
+            job.return_code = return_code
+            job.finished_at = time.time()
+            if job.cancel_requested :
+                job.status = CANCELLED
+            elif return_code == 0 :
+                job.status = COMPLETED
+            else :
+                job.status = FAILED
+                job.error = f"Training exited with code {return_code}, see {job.log_path}"
+
+    def _parse_line ( self, job: TrainingJob, line: str ) :
+        """Pick up progress and metrics lines printed by train_model.py."""
+        line = line.strip()
+        for prefix, attribute in ((PROGRESS_PREFIX, "progress"), (METRICS_PREFIX, "metrics")) :
+            if line.startswith( prefix ) :
+                try :
+                    value = json.loads( line[len( prefix ) :] )
+                except ValueError :
+                    return
+                with self._lock :
+                    setattr( job, attribute, value )
+                return
+
+
+# Shared manager used by the API
+job_manager = TrainingJobManager()
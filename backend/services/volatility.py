@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from model.vol_forecast import VolatilityModel, align_returns
+from services.coins import get_assets_with_data
+from services.risk_engine import PriceMatrixCache, price_matrix_cache
+
+
+class VolatilityForecaster :
+    """
+    GARCH(1,1) horizon scales of every asset, refitted when price files change.
+
+    The whole universe is fitted in one batch (about a tenth of a second), so
+    instead of tracking individual assets the model is simply refitted when
+    the last price or length of any history differs from the previous fit.
+    """
+
+    def __init__ ( self, cache: PriceMatrixCache = price_matrix_cache ) :
+        self.cache = cache
+        self._model: Optional[VolatilityModel] = None
+        self._index: Dict[str, int] = {}
+        self._signature: Tuple = ()
+        self._lock = threading.Lock()
+
+    def refresh ( self ) :
+        """Refit if any price history changed since the last fit."""
+        series = self.cache.series( get_assets_with_data() )
+        signature = tuple( (asset, len( prices ), float( prices[-1] )) for asset, prices in series.items() )
+
+        with self._lock :
+            if self._model is not None and signature == self._signature :
+                return
+            self._model = VolatilityModel.fit( align_returns( series.values() ) )
+            self._index = {asset : i for i, asset in enumerate( series )}
+            self._signature = signature
+
+    def horizon_scale ( self, asset: str, steps: int ) -> float :
+        """
+        Ratio of the forecast standard deviation over `steps` rows to the one-step one.
+
+        The model is fitted on per-row returns, so the horizon is in rows of
+        the asset's history (hours for crypto, trading days for daily data),
+        not calendar days; see predictor.horizon_rows().
+
+        Args:
+            asset: Asset identifier
+            steps: Horizon in rows
+
+        Returns:
+            float: Horizon scale; sqrt(steps) if the asset has no price history
+        """
+        self.refresh()
+        with self._lock :
+            column = self._index.get( asset )
+            if column is None :
+                return float( np.sqrt( steps ) )
+            return float( self._model.scale( steps )[column] )
+
+
+# Shared forecaster used by the predictor
+volatility_forecaster = VolatilityForecaster()